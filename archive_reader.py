@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Streaming reader and tangler for packaged corpus archives.
+
+Archives produced by the org-archive, markdown and find packagers are
+indexed line by line over an mmap, so listing, extracting or tangling
+files never loads the whole archive into memory. File contents are
+returned as zero-copy memoryview slices of the mapping.
+"""
+
+import argparse
+import mmap
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+ORG_BEGIN = re.compile(rb'#\+begin_src(?:\s+(\S+))?(.*)$', re.IGNORECASE)
+ORG_TANGLE = re.compile(rb':tangle\s+(\S+)')
+ORG_END = re.compile(rb'#\+end_src\s*$', re.IGNORECASE)
+FIND_END = b"### END\n"
+
+
+@dataclass(frozen=True)
+class ArchiveEntry:
+    path: str            # Tangle target / original path of the file
+    language: str        # Language tag from the archive
+    start: int           # Byte offset of the file content
+    end: int             # Byte offset just past the file content
+
+
+class ArchiveReader:
+    """Index and extract files from an org, markdown or find archive."""
+
+    def __init__(self, data: Union[bytes, mmap.mmap], fmt: Optional[str] = None):
+        self._data = data
+        self.format = fmt or self._detect_format()
+
+    @classmethod
+    def open(cls, path: str, fmt: Optional[str] = None) -> "ArchiveReader":
+        """Memory-map an archive file for reading."""
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return cls(b"", fmt)
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), fmt)
+
+    @classmethod
+    def from_text(cls, text: str, fmt: Optional[str] = None) -> "ArchiveReader":
+        """Read an archive held in memory, e.g. the output of package_corpus()."""
+        return cls(text.encode('utf-8'), fmt)
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _detect_format(self) -> str:
+        head = bytes(self._data[:256]).lstrip()
+        if head.startswith(b"#+"):
+            return "org"
+        if head.startswith(b"### FILE: "):
+            return "find"
+        if head.startswith(b"#"):
+            return "markdown"
+        return "unknown"
+
+    def _lines(self, pos: int = 0) -> Iterator[Tuple[int, int, bytes]]:
+        """Yield (start, next_start, line-without-newline) from pos onwards."""
+        data = self._data
+        size = len(data)
+        while pos < size:
+            nl = data.find(b"\n", pos)
+            nxt = size if nl == -1 else nl + 1
+            yield pos, nxt, data[pos:nxt].rstrip(b"\n")
+            pos = nxt
+
+    def entries(self) -> Iterator[ArchiveEntry]:
+        """Stream the files contained in the archive."""
+        if self.format == "org":
+            return self._org_entries()
+        if self.format == "markdown":
+            return self._markdown_entries()
+        if self.format == "find":
+            return self._find_entries()
+        return iter(())
+
+    def _org_entries(self) -> Iterator[ArchiveEntry]:
+        headline = None
+        block: Optional[Tuple[str, str, int]] = None
+        for start, nxt, line in self._lines():
+            if block is None:
+                if line.startswith(b"* "):
+                    headline = line[2:].strip().decode('utf-8', 'replace')
+                    continue
+                begin = ORG_BEGIN.match(line)
+                if begin:
+                    language = (begin.group(1) or b"text").decode('utf-8', 'replace')
+                    tangle = ORG_TANGLE.search(begin.group(2))
+                    target = tangle.group(1).decode('utf-8', 'replace') if tangle else None
+                    if target in (None, "yes"):
+                        target = headline
+                    if target == "no":
+                        target = None
+                    block = (target, language, nxt)
+            elif ORG_END.match(line):
+                target, language, content_start = block
+                block = None
+                if target:
+                    # The packager appends one newline before #+END_SRC
+                    yield ArchiveEntry(target, language, content_start,
+                                       max(content_start, start - 1))
+
+    def _markdown_entries(self) -> Iterator[ArchiveEntry]:
+        path = None
+        fence: Optional[Tuple[str, int]] = None
+        for start, nxt, line in self._lines():
+            if fence is None:
+                if line.startswith(b"Path: "):
+                    path = line[6:].decode('utf-8', 'replace')
+                elif line.startswith(b"```") and path:
+                    fence = (line[3:].strip().decode('utf-8', 'replace') or "text", nxt)
+            elif line == b"```":
+                language, content_start = fence
+                fence = None
+                yield ArchiveEntry(path, language, content_start,
+                                   max(content_start, start - 1))
+                path = None
+
+    def _find_entries(self) -> Iterator[ArchiveEntry]:
+        data = self._data
+        size = len(data)
+        pos = 0
+        while True:
+            if data[pos:pos + 10] != b"### FILE: ":
+                return
+            nl = data.find(b"\n", pos)
+            if nl == -1:
+                return
+            path = bytes(data[pos + 10:nl]).decode('utf-8', 'replace')
+            content_start = nl + 1
+            # An END marker only counts if the next file (or EOF) follows it
+            search = content_start
+            while True:
+                end = data.find(FIND_END, search)
+                if end == -1:
+                    return
+                nxt = end + len(FIND_END)
+                if nxt == size or data[nxt:nxt + 10] == b"### FILE: ":
+                    break
+                search = end + 1
+            language = path.rsplit('.', 1)[-1] if '.' in path.split('/')[-1] else "text"
+            yield ArchiveEntry(path, language, content_start, end)
+            pos = nxt
+
+    def read(self, entry: ArchiveEntry) -> memoryview:
+        """Return a zero-copy view of an entry's content."""
+        return memoryview(self._data)[entry.start:entry.end]
+
+    def read_text(self, entry: ArchiveEntry) -> str:
+        return bytes(self.read(entry)).decode('utf-8')
+
+    def extract(self) -> Dict[str, str]:
+        """Return {path: content} for every file in the archive."""
+        return {entry.path: self.read_text(entry) for entry in self.entries()}
+
+    def tangle(self, dest: str) -> List[str]:
+        """Write every file below dest, returning the paths written.
+
+        Absolute and `..` paths are re-rooted under dest so tangling an
+        untrusted archive cannot write outside it.
+        """
+        written = []
+        for entry in self.entries():
+            parts = [p for p in entry.path.replace('\\', '/').split('/')
+                     if p not in ('', '.', '..')]
+            if not parts:
+                continue
+            target = os.path.join(dest, *parts)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(self.read(entry))
+            written.append(target)
+        return written
+
+
+def measure_parse(text: str, fmt: Optional[str] = None) -> Tuple[float, Dict[str, str]]:
+    """Time a full parse of a packed archive, returning (seconds, {path: content})."""
+    start_time = time.perf_counter()
+    files = ArchiveReader.from_text(text, fmt).extract()
+    return time.perf_counter() - start_time, files
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('command', choices=['list', 'extract', 'tangle'])
+    parser.add_argument('archive')
+    parser.add_argument('dest', nargs='?', default='.',
+                        help="Output directory for tangle")
+    parser.add_argument('--path', help="File to print for extract")
+    args = parser.parse_args()
+
+    with ArchiveReader.open(args.archive) as reader:
+        if args.command == 'list':
+            for entry in reader.entries():
+                print(f"{entry.path}\t{entry.language}\t{entry.end - entry.start}")
+        elif args.command == 'extract':
+            for entry in reader.entries():
+                if args.path is None or entry.path == args.path:
+                    print(reader.read_text(entry), end='')
+        else:
+            for target in reader.tangle(args.dest):
+                print(target)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Repeated-measurement benchmark runner for the test matrix.
+
+Each cell is run for a number of discarded warmup iterations and then N
+timed repetitions. Packaging time, model latency and success rate are
+summarised as median, p95 and a bootstrap confidence interval of the
+median. Samples can be stored as a named baseline in the results store,
+and later runs are compared against it with a one-sided Mann-Whitney U
+test so only statistically significant regressions are flagged.
+"""
+
+import argparse
+import math
+import random
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import multi_render
+from executor import MatrixCell
+from fragment_cache import FragmentCache
+from results_store import ResultsStore
+from test_harness import FormatTester
+
+# Metric name -> True when larger values are worse
+METRICS = {
+    'packaging_time': True,
+    'latency': True,
+    'success_rate': False,
+}
+
+SampleKey = Tuple[str, str, str]    # (model, test_id, metric)
+
+
+@dataclass
+class Summary:
+    samples: List[float]
+    median: float
+    p95: float
+    mean: float
+    stdev: float
+    ci_low: float        # Bootstrap confidence interval of the median
+    ci_high: float
+
+    @property
+    def n(self) -> int:
+        return len(self.samples)
+
+
+@dataclass
+class Regression:
+    model: str
+    test_id: str
+    metric: str
+    baseline_median: float
+    current_median: float
+    change: float        # Relative change of the median, signed
+    p_value: float
+
+
+@dataclass
+class CellStats:
+    model: str
+    test_id: str
+    metrics: Dict[str, Summary] = field(default_factory=dict)
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Linearly interpolated percentile, q in [0, 100]."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    pos = (len(ordered) - 1) * q / 100
+    lower = math.floor(pos)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (pos - lower)
+
+
+def summarize(samples: List[float], confidence: float = 0.95,
+              resamples: int = 2000, seed: int = 0) -> Summary:
+    """Summarise samples with a percentile-bootstrap CI of the median."""
+    rng = random.Random(seed)
+    medians = sorted(statistics.median(rng.choices(samples, k=len(samples)))
+                     for _ in range(resamples)) if len(samples) > 1 else list(samples)
+    tail = (1 - confidence) / 2 * 100
+    return Summary(
+        samples=list(samples),
+        median=statistics.median(samples),
+        p95=percentile(samples, 95),
+        mean=statistics.fmean(samples),
+        stdev=statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        ci_low=percentile(medians, tail),
+        ci_high=percentile(medians, 100 - tail),
+    )
+
+
+def mann_whitney_greater(baseline: List[float], current: List[float]) -> float:
+    """One-sided p-value that current is stochastically greater than baseline.
+
+    Uses the normal approximation with tie and continuity corrections.
+    """
+    n1, n2 = len(baseline), len(current)
+    if not n1 or not n2:
+        return 1.0
+    pooled = sorted([(v, 0) for v in baseline] + [(v, 1) for v in current])
+    ranks = [0.0] * len(pooled)
+    ties = 0.0
+    i = 0
+    while i < len(pooled):
+        j = i
+        while j + 1 < len(pooled) and pooled[j + 1][0] == pooled[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        t = j - i + 1
+        ties += t ** 3 - t
+        i = j + 1
+
+    n = n1 + n2
+    u = sum(rank for rank, (_, group) in zip(ranks, pooled) if group) - n2 * (n2 + 1) / 2
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1))))
+    if sigma == 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / sigma
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def find_regressions(baseline: Dict[SampleKey, List[float]],
+                     current: Dict[SampleKey, List[float]],
+                     alpha: float = 0.05, min_change: float = 0.05) -> List[Regression]:
+    """Compare sample sets, flagging significant changes in the worse direction.
+
+    A change must be significant at alpha and move the median by at least
+    min_change (relative) to count, so tiny but consistent shifts are ignored.
+    """
+    regressions = []
+    for key, samples in current.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        model, test_id, metric = key
+        higher_is_worse = METRICS.get(metric, True)
+        base_median, cur_median = statistics.median(base), statistics.median(samples)
+        if higher_is_worse:
+            p_value = mann_whitney_greater(base, samples)
+        else:
+            p_value = mann_whitney_greater(samples, base)
+        change = (cur_median - base_median) / abs(base_median) if base_median else (
+            0.0 if cur_median == base_median else math.copysign(math.inf, cur_median - base_median))
+        worse = change > 0 if higher_is_worse else change < 0
+        if worse and abs(change) >= min_change and p_value < alpha:
+            regressions.append(Regression(model, test_id, metric, base_median,
+                                          cur_median, change, p_value))
+    return regressions
+
+
+class BenchmarkRunner:
+    """Run matrix cells repeatedly and summarise the samples per metric.
+
+    The response cache is disabled while measuring (a cache hit would time
+    the cache, not the model). Every measurement also starts from an empty
+    fragment cache and render memo, so packaging time is a real read and
+    render of the corpus rather than a memoized lookup. With package_only,
+    models are not called and only packaging time is measured per format.
+    """
+
+    def __init__(self, tester: FormatTester, warmup: int = 1, repetitions: int = 5,
+                 package_only: bool = False, confidence: float = 0.95):
+        if repetitions < 1 or warmup < 0:
+            raise ValueError("Need at least one repetition and a non-negative warmup")
+        self.tester = tester
+        self.warmup = warmup
+        self.repetitions = repetitions
+        self.package_only = package_only
+        self.confidence = confidence
+        self.samples: Dict[SampleKey, List[float]] = {}
+
+    def _measure(self, cell: MatrixCell) -> Dict[str, float]:
+        multi_render.clear()
+        self.tester.fragment_cache = FragmentCache()
+        if self.package_only:
+            start = time.perf_counter()
+            for _ in self.tester.iter_format(cell.format_name, cell.option):
+                pass
+            return {'packaging_time': time.perf_counter() - start}
+        result = self.tester.run_test(cell.model, cell.format_name, cell.option)
+        return {
+            'packaging_time': result.packaging_time,
+            'latency': result.inference_time or result.execution_time,
+            'success_rate': result.success_rate,
+        }
+
+    def _cells(self, models: Optional[List[str]], formats: Optional[List[str]]) -> List[MatrixCell]:
+        cells = [cell for cell in self.tester._matrix_cells()
+                 if (models is None or cell.model in models)
+                 and (formats is None or cell.format_name in formats)]
+        if self.package_only:
+            # Packaging does not depend on the model; measure each format once
+            seen = set()
+            cells = [cell for cell in cells
+                     if cell.test_id not in seen and not seen.add(cell.test_id)]
+        return cells
+
+    def run(self, models: Optional[List[str]] = None,
+            formats: Optional[List[str]] = None) -> List[CellStats]:
+        """Measure each cell (grouped by model) and return per-metric summaries."""
+        cache, self.tester.cache = self.tester.cache, None
+        fragment_cache = self.tester.fragment_cache
+        stats = []
+        try:
+            current_model = None
+            for cell in self._cells(models, formats):
+                model = '*' if self.package_only else cell.model
+                if model != current_model and not self.package_only:
+                    self.tester._warmup(cell.model)
+                current_model = model
+                for _ in range(self.warmup):
+                    self._measure(cell)
+                cell_samples: Dict[str, List[float]] = {}
+                for _ in range(self.repetitions):
+                    for metric, value in self._measure(cell).items():
+                        cell_samples.setdefault(metric, []).append(value)
+                entry = CellStats(model, cell.test_id)
+                for metric, values in cell_samples.items():
+                    self.samples[(model, cell.test_id, metric)] = values
+                    entry.metrics[metric] = summarize(values, self.confidence)
+                stats.append(entry)
+        finally:
+            self.tester.cache = cache
+            self.tester.fragment_cache = fragment_cache
+        return stats
+
+    def save_baseline(self, store: ResultsStore, name: str):
+        store.add_baseline(name, self.samples)
+
+    def compare(self, store: ResultsStore, name: str, alpha: float = 0.05,
+                min_change: float = 0.05) -> List[Regression]:
+        return find_regressions(store.baseline(name), self.samples, alpha, min_change)
+
+
+def _format_value(metric: str, value: float) -> str:
+    return f"{value:.1%}" if metric == 'success_rate' else f"{value * 1000:.2f}ms"
+
+
+def iter_stats_report(stats: List[CellStats],
+                      regressions: Optional[List[Regression]] = None,
+                      confidence: float = 0.95) -> Iterator[str]:
+    """Render summaries (and any regressions) as markdown lines."""
+    yield "# Benchmark Statistics\n"
+    yield f"| Model | Format | Metric | n | Median | p95 | {confidence:.0%} CI (median) |"
+    yield "|-------|--------|--------|---|--------|-----|----------------|"
+    for cell in stats:
+        for metric, s in cell.metrics.items():
+            yield (f"| {cell.model} | {cell.test_id} | {metric} | {s.n} | "
+                   f"{_format_value(metric, s.median)} | {_format_value(metric, s.p95)} | "
+                   f"{_format_value(metric, s.ci_low)} - {_format_value(metric, s.ci_high)} |")
+    if regressions is None:
+        return
+    yield "\n## Regressions\n"
+    if not regressions:
+        yield "No statistically significant regressions."
+        return
+    yield "| Model | Format | Metric | Baseline | Current | Change | p |"
+    yield "|-------|--------|--------|----------|---------|--------|---|"
+    for r in regressions:
+        yield (f"| {r.model} | {r.test_id} | {r.metric} | "
+               f"{_format_value(r.metric, r.baseline_median)} | "
+               f"{_format_value(r.metric, r.current_median)} | {r.change:+.1%} | {r.p_value:.3f} |")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Repeated-measurement matrix benchmark.")
+    parser.add_argument('corpus', help="Corpus directory or snapshot")
+    parser.add_argument('--ollama-url', default=None)
+    parser.add_argument('--models', nargs='*', help="Models to run (default: all)")
+    parser.add_argument('--formats', nargs='*', help="Formats to run (default: all)")
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--repetitions', type=int, default=5)
+    parser.add_argument('--package-only', action='store_true',
+                        help="Only measure packaging time; do not call models")
+    parser.add_argument('--results', default='results.sqlite3', help="Results store for baselines")
+    parser.add_argument('--save-baseline', metavar='NAME')
+    parser.add_argument('--compare', metavar='NAME', help="Baseline to check for regressions")
+    parser.add_argument('--alpha', type=float, default=0.05)
+    parser.add_argument('--min-change', type=float, default=0.05)
+    args = parser.parse_args()
+
+    kwargs = {'cache_path': None}
+    if args.ollama_url:
+        kwargs['ollama_url'] = args.ollama_url
+    runner = BenchmarkRunner(FormatTester(args.corpus, **kwargs), args.warmup,
+                             args.repetitions, args.package_only)
+    stats = runner.run(args.models, args.formats)
+
+    regressions = None
+    store = ResultsStore(args.results) if args.save_baseline or args.compare else None
+    if args.compare:
+        regressions = runner.compare(store, args.compare, args.alpha, args.min_change)
+    if args.save_baseline:
+        runner.save_baseline(store, args.save_baseline)
+    print("\n".join(iter_stats_report(stats, regressions)))
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
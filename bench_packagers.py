@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Packager throughput benchmark.
+
+Packages a (synthetic or real) corpus with every format of both
+FormatTester classes and reports wall time, files/s, MB/s and peak RSS.
+Each measurement runs in a fresh worker process so peak RSS and caches
+are per format. Results are written as JSON lines tagged with the git
+commit so runs can be compared across commits.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from synthetic_corpus import CorpusSpec, generate, parse_languages
+
+# (module, format) pairs covering every packager in both FormatTester classes
+TARGETS = [
+    ('format_tester', 'find'),
+    ('format_tester', 'files-to-prompt'),
+    ('format_tester', 'markdown'),
+    ('format_tester', 'org-archive'),
+    ('test_harness', 'find'),
+    ('test_harness', 'files-to-prompt'),
+    ('test_harness', 'files-to-prompt-cxml'),
+    ('test_harness', 'markdown'),
+    ('test_harness', 'org'),
+]
+
+# Targets that shell out to the files-to-prompt CLI
+EXTERNAL_TARGETS = (('format_tester', 'files-to-prompt'),)
+
+
+def _peak_rss_bytes() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def _package(module: str, fmt: str, corpus: str) -> str:
+    if module == 'format_tester':
+        from format_tester import FormatTester
+        return FormatTester(corpus, format_tool=fmt).package_corpus()
+    from test_harness import FormatTester
+    tester = FormatTester(corpus, cache_path=None)
+    if fmt == 'files-to-prompt-cxml':
+        return "".join(tester.iter_format('files-to-prompt', {'cxml': True}))
+    return "".join(tester.iter_format(fmt))
+
+
+def run_worker(module: str, fmt: str, corpus: str, repeat: int) -> Dict[str, Any]:
+    """Measure one packager in this process.
+
+    Nothing has scanned the corpus before the first pass, so it is cold and
+    includes the walk; later passes reuse the shared scanner and caches.
+    """
+    from corpus import get_scanner
+    importlib.import_module(module)    # Keep import time out of the cold pass
+    walls = []
+    output_chars = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output_chars = len(_package(module, fmt, corpus))
+        walls.append(time.perf_counter() - start)
+
+    files = get_scanner(corpus).scan()
+    corpus_bytes = sum(f.size for f in files)
+    wall = walls[0]
+    warm = min(walls[1:]) if len(walls) > 1 else None
+    return {
+        'module': module,
+        'format': fmt,
+        'files': len(files),
+        'corpus_bytes': corpus_bytes,
+        'output_chars': output_chars,
+        'wall_time': wall,
+        'warm_time': warm,
+        'wall_times': walls,
+        'files_per_sec': len(files) / wall if wall else 0.0,
+        'mb_per_sec': corpus_bytes / 1e6 / wall if wall else 0.0,
+        'peak_rss_bytes': _peak_rss_bytes(),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_suite(corpus: str, repeat: int = 3,
+              targets: List = None) -> List[Dict[str, Any]]:
+    """Measure every target in its own worker process."""
+    results = []
+    commit = _git_commit()
+    for module, fmt in targets or TARGETS:
+        if (module, fmt) in EXTERNAL_TARGETS and shutil.which('files-to-prompt') is None:
+            results.append({'module': module, 'format': fmt, 'skipped': 'files-to-prompt not installed',
+                            'commit': commit})
+            continue
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--worker', module, fmt,
+             corpus, '--repeat', str(repeat)],
+            capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)))
+        if proc.returncode != 0:
+            results.append({'module': module, 'format': fmt, 'error': proc.stderr.strip()[-500:],
+                            'commit': commit})
+            continue
+        result = json.loads(proc.stdout)
+        result['commit'] = commit
+        results.append(result)
+    return results
+
+
+def format_table(results: List[Dict[str, Any]]) -> str:
+    lines = ["| Module | Format | Files | Cold | Warm | Files/s | MB/s | Peak RSS |",
+             "|--------|--------|-------|------|------|---------|------|----------|"]
+    for r in results:
+        if 'wall_time' not in r:
+            lines.append(f"| {r['module']} | {r['format']} | - | "
+                         f"{r.get('skipped') or 'error'} | | | | |")
+            continue
+        lines.append(
+            f"| {r['module']} | {r['format']} | {r['files']} | "
+            f"{r['wall_time']:.3f}s | "
+            f"{'-' if r['warm_time'] is None else format(r['warm_time'], '.3f') + 's'} | "
+            f"{r['files_per_sec']:.0f} | "
+            f"{r['mb_per_sec']:.1f} | {r['peak_rss_bytes'] / 1e6:.0f} MB |"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark corpus packagers.")
+    parser.add_argument('--worker', nargs=3, metavar=('MODULE', 'FORMAT', 'CORPUS'),
+                        help=argparse.SUPPRESS)
+    parser.add_argument('--corpus', help="Existing corpus to benchmark")
+    parser.add_argument('--files', type=int, default=1000,
+                        help="Synthetic corpus size when --corpus is not given")
+    parser.add_argument('--median-size', type=int, default=2048)
+    parser.add_argument('--size-sigma', type=float, default=1.0,
+                        help="Log-normal spread of synthetic file sizes (0 = fixed)")
+    parser.add_argument('--languages', type=parse_languages, default=None,
+                        help="Synthetic language mix, e.g. 'py=5,js=3,scm=2'")
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--fanout', type=int, default=16)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help="Append JSON lines results to this file")
+    args = parser.parse_args()
+
+    if args.worker:
+        module, fmt, corpus = args.worker
+        print(json.dumps(run_worker(module, fmt, corpus, args.repeat)))
+        return
+
+    tmpdir = None
+    corpus = args.corpus
+    if corpus is None:
+        tmpdir = tempfile.mkdtemp(prefix='synthetic-corpus-')
+        corpus = tmpdir
+        spec = CorpusSpec(files=args.files, median_size=args.median_size,
+                          size_sigma=args.size_sigma, depth=args.depth,
+                          fanout=args.fanout, seed=args.seed)
+        if args.languages:
+            spec.languages = args.languages
+        generate(corpus, spec)
+    try:
+        results = run_suite(corpus, args.repeat)
+    finally:
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    print(format_table(results))
+    if args.output:
+        with open(args.output, 'a') as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
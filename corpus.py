@@ -0,0 +1,111 @@
+"""
+In-process corpus scanner shared by the format packagers.
+"""
+
+import os
+from dataclasses import dataclass
+from fnmatch import fnmatch
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_EXTENSIONS = ('py', 'js', 'scm')
+DEFAULT_IGNORE = ('.git', '__pycache__', 'node_modules', '.venv', 'venv')
+
+
+@dataclass(frozen=True)
+class CorpusFile:
+    path: str        # Path as `find` would print it (rooted at corpus_path)
+    relpath: str     # Path relative to the corpus root, '/' separated
+    size: int        # Size in bytes from the cached stat
+    mtime_ns: int    # Modification time from the cached stat
+
+
+class CorpusScanner:
+    """Walk a corpus once with os.scandir and cache the file list and stats."""
+    variant = ''     # Distinguishes transformed views of the same files in caches
+
+    def __init__(self,
+                 root: str,
+                 extensions: Tuple[str, ...] = DEFAULT_EXTENSIONS,
+                 ignore: Tuple[str, ...] = DEFAULT_IGNORE):
+        self.root = root
+        self.extensions = tuple(extensions)
+        self.ignore = tuple(ignore)
+        self._suffixes = tuple(f".{ext}" for ext in self.extensions)
+        self._files: Optional[List[CorpusFile]] = None
+        self._stats: Dict[str, os.stat_result] = {}
+
+    def _is_ignored(self, name: str) -> bool:
+        return any(fnmatch(name, pattern) for pattern in self.ignore)
+
+    def _walk(self, directory: str, relprefix: str, found: List[CorpusFile],
+              stats: Dict[str, os.stat_result]):
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            return
+
+        for entry in entries:
+            if self._is_ignored(entry.name):
+                continue
+            relpath = relprefix + entry.name
+            if entry.is_dir(follow_symlinks=False):
+                self._walk(entry.path, relpath + '/', found, stats)
+            elif (entry.is_file(follow_symlinks=False)
+                  and entry.name.endswith(self._suffixes)):
+                st = entry.stat(follow_symlinks=False)
+                stats[entry.path] = st
+                found.append(CorpusFile(entry.path, relpath,
+                                        st.st_size, st.st_mtime_ns))
+
+    def scan(self, refresh: bool = False) -> List[CorpusFile]:
+        """Return matching files in deterministic (sorted, depth-first) order.
+
+        refresh re-walks the tree and re-stats every file; packaging passes
+        do this so files edited, added or removed since the last pass are seen.
+        """
+        if self._files is None or refresh:
+            found: List[CorpusFile] = []
+            stats: Dict[str, os.stat_result] = {}
+            self._walk(self.root, '', found, stats)
+            # Swap both at once so concurrent readers never see a half-built index
+            self._files, self._stats = found, stats
+        return self._files
+
+    def paths(self) -> List[str]:
+        """Return the paths of all matching files."""
+        return [f.path for f in self.scan()]
+
+    def stat(self, path: str) -> os.stat_result:
+        """Return the cached stat for a scanned path, stat'ing on a miss."""
+        st = self._stats.get(path)
+        if st is None:
+            st = self._stats[path] = os.stat(path)
+        return st
+
+    def read(self, path: str) -> str:
+        """Read a corpus file as text."""
+        with open(path, 'r') as f:
+            return f.read()
+
+
+_SCANNERS: Dict[Tuple[str, Tuple[str, ...], Tuple[str, ...]], CorpusScanner] = {}
+
+
+def get_scanner(root: str,
+                extensions: Tuple[str, ...] = DEFAULT_EXTENSIONS,
+                ignore: Tuple[str, ...] = DEFAULT_IGNORE) -> CorpusScanner:
+    """Return the shared scanner for a corpus so a matrix run walks it once.
+
+    root may be a corpus directory or a snapshot file written by snapshot.py.
+    """
+    key = (root, tuple(extensions), tuple(ignore))
+    scanner = _SCANNERS.get(key)
+    if scanner is None:
+        from snapshot import SnapshotScanner, is_snapshot
+        if is_snapshot(root):
+            scanner = SnapshotScanner(root)
+        else:
+            scanner = CorpusScanner(root, extensions, ignore)
+        _SCANNERS[key] = scanner
+    return scanner
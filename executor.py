@@ -0,0 +1,137 @@
+"""
+Concurrent executor for the model x format x option test matrix.
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class MatrixCell:
+    model: str
+    format_name: str
+    option_name: str
+    option: Any = None
+
+    @property
+    def test_id(self) -> str:
+        return f"{self.format_name}_{self.option_name}"
+
+
+@dataclass
+class CellTiming:
+    queue_time: float     # Seconds between matrix start and cell dispatch
+    service_time: float   # Seconds spent running the cell
+
+
+class MatrixExecutor:
+    """Run matrix cells on a thread pool with global and per-model in-flight limits.
+
+    With max_models set, cells are grouped by model and at most that many
+    models are active at once, so a model's cells run back to back instead
+    of interleaving with (and evicting) other models.
+    """
+
+    def __init__(self,
+                 max_workers: int = 4,
+                 per_model_limit: int = 1,
+                 model_limits: Optional[Dict[str, int]] = None,
+                 max_models: Optional[int] = None):
+        if max_workers < 1 or per_model_limit < 1 or (max_models is not None and max_models < 1):
+            raise ValueError("Concurrency limits must be at least 1")
+        self.max_workers = max_workers
+        self.per_model_limit = per_model_limit
+        self.model_limits = dict(model_limits or {})
+        self.max_models = max_models
+        self.warmups: Dict[str, Any] = {}
+
+    def limit_for(self, model: str) -> int:
+        return max(1, self.model_limits.get(model, self.per_model_limit))
+
+    def run(self, cells: List[MatrixCell],
+            func: Callable[[MatrixCell], Any],
+            on_model_start: Optional[Callable[[str], Any]] = None,
+            on_model_done: Optional[Callable[[str], Any]] = None
+            ) -> Iterator[Tuple[MatrixCell, Any, CellTiming]]:
+        """Run func over cells, yielding (cell, result, timing) as cells complete.
+
+        Cells are dispatched in list order whenever both the global and the
+        cell's per-model limit have room, so a slow model never holds slots
+        another model could use. on_model_start (e.g. a warmup request) runs
+        before a model's first cell is dispatched and its result is kept in
+        self.warmups; on_model_done (e.g. an unload) runs once a model's last
+        cell finishes. Both occupy a worker slot, and a model's max_models
+        slot is only released once on_model_done has completed, so the next
+        model's warmup never races the previous model's unload.
+        """
+        pending = list(cells)
+        if self.max_models is not None:
+            order = {model: i for i, model in reversed(list(enumerate(c.model for c in cells)))}
+            pending.sort(key=lambda cell: order[cell.model])
+        remaining: Dict[str, int] = {}
+        for cell in pending:
+            remaining[cell.model] = remaining.get(cell.model, 0) + 1
+        active: List[str] = []
+        ready: Dict[str, bool] = {}
+        in_flight: Dict[str, int] = {}
+        # future -> (kind, cell, model); kind is 'start', 'cell' or 'done'
+        running: Dict[Future, Tuple[str, Optional[MatrixCell], str]] = {}
+        start = time.perf_counter()
+
+        def timed(cell: MatrixCell) -> Tuple[Any, float, float]:
+            began = time.perf_counter()
+            result = func(cell)
+            return result, began, time.perf_counter()
+
+        def activate(model: str):
+            active.append(model)
+            if on_model_start is None:
+                ready[model] = True
+            else:
+                ready[model] = False
+                running[pool.submit(on_model_start, model)] = ('start', None, model)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            try:
+                while pending or running:
+                    for cell in list(pending):
+                        if len(running) >= self.max_workers:
+                            break
+                        if cell.model not in active:
+                            if self.max_models is not None and len(active) >= self.max_models:
+                                continue
+                            activate(cell.model)
+                        if not ready[cell.model]:
+                            continue
+                        if in_flight.get(cell.model, 0) >= self.limit_for(cell.model):
+                            continue
+                        pending.remove(cell)
+                        in_flight[cell.model] = in_flight.get(cell.model, 0) + 1
+                        running[pool.submit(timed, cell)] = ('cell', cell, cell.model)
+
+                    done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        kind, cell, model = running.pop(future)
+                        if kind == 'start':
+                            self.warmups[model] = future.result()
+                            ready[model] = True
+                            continue
+                        if kind == 'done':
+                            future.result()
+                            active.remove(model)
+                            continue
+                        in_flight[model] -= 1
+                        remaining[model] -= 1
+                        if not remaining[model]:
+                            if on_model_done is not None:
+                                running[pool.submit(on_model_done, model)] = ('done', None, model)
+                            else:
+                                active.remove(model)
+                        result, began, finished = future.result()
+                        yield cell, result, CellTiming(queue_time=began - start,
+                                                       service_time=finished - began)
+            finally:
+                for future in running:
+                    future.cancel()
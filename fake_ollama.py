@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Ollama HTTP API.
+
+Serves /api/chat (streaming and non-streaming) and /api/tags with
+scriptable per-model profiles: model load time, time-to-first-token,
+decode throughput, error and timeout rates, and canned or templated
+review text. Lets the harness's concurrency, timeouts and caching be
+load-tested on a machine without a GPU.
+
+Example profiles file:
+
+    {"default": {"ttft": 0.2, "tokens_per_sec": 40},
+     "phi3:latest": {"ttft": 0.1, "tokens_per_sec": 80, "error_rate": 0.05}}
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Template
+from typing import Any, Dict, Optional
+
+DEFAULT_RESPONSE = """[File: fizzbuzz.py]
+- Bug: off_by_one in the loop bounds (line 3) [medium]
+  Fix: use range(1, n + 1) and drop the zero check
+[File: fibonacci.py]
+- Bug: stack overflow from unbounded recursion (line 9) [high]
+  Fix: use an iterative loop; keep the base case if n <= 1
+[File: append.py]
+- Bug: mutation of the caller's list (line 4) [high]
+  Fix: build a new_list with list1 + list2 or a slice copy
+Reviewed by $model."""
+
+TOKEN = re.compile(r'\S+\s*|\s+')
+
+
+@dataclass
+class ModelProfile:
+    load_time: float = 0.0          # Seconds to load the model when not resident
+    ttft: float = 0.1               # Seconds of prefill before the first token
+    tokens_per_sec: float = 50.0    # Decode throughput
+    error_rate: float = 0.0         # Probability of an HTTP 500
+    timeout_rate: float = 0.0       # Probability of hanging instead of answering
+    hang_seconds: float = 3600.0    # How long a simulated timeout hangs
+    response: str = DEFAULT_RESPONSE  # Review text; $model and $prompt_chars are substituted
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ModelProfile":
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+
+class FakeOllama:
+    """Profile lookup, simulated model residency and response rendering."""
+
+    def __init__(self, profiles: Optional[Dict[str, ModelProfile]] = None,
+                 max_loaded: int = 1, seed: Optional[int] = None):
+        self.profiles = profiles or {}
+        self.max_loaded = max_loaded
+        self.rng = random.Random(seed)
+        self._loaded: "OrderedDict[str, float]" = OrderedDict()   # model -> expiry
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.loads = 0
+
+    def profile(self, model: str) -> ModelProfile:
+        return self.profiles.get(model) or self.profiles.get('default') or ModelProfile()
+
+    def load(self, model: str, keep_alive: float = 300.0) -> float:
+        """Make model resident, returning the simulated load time incurred."""
+        now = time.monotonic()
+        with self._lock:
+            self.requests += 1
+            for name, expiry in list(self._loaded.items()):
+                if expiry < now:
+                    del self._loaded[name]
+            resident = model in self._loaded
+            if resident:
+                self._loaded.move_to_end(model)
+            else:
+                self.loads += 1
+                while len(self._loaded) >= self.max_loaded:
+                    self._loaded.popitem(last=False)
+            self._loaded[model] = now + keep_alive
+        return 0.0 if resident else self.profile(model).load_time
+
+    def unload(self, model: str):
+        """Expire a model immediately, as keep_alive=0 does; never loads it."""
+        with self._lock:
+            self.requests += 1
+            self._loaded.pop(model, None)
+
+    def roll(self, rate: float) -> bool:
+        with self._lock:
+            return self.rng.random() < rate
+
+    def render(self, model: str, prompt: str) -> str:
+        return Template(self.profile(model).response).safe_substitute(
+            model=model, prompt_chars=len(prompt))
+
+
+def _keep_alive_seconds(value: Any) -> float:
+    """Parse Ollama keep_alive values such as 300, "5m" or "-1"."""
+    if value is None:
+        return 300.0
+    if isinstance(value, (int, float)):
+        return float('inf') if value < 0 else float(value)
+    match = re.fullmatch(r'(-?\d+(?:\.\d+)?)([smh]?)', str(value).strip())
+    if not match:
+        return 300.0
+    number = float(match.group(1))
+    if number < 0:
+        return float('inf')
+    return number * {'': 1, 's': 1, 'm': 60, 'h': 3600}[match.group(2)]
+
+
+def make_handler(server_state: FakeOllama):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, payload: Dict[str, Any]):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _write_chunk(self, payload: Dict[str, Any]):
+            data = (json.dumps(payload) + "\n").encode('utf-8')
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+        def do_GET(self):
+            if self.path != '/api/tags':
+                self._send_json(404, {'error': 'not found'})
+                return
+            models = [name for name in server_state.profiles if name != 'default']
+            self._send_json(200, {'models': [
+                {'name': name, 'model': name,
+                 'digest': hashlib.sha256(name.encode('utf-8')).hexdigest()}
+                for name in models
+            ]})
+
+        def do_POST(self):
+            if self.path != '/api/chat':
+                self._send_json(404, {'error': 'not found'})
+                return
+            length = int(self.headers.get('Content-Length', 0))
+            try:
+                request = json.loads(self.rfile.read(length) or b'{}')
+            except json.JSONDecodeError:
+                self._send_json(400, {'error': 'invalid JSON'})
+                return
+
+            model = request.get('model', '')
+            profile = server_state.profile(model)
+            keep_alive = _keep_alive_seconds(request.get('keep_alive'))
+            if keep_alive == 0 and not request.get('messages'):
+                server_state.unload(model)
+                self._send_json(200, {'model': model, 'done': True, 'done_reason': 'unload',
+                                      'message': {'role': 'assistant', 'content': ''}})
+                return
+            start = time.perf_counter()
+            load_time = server_state.load(model, keep_alive)
+            time.sleep(load_time)
+
+            messages = request.get('messages') or []
+            prompt = "".join(m.get('content', '') for m in messages)
+            if not messages:
+                # Ollama treats an empty chat as a load/keep-alive request
+                self._send_json(200, {'model': model, 'done': True, 'done_reason': 'load',
+                                      'message': {'role': 'assistant', 'content': ''},
+                                      'load_duration': int(load_time * 1e9)})
+                return
+            if server_state.roll(profile.error_rate):
+                self._send_json(500, {'error': 'simulated model failure'})
+                return
+            if server_state.roll(profile.timeout_rate):
+                time.sleep(profile.hang_seconds)
+                self.close_connection = True
+                return
+
+            time.sleep(profile.ttft)
+            tokens = TOKEN.findall(server_state.render(model, prompt))
+            delay = 1.0 / profile.tokens_per_sec if profile.tokens_per_sec > 0 else 0.0
+            final = {
+                'model': model, 'done': True, 'done_reason': 'stop',
+                'load_duration': int(load_time * 1e9),
+                'prompt_eval_count': max(1, len(prompt) // 4),
+                'prompt_eval_duration': int(profile.ttft * 1e9),
+                'eval_count': len(tokens),
+                'eval_duration': int(len(tokens) * delay * 1e9),
+            }
+
+            if request.get('stream', True):
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                try:
+                    for token in tokens:
+                        time.sleep(delay)
+                        self._write_chunk({'model': model, 'done': False,
+                                           'message': {'role': 'assistant', 'content': token}})
+                    final['total_duration'] = int((time.perf_counter() - start) * 1e9)
+                    self._write_chunk(dict(final, message={'role': 'assistant', 'content': ''}))
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True
+                return
+
+            time.sleep(delay * len(tokens))
+            final['total_duration'] = int((time.perf_counter() - start) * 1e9)
+            self._send_json(200, dict(final, message={'role': 'assistant',
+                                                      'content': "".join(tokens)}))
+
+    return Handler
+
+
+def serve(host: str = '127.0.0.1', port: int = 11434,
+          profiles: Optional[Dict[str, ModelProfile]] = None,
+          max_loaded: int = 1, seed: Optional[int] = None,
+          background: bool = False) -> ThreadingHTTPServer:
+    """Start the fake server; with background=True it runs on a daemon thread."""
+    state = FakeOllama(profiles, max_loaded, seed)
+    httpd = ThreadingHTTPServer((host, port), make_handler(state))
+    httpd.daemon_threads = True
+    httpd.state = state
+    if background:
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    else:
+        httpd.serve_forever()
+    return httpd
+
+
+def load_profiles(path: str) -> Dict[str, ModelProfile]:
+    with open(path, 'r') as f:
+        return {name: ModelProfile.from_dict(data) for name, data in json.load(f).items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Ollama API server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11434)
+    parser.add_argument('--profiles', help="JSON file of per-model profiles")
+    parser.add_argument('--max-loaded', type=int, default=1,
+                        help="Models that can be resident at once")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    profiles = load_profiles(args.profiles) if args.profiles else {}
+    print(f"Fake Ollama listening on http://{args.host}:{args.port}")
+    try:
+        serve(args.host, args.port, profiles, args.max_loaded, args.seed)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
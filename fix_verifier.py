@@ -0,0 +1,309 @@
+"""
+Execute proposed fixes against reference oracles in sandboxed workers.
+
+Python functions proposed in a model response (fenced code blocks defining
+`fizzbuzz`, `fibonacci` or `append_lists`) are extracted and run in a pool
+of warm worker processes, started from a fresh forkserver rather than
+forked from the (possibly large) harness. Each worker runs with file size
+limits and an address-space limit of memory_limit beyond what it already
+maps; each check gets a strict CPU-time budget enforced with
+ITIMER_PROF, and a wall-clock guard recycles the pool if a check hangs.
+
+The sandbox (restricted builtins, resource limits) is meant to contain
+accidents and runaway code from model output, not a determined attacker.
+"""
+
+import ast
+import builtins
+import multiprocessing
+import os
+import random
+import re
+import resource
+import signal
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, CancelledError, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+TARGET_FUNCTIONS = {
+    'fizzbuzz': 'fizzbuzz',
+    'fibonacci': 'fibonacci',
+    'append': 'append_lists',
+}
+
+CODE_BLOCK = re.compile(r"```[ \t]*([\w+-]*)[^\n]*\n(.*?)```", re.DOTALL)
+PYTHON_TAGS = ('', 'py', 'python', 'python3')
+ALLOWED_IMPORTS = {'math', 'functools', 'itertools', 'copy', 'operator', 'typing'}
+SAFE_BUILTINS = {
+    name: getattr(builtins, name) for name in (
+        'abs', 'all', 'any', 'bool', 'dict', 'enumerate', 'filter', 'float',
+        'int', 'isinstance', 'len', 'list', 'map', 'max', 'min', 'print',
+        'range', 'reversed', 'set', 'sorted', 'str', 'sum', 'tuple', 'zip',
+        'ValueError', 'TypeError', 'Exception', 'RecursionError',
+    )
+}
+
+
+@dataclass
+class FixCheck:
+    category: str
+    function: str
+    passed: bool
+    runtime: float               # Seconds of CPU time spent in the check
+    error: Optional[str] = None
+
+
+class CheckFailed(Exception):
+    pass
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+# Reference oracles ---------------------------------------------------------
+
+def _fizzbuzz_reference(n: int) -> List[str]:
+    out = []
+    for i in range(1, n + 1):
+        if i % 15 == 0:
+            out.append("FizzBuzz")
+        elif i % 3 == 0:
+            out.append("Fizz")
+        elif i % 5 == 0:
+            out.append("Buzz")
+        else:
+            out.append(str(i))
+    return out
+
+
+def _fibonacci_reference(n: int) -> int:
+    a, b = 0, 1
+    for _ in range(max(n, 0)):
+        a, b = b, a + b
+    return a
+
+
+def _check_fizzbuzz(func: Callable, printed: List[str]):
+    for n in (1, 15, 31):
+        printed.clear()
+        returned = func(n)
+        got = [str(x) for x in returned] if isinstance(returned, (list, tuple)) else list(printed)
+        if got != _fizzbuzz_reference(n):
+            raise CheckFailed(f"fizzbuzz({n}) output differs from reference")
+
+
+def _check_fibonacci(func: Callable, printed: List[str]):
+    for n in (0, 1, 2, 10, 35, 90, 500):
+        if func(n) != _fibonacci_reference(n):
+            raise CheckFailed(f"fibonacci({n}) != {_fibonacci_reference(n)}")
+
+
+def _check_append(func: Callable, printed: List[str]):
+    rng = random.Random(0)
+    cases = [([1, 2, 3], [4, 5, 6]), ([], []), ([1], []), ([], [2])]
+    cases += [([rng.randrange(100) for _ in range(rng.randrange(20))],
+               [rng.randrange(100) for _ in range(rng.randrange(20))]) for _ in range(50)]
+    for a, b in cases:
+        a_before, b_before = list(a), list(b)
+        result = func(a, b)
+        if a != a_before or b != b_before:
+            raise CheckFailed("append_lists mutated its inputs")
+        if list(result) != a_before + b_before:
+            raise CheckFailed(f"append_lists({a_before}, {b_before}) returned {result}")
+        if result is a or result is b:
+            raise CheckFailed("append_lists returned an input list")
+
+
+ORACLES = {
+    'fizzbuzz': _check_fizzbuzz,
+    'fibonacci': _check_fibonacci,
+    'append': _check_append,
+}
+
+
+# Worker side ---------------------------------------------------------------
+
+def _address_space() -> int:
+    """Bytes of address space this process maps now (0 where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _init_worker(memory_limit: int):
+    """Apply per-process resource limits once when a worker starts.
+
+    The address-space limit is headroom over the worker's own mappings, so
+    checks get the same memory_limit however large the interpreter is.
+    """
+    for limit, value in ((resource.RLIMIT_AS, _address_space() + memory_limit),
+                         (resource.RLIMIT_FSIZE, 0), (resource.RLIMIT_CORE, 0)):
+        try:
+            resource.setrlimit(limit, (value, value))
+        except (ValueError, OSError):
+            pass
+
+
+def _guarded_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if name.split('.')[0] not in ALLOWED_IMPORTS:
+        raise ImportError(f"import of {name} is not allowed")
+    return __import__(name, globals, locals, fromlist, level)
+
+
+def _on_budget(signum, frame):
+    raise BudgetExceeded()
+
+
+def _run_check(category: str, source: str, cpu_budget: float) -> Tuple[bool, float, Optional[str]]:
+    """Execute source and run the category's oracle within cpu_budget CPU seconds."""
+    printed: List[str] = []
+    safe = dict(SAFE_BUILTINS, __import__=_guarded_import,
+                print=lambda *args, **kwargs: printed.append(" ".join(map(str, args))))
+    namespace: Dict[str, Any] = {'__builtins__': safe, '__name__': 'candidate'}
+
+    previous = signal.signal(signal.SIGPROF, _on_budget)
+    start = time.process_time()
+    signal.setitimer(signal.ITIMER_PROF, cpu_budget)
+    try:
+        exec(compile(source, '<candidate>', 'exec'), namespace)
+        func = namespace.get(TARGET_FUNCTIONS[category])
+        if not callable(func):
+            raise CheckFailed(f"{TARGET_FUNCTIONS[category]} is not defined")
+        ORACLES[category](func, printed)
+        return True, time.process_time() - start, None
+    except CheckFailed as e:
+        return False, time.process_time() - start, str(e)
+    except BudgetExceeded:
+        return False, time.process_time() - start, f"CPU budget of {cpu_budget}s exceeded"
+    except RecursionError:
+        return False, time.process_time() - start, "recursion limit exceeded"
+    except MemoryError:
+        return False, time.process_time() - start, "memory limit exceeded"
+    except BaseException as e:
+        return False, time.process_time() - start, f"{type(e).__name__}: {e}"
+    finally:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, previous)
+
+
+# Extraction ----------------------------------------------------------------
+
+def _candidate_source(block: str, function: str) -> Optional[str]:
+    """Keep imports and definitions from a code block if it defines function."""
+    try:
+        tree = ast.parse(block)
+    except SyntaxError:
+        return None
+    if not any(isinstance(node, ast.FunctionDef) and node.name == function
+               for node in tree.body):
+        return None
+    keep = (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.ClassDef, ast.Assign)
+    tree.body = [node for node in tree.body if isinstance(node, keep)]
+    return ast.unparse(tree)
+
+
+def extract_fixes(response: str) -> Dict[str, str]:
+    """Return {category: source} for the last proposed fix of each target function."""
+    fixes: Dict[str, str] = {}
+    for match in CODE_BLOCK.finditer(response):
+        if match.group(1).lower() not in PYTHON_TAGS:
+            continue
+        for category, function in TARGET_FUNCTIONS.items():
+            source = _candidate_source(match.group(2), function)
+            if source is not None:
+                fixes[category] = source
+    return fixes
+
+
+def _worker_context():
+    """Start workers from a forkserver, falling back to spawn where it is missing."""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+class FixVerifier:
+    """Verify extracted fixes on a pool of warm, resource-limited workers."""
+
+    def __init__(self, workers: Optional[int] = None, cpu_budget: float = 1.0,
+                 wall_budget: float = 5.0, memory_limit: int = 512 * 1024 * 1024):
+        self.workers = workers or os.cpu_count() or 1
+        self.cpu_budget = cpu_budget
+        self.wall_budget = wall_budget
+        self.memory_limit = memory_limit
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=_worker_context(),
+                                                 initializer=_init_worker,
+                                                 initargs=(self.memory_limit,))
+            return self._pool
+
+    def _recycle(self, pool: ProcessPoolExecutor):
+        """Kill a pool after a hung check so later checks get fresh workers."""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        for process in list((getattr(pool, '_processes', None) or {}).values()):
+            process.kill()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def verify_many(self, responses: List[str]) -> List[List[FixCheck]]:
+        """Verify the fixes in many responses, running all checks concurrently.
+
+        If no check completes within wall_budget, the checks still running are
+        reported as hung, the pool is recycled and the queued checks resubmitted.
+        """
+        checks = [(index, category, source)
+                  for index, response in enumerate(responses)
+                  for category, source in extract_fixes(response).items()]
+        outcomes: Dict[int, Tuple[bool, float, Optional[str]]] = {}
+
+        remaining = list(range(len(checks)))
+        while remaining:
+            pool = self._get_pool()
+            futures = {pool.submit(_run_check, checks[i][1], checks[i][2], self.cpu_budget): i
+                       for i in remaining}
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=self.wall_budget,
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        outcomes[futures[future]] = future.result()
+                    except CancelledError:
+                        pass    # Pool recycled by another caller; resubmitted below
+                    except BrokenProcessPool:
+                        outcomes[futures[future]] = (False, 0.0, "worker crashed")
+                if not done:
+                    # Checks are dispatched in submission order, so the oldest
+                    # running futures are the ones occupying the workers
+                    running = sorted((futures[f] for f in pending if f.running()))
+                    for i in running[:self.workers]:
+                        outcomes[i] = (False, float(self.wall_budget), "wall-clock budget exceeded")
+                    self._recycle(pool)
+                    break
+            remaining = [i for i in remaining if i not in outcomes]
+
+        results: List[List[FixCheck]] = [[] for _ in responses]
+        for i, (index, category, _) in enumerate(checks):
+            results[index].append(FixCheck(category, TARGET_FUNCTIONS[category], *outcomes[i]))
+        return results
+
+    def verify(self, response: str) -> List[FixCheck]:
+        """Verify the fixes proposed in one response."""
+        return self.verify_many([response])[0]
@@ -1,9 +1,19 @@
-from dataclasses import dataclass
-from typing import Dict, Any
+from dataclasses import asdict, dataclass
+from typing import Dict, Any, IO, Iterator, Optional, Tuple
 import time
-import subprocess
 import json
 
+import packagers
+from archive_reader import measure_parse
+from corpus import get_scanner
+from fragment_cache import get_fragment_cache
+from minify import MinifiedScanner, TokenSavings, compact_format, token_savings
+from multi_render import get_rendered
+from results_store import ResultsStore
+from snapshot import SnapshotScanner
+from tokens import TokenReport, get_counter
+from tracing import NULL_TRACER, Tracer
+
 @dataclass
 class FormatMetrics:
     # Token efficiency
@@ -27,113 +37,109 @@ class FormatMetrics:
     bidirectional: bool         # Can recreate files from output
 
 class FormatTester:
+    # Tool -> verbatim multi_render format used to measure minification savings
+    RENDER_FORMATS = {
+        "find": "find",
+        "files-to-prompt": "files-to-prompt",
+        "org-archive": "org",
+        "markdown": "markdown-literate",
+    }
+
     def __init__(self, 
                  corpus_path: str,
                  model_name: str = "codellama:7b",
-                 format_tool: str = "find"):
+                 format_tool: str = "find",
+                 tokenizer_path: Optional[str] = None,
+                 context_window: int = 8192,
+                 fragment_cache_path: Optional[str] = None,
+                 tracer: Optional[Tracer] = None,
+                 read_workers: int = 0,
+                 minify: bool = False):
         self.corpus_path = corpus_path
+        self.minify = minify
+        self.read_workers = read_workers
         self.model_name = model_name
         self.format_tool = format_tool
+        self.context_window = context_window
+        self.source_scanner = get_scanner(corpus_path)
+        # Minified packaging serves every tool from the same stripped contents
+        self.scanner = MinifiedScanner(self.source_scanner) if minify else self.source_scanner
+        self.token_savings: Optional[TokenSavings] = None
+        self.token_counter = get_counter(tokenizer_path)
+        self.fragment_cache = get_fragment_cache(fragment_cache_path)
+        self.tracer = tracer or NULL_TRACER
         
-    def _package_with_find(self) -> str:
-        """Package corpus using find command."""
-        cmd = f'find {self.corpus_path} -type f \\( -name "*.py" -o -name "*.js" -o -name "*.scm" \\) -exec sh -c \'echo "### FILE: $1"; cat "$1"; echo "### END"\' sh {{}} \\;'
-        start_time = time.time()
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        self.generation_time = time.time() - start_time
-        return result.stdout
+    def _timed(self, chunks: Iterator[str]) -> Iterator[str]:
+        """Pass chunks through, recording generation_time once exhausted.
+
+        Only the time spent producing chunks is counted, not the consumer's
+        work between them, and the 'package' span is recorded once the
+        chunks are exhausted instead of being held open across yields.
+        """
+        start_ns = time.perf_counter_ns()
+        busy_ns = 0
+        chunks = iter(chunks)
+        while True:
+            began = time.perf_counter_ns()
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                busy_ns += time.perf_counter_ns() - began
+                break
+            busy_ns += time.perf_counter_ns() - began
+            yield chunk
+        self.generation_time = busy_ns / 1e9
+        self.tracer.record('package', start_ns, start_ns + busy_ns, format=self.format_tool,
+                           wall_ms=(time.perf_counter_ns() - start_ns) / 1e6)
+
+    def _stream_with_find(self) -> Iterator[str]:
+        """Stream corpus in the `find -exec cat` layout."""
+        return packagers.iter_find(self.scanner, self.fragment_cache, self.read_workers)
     
-    def _package_with_files_to_prompt(self) -> str:
-        """Package corpus using files-to-prompt tool."""
+    def _stream_with_files_to_prompt(self) -> Iterator[str]:
+        """Stream corpus using files-to-prompt tool (rendered in-process for snapshots
+        and minified corpora)."""
+        if self.minify or isinstance(self.scanner, SnapshotScanner):
+            return packagers.iter_files_to_prompt(self.scanner, cache=self.fragment_cache,
+                                                 workers=self.read_workers)
         cmd = f'files-to-prompt {self.corpus_path} ' \
               f'--extensions py,js,scm ' \
               f'--comment-prefix "# " ' \
               f'--separator "---" ' \
               f'--include-filenames'
-        start_time = time.time()
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        self.generation_time = time.time() - start_time
-        return result.stdout
-
-    def _package_with_markdown(self) -> str:
-        """Package corpus using Markdown format with literate programming style."""
-        start_time = time.time()
-        output = "# Code Review Archive\n\n"
-        output += "## Overview\n"
-        output += "This archive contains code files for review in literate programming style.\n\n"
-        
-        # Find all relevant files
-        cmd = f'find {self.corpus_path} -type f \\( -name "*.py" -o -name "*.js" -o -name "*.scm" \\)'
-        files = subprocess.run(cmd, shell=True, capture_output=True, text=True).stdout.strip().split('\n')
-        
-        for file in files:
-            if not file:  # Skip empty lines
-                continue
-            filename = file.split('/')[-1]
-            ext = filename.split('.')[-1] if '.' in filename else "text"
-            
-            # Add file header with metadata
-            output += f"## {filename}\n\n"
-            output += f"Language: {ext}\n"
-            output += f"Path: {file}\n\n"
-            
-            # Read and analyze the file
-            with open(file, 'r') as f:
-                content = f.read()
-                
-            # Add code block with language-specific syntax highlighting
-            output += "### Source Code\n\n"
-            output += f"```{ext}\n{content}\n```\n\n"
-            
-            # Add placeholder for analysis section
-            output += "### Analysis\n\n"
-            output += "- Code structure:\n"
-            output += "- Potential issues:\n"
-            output += "- Improvement suggestions:\n\n"
-            
-            # Add separator between files
-            output += "---\n\n"
-            
-        self.generation_time = time.time() - start_time
-        return output
-
-    def _package_with_org_archive(self) -> str:
-        """Package corpus using Org archive format."""
-        start_time = time.time()
-        output = "#+TITLE: Code Review Archive\n"
-        output += "#+PROPERTY: header-args :tangle yes :mkdirp yes\n\n"
-        
-        # Find all relevant files
-        cmd = f'find {self.corpus_path} -type f \\( -name "*.py" -o -name "*.js" -o -name "*.scm" \\)'
-        files = subprocess.run(cmd, shell=True, capture_output=True, text=True).stdout.strip().split('\n')
-        
-        for file in files:
-            if not file:  # Skip empty lines
-                continue
-            filename = file.split('/')[-1]
-            ext = filename.split('.')[-1] if '.' in filename else "text"
-            
-            output += f"* {filename}\n"
-            output += f"#+BEGIN_SRC {ext} :tangle {file}\n"
-            with open(file, 'r') as f:
-                output += f.read()
-            output += "\n#+END_SRC\n\n"
-            
-        self.generation_time = time.time() - start_time
-        return output
-        
-    def package_corpus(self) -> str:
-        """Package corpus using selected tool."""
+        return packagers.iter_command(cmd, shell=True)
+
+    def _stream_with_markdown(self) -> Iterator[str]:
+        """Stream corpus using Markdown format with literate programming style."""
+        return packagers.iter_markdown(self.scanner, literate=True,
+                                       cache=self.fragment_cache, workers=self.read_workers,
+                                       analysis=not self.minify)
+
+    def _stream_with_org_archive(self) -> Iterator[str]:
+        """Stream corpus using Org archive format."""
+        return packagers.iter_org_archive(self.scanner, self.fragment_cache, self.read_workers)
+
+    def iter_corpus(self) -> Iterator[str]:
+        """Stream the packaged corpus for the selected tool as text chunks."""
         if self.format_tool == "find":
-            return self._package_with_find()
+            chunks = self._stream_with_find()
         elif self.format_tool == "files-to-prompt":
-            return self._package_with_files_to_prompt()
+            chunks = self._stream_with_files_to_prompt()
         elif self.format_tool == "org-archive":
-            return self._package_with_org_archive()
+            chunks = self._stream_with_org_archive()
         elif self.format_tool == "markdown":
-            return self._package_with_markdown()
+            chunks = self._stream_with_markdown()
         else:
             raise ValueError(f"Unsupported format tool: {self.format_tool}")
+        return self._timed(chunks)
+
+    def write_corpus(self, fp: IO[str]) -> int:
+        """Stream the packaged corpus into a file-like object."""
+        return packagers.write_chunks(self.iter_corpus(), fp)
+        
+    def package_corpus(self) -> str:
+        """Package corpus using selected tool."""
+        return "".join(self.iter_corpus())
             
     def _measure_consistency(self, response: str) -> float:
         """Measure how consistently the model follows the format."""
@@ -152,61 +158,137 @@ class FormatTester:
         
     def evaluate_response(self, response: str) -> Dict[str, float]:
         """Evaluate model response metrics."""
-        return {
-            'response_consistency': self._measure_consistency(response),
-            'error_detection': self._measure_error_detection(response),
-            'fix_success': self._measure_fix_success(response)
-        }
+        with self.tracer.span('evaluate'):
+            return {
+                'response_consistency': self._measure_consistency(response),
+                'error_detection': self._measure_error_detection(response),
+                'fix_success': self._measure_fix_success(response)
+            }
         
+    def _fragment_format(self) -> Optional[str]:
+        """Return the multi_render format of the tool's fragments, if rendered in-process."""
+        if self.format_tool not in ("find", "markdown", "org-archive"):
+            return None
+        fmt = self.RENDER_FORMATS[self.format_tool]
+        return compact_format(fmt) if self.minify else fmt
+
+    def measure_tokens(self, packed: str) -> TokenReport:
+        """Split the packed corpus into per-file content and wrapper tokens.
+
+        Per-file counts come from a render pass over the fragments packaging
+        just cached, so files are not read or rendered a second time.
+        """
+        fmt = self._fragment_format()
+        if fmt is None:
+            return self.token_counter.report(packed, self.scanner)
+        rendered = get_rendered(self.scanner, (fmt,), self.token_counter,
+                                self.read_workers, self.fragment_cache)
+        return self.token_counter.report(
+            packed, self.scanner,
+            dict(zip(rendered.paths, zip(rendered.file_tokens, rendered.fragment_tokens[fmt]))))
+
+    def measure_token_savings(self) -> TokenSavings:
+        """Tokens saved by minifying, comparing in-process renders of the tool's layout."""
+        fmt = self.RENDER_FORMATS[self.format_tool]
+        savings = token_savings(self.source_scanner, self.scanner, (fmt,),
+                                self.token_counter, self.read_workers,
+                                self.fragment_cache)[fmt]
+        savings.format = self.format_tool
+        return savings
+
+    def _measure_roundtrip(self, packed: str) -> Tuple[float, bool]:
+        """Time parsing the archive back and check every file is recovered intact."""
+        parse_time, files = measure_parse(packed)
+        paths = self.scanner.paths()
+        bidirectional = bool(paths) and len(files) == len(paths) and all(
+            files.get(path) == self.scanner.read(path) for path in paths
+        )
+        return parse_time, bidirectional
+
     def _measure_format_metrics(self, packed: str) -> FormatMetrics:
         """Measure format-specific metrics."""
-        # Example implementation
+        with self.tracer.span('tokens'):
+            tokens = self.token_report = self.measure_tokens(packed)
+        file_count = len(self.scanner.paths())
+        with self.tracer.span('parse'):
+            parse_time, bidirectional = self._measure_roundtrip(packed)
         return FormatMetrics(
-            tokens_per_file=500,          # Example values
-            format_overhead=0.15,
-            context_utilization=0.85,
+            tokens_per_file=tokens.total_tokens // file_count if file_count else 0,
+            format_overhead=tokens.overhead,
+            context_utilization=tokens.total_tokens / self.context_window,
             generation_time=self.generation_time,
-            parse_time=0.05,
+            parse_time=parse_time,
             response_consistency=0.9,
             error_detection_rate=0.85,
             fix_success_rate=0.8,
             setup_complexity=1,
             automation_friendly=True,
             preserves_metadata=True,
-            bidirectional=True
+            bidirectional=bidirectional
         )
         
     def run_benchmark(self) -> Dict[str, Any]:
         """Run complete benchmark suite."""
         packed = self.package_corpus()
         metrics = self._measure_format_metrics(packed)
+        if self.minify:
+            self.token_savings = self.measure_token_savings()
         response = "Example model response"  # Would actually call model here
         results = self.evaluate_response(response)
         
         return {
             'format_metrics': metrics,
+            'token_report': self.token_report,
+            'token_savings': self.token_savings,
             'model_results': results
         }
 
-def generate_comparison_report(results: Dict[str, Dict[str, Any]]) -> str:
-    """Generate a comparison report from benchmark results."""
-    report = ["# Format Comparison Report\n"]
-    
+def record_benchmark(store: ResultsStore, run_id: str, model: str, tool: str,
+                     result: Dict[str, Any]):
+    """Append a run_benchmark() result to a results store."""
+    store.add_benchmark(run_id, model, tool, asdict(result['format_metrics']),
+                        result['model_results'])
+
+
+def _iter_benchmarks(results: Optional[Dict[str, Dict[str, Any]]],
+                     store: Optional[ResultsStore], run_id: Optional[str]):
+    """Yield (model, tool, metrics) from in-memory results or a results store."""
+    if results is None:
+        for row in store.iter_benchmarks(run_id):
+            yield row['model'], row['tool'], FormatMetrics(**json.loads(row['metrics']))
+        return
     for model, model_results in results.items():
-        report.append(f"\n## Model: {model}\n")
-        report.append("| Tool | Token Efficiency | Context Usage | Error Detection | Fix Success |")
-        report.append("|------|-----------------|---------------|-----------------|-------------|")
-        
         for tool, tool_results in model_results.items():
-            metrics = tool_results['format_metrics']
-            report.append(
-                f"| {tool} | {metrics.context_utilization*100:.0f}% | "
-                f"{metrics.context_utilization*100:.0f}% | "
-                f"{metrics.error_detection_rate*100:.0f}% | "
-                f"{metrics.fix_success_rate*100:.0f}% |"
-            )
+            yield model, tool, tool_results['format_metrics']
+
+
+def iter_comparison_report(results: Optional[Dict[str, Dict[str, Any]]] = None,
+                           store: Optional[ResultsStore] = None,
+                           run_id: Optional[str] = None) -> Iterator[str]:
+    """Render the comparison report line by line."""
+    yield "# Format Comparison Report\n"
     
-    return "\n".join(report)
+    current_model = None
+    for model, tool, metrics in _iter_benchmarks(results, store, run_id):
+        if model != current_model:
+            current_model = model
+            yield f"\n## Model: {model}\n"
+            yield "| Tool | Token Efficiency | Context Usage | Error Detection | Fix Success |"
+            yield "|------|-----------------|---------------|-----------------|-------------|"
+        
+        yield (
+            f"| {tool} | {(1 - metrics.format_overhead)*100:.0f}% | "
+            f"{metrics.context_utilization*100:.0f}% | "
+            f"{metrics.error_detection_rate*100:.0f}% | "
+            f"{metrics.fix_success_rate*100:.0f}% |"
+        )
+
+
+def generate_comparison_report(results: Optional[Dict[str, Dict[str, Any]]] = None,
+                               store: Optional[ResultsStore] = None,
+                               run_id: Optional[str] = None) -> str:
+    """Generate a comparison report from benchmark results or a results store."""
+    return "\n".join(iter_comparison_report(results, store, run_id))
 
 if __name__ == "__main__":
     # Example usage
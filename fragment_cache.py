@@ -0,0 +1,198 @@
+"""
+Per-file rendered-fragment cache for incremental packaging.
+
+Fragments are keyed by packaging format and path, and validated against
+the file's mtime/size and content hash, so re-packaging a mostly
+unchanged tree only reads and renders the files that changed. At most
+max_entries fragments are kept in memory (least recently used evicted
+first), entries of files no longer in the corpus are pruned after each
+pass, and a persisted cache writes only the rows that changed.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from corpus import CorpusScanner
+
+DEFAULT_MAX_ENTRIES = 65536
+
+Key = Tuple[str, str]               # (format + scanner variant, path)
+Entry = Tuple[int, int, str, str]   # (mtime_ns, size, content hash, fragment)
+
+
+def content_hash(content: str) -> str:
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class FragmentCache:
+    """LRU cache of rendered fragments, optionally persisted to SQLite.
+
+    With a path, fragments evicted from memory are looked up in the
+    database again, and flush() writes only entries changed since the
+    last flush.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Key, Entry]" = OrderedDict()
+        self._pending: Dict[Key, Entry] = {}     # Written since the last flush
+        self._pruned: Set[str] = set()           # Paths to delete on the next flush
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS fragments ("
+                " fmt TEXT NOT NULL,"
+                " path TEXT NOT NULL,"
+                " mtime_ns INTEGER NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " digest TEXT NOT NULL,"
+                " fragment TEXT NOT NULL,"
+                " PRIMARY KEY (path, fmt))"
+            )
+        return self._db
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _put(self, key: Key, entry: Entry):
+        """Insert into memory, evicting the least recently used beyond max_entries."""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _lookup(self, path: str, keys: Iterable[Key]) -> Dict[Key, Entry]:
+        """Return the known entries among keys, loading path's rows from disk if needed."""
+        keys = set(keys)
+        found: Dict[Key, Entry] = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key) or self._pending.get(key)
+                if entry is not None:
+                    self._put(key, entry)
+                    found[key] = entry
+            if self.path and len(found) < len(keys):
+                rows = self._conn().execute(
+                    "SELECT fmt, mtime_ns, size, digest, fragment FROM fragments "
+                    "WHERE path = ?", (path,)).fetchall()
+                for fmt, *entry in rows:
+                    key = (fmt, path)
+                    if key in keys and key not in found:
+                        found[key] = tuple(entry)
+                        self._put(key, found[key])
+        return found
+
+    def render(self, fmt: str, scanner: CorpusScanner, path: str,
+               render: Callable[[str, str], str]) -> str:
+        """Return the fragment for path, re-rendering only if the file changed."""
+        return self.render_many(scanner, path, {fmt: render})[fmt]
+
+    def render_many(self, scanner: CorpusScanner, path: str,
+                    renderers: Dict[str, Callable[[str, str], str]]) -> Dict[str, str]:
+        """Return {fmt: fragment} for path, reading the file at most once.
+
+        The file is only read if some format's entry is missing or stale.
+        """
+        st = scanner.stat(path)
+        keys = {fmt: (fmt + scanner.variant, path) for fmt in renderers}
+        known = self._lookup(path, keys.values())
+        fragments: Dict[str, str] = {}
+        stale = []
+        for fmt, key in keys.items():
+            entry = known.get(key)
+            if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                fragments[fmt] = entry[3]
+            else:
+                stale.append((fmt, entry))
+        if not stale:
+            with self._lock:
+                self.hits += len(fragments)
+            return fragments
+
+        content = scanner.read(path)
+        digest = content_hash(content)
+        hits, misses = len(fragments), 0
+        for fmt, entry in stale:
+            # Touched but unchanged: keep the fragment, refresh the stat key
+            if entry is not None and entry[2] == digest:
+                fragments[fmt] = entry[3]
+                hits += 1
+            else:
+                fragments[fmt] = renderers[fmt](path, content)
+                misses += 1
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            for fmt, _ in stale:
+                entry = (st.st_mtime_ns, st.st_size, digest, fragments[fmt])
+                self._put(keys[fmt], entry)
+                if self.path:
+                    self._pending[keys[fmt]] = entry
+        return fragments
+
+    def prune(self, scanner: CorpusScanner):
+        """Drop entries of files under the scanner's root that its last scan missed."""
+        prefix = os.path.join(scanner.root, '')
+        live = set(scanner.paths())
+        with self._lock:
+            gone = {path for _, path in self._entries
+                    if path.startswith(prefix) and path not in live}
+            if self.path:
+                rows = self._conn().execute(
+                    "SELECT DISTINCT path FROM fragments WHERE path >= ? AND path < ?",
+                    (prefix, prefix + '\U0010ffff')).fetchall()
+                gone.update(path for (path,) in rows if path not in live)
+                self._pruned |= gone
+            if gone:
+                for key in [key for key in self._entries if key[1] in gone]:
+                    del self._entries[key]
+                for key in [key for key in self._pending if key[1] in gone]:
+                    del self._pending[key]
+
+    def flush(self):
+        """Persist the entries written or pruned since the last flush."""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._pending and not self._pruned:
+                return
+            db = self._conn()
+            db.executemany("DELETE FROM fragments WHERE path = ?",
+                           [(path,) for path in self._pruned])
+            db.executemany("INSERT OR REPLACE INTO fragments VALUES (?, ?, ?, ?, ?, ?)",
+                           [(fmt, path, *entry) for (fmt, path), entry in self._pending.items()])
+            db.commit()
+            self._pending.clear()
+            self._pruned.clear()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_CACHES: Dict[Optional[str], FragmentCache] = {}
+
+
+def get_fragment_cache(path: Optional[str] = None) -> FragmentCache:
+    """Return the shared fragment cache (in-memory when path is None)."""
+    cache = _CACHES.get(path)
+    if cache is None:
+        cache = _CACHES[path] = FragmentCache(path)
+    return cache
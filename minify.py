@@ -0,0 +1,322 @@
+"""
+Token-budget minification of corpus files.
+
+Comments, docstrings and blank lines are removed and indentation is
+reduced to one space per level for Python, JavaScript and Scheme files.
+Lines are only ever dropped or trimmed, never joined, so every output
+line maps back to one source line and `(line X)` positions reported
+against the minified text can be translated to the original file.
+
+`MinifiedScanner` wraps a scanner and serves minified contents through
+the `CorpusScanner` interface, so every packager and format can render a
+minified corpus unchanged.
+"""
+
+import ast
+import io
+import os
+import tokenize
+from dataclasses import dataclass
+from functools import reduce
+from math import gcd
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import multi_render
+from corpus import CorpusFile, CorpusScanner
+from fragment_cache import FragmentCache
+from packagers import file_ext
+from tokens import TokenCounter
+
+# Formats whose minified rendering also drops per-file boilerplate
+COMPACT_FORMATS = {'markdown-literate': 'markdown-literate-compact'}
+
+FSTRING_START = getattr(tokenize, 'FSTRING_START', None)
+FSTRING_END = getattr(tokenize, 'FSTRING_END', None)
+
+
+@dataclass
+class MinifiedFile:
+    text: str
+    line_map: List[int]      # Original (1-based) line number of each output line
+
+    def original_line(self, line: int) -> Optional[int]:
+        """Map a 1-based line of the minified text back to the source file."""
+        if 1 <= line <= len(self.line_map):
+            return self.line_map[line - 1]
+        return None
+
+
+@dataclass
+class TokenSavings:
+    format: str
+    original_tokens: int
+    minified_tokens: int
+
+    @property
+    def saved(self) -> int:
+        return self.original_tokens - self.minified_tokens
+
+    @property
+    def ratio(self) -> float:
+        return self.saved / self.original_tokens if self.original_tokens else 0.0
+
+
+def _identity(content: str) -> MinifiedFile:
+    return MinifiedFile(content, list(range(1, content.count("\n") + 2)))
+
+
+def _indent_width(line: str) -> int:
+    return len(line) - len(line.lstrip(' '))
+
+
+def _assemble(content: str, lines: List[str], protected: Set[int],
+              indent_lines: Optional[Set[int]] = None) -> MinifiedFile:
+    """Drop blank lines and shrink indentation, keeping protected lines verbatim.
+
+    Indentation is divided by the unit shared by indent_lines (every line
+    by default); dividing by a common unit keeps equal indents equal and
+    nested ones deeper, so Python block structure survives.
+    """
+    candidates = indent_lines if indent_lines is not None else set(range(len(lines)))
+    if any(lines[i][:1] == '\t' for i in range(len(lines)) if i not in protected):
+        unit = 1
+    else:
+        widths = [_indent_width(lines[i]) for i in candidates
+                  if i not in protected and lines[i].strip()]
+        unit = reduce(gcd, widths, 0) or 1
+
+    out, line_map = [], []
+    for i, line in enumerate(lines):
+        if i not in protected:
+            line = line.rstrip()
+            if not line:
+                continue
+            if unit > 1:
+                line = ' ' * (_indent_width(line) // unit) + line.lstrip(' ')
+        out.append(line)
+        line_map.append(i + 1)
+    text = "\n".join(out)
+    if out and content.endswith("\n"):
+        text += "\n"
+    return MinifiedFile(text, line_map)
+
+
+def _docstring_lines(tree: ast.AST, lines: List[str]) -> Set[int]:
+    """0-based lines holding docstrings that can be dropped without emptying a body."""
+    drop: Set[int] = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.Module, ast.FunctionDef, ast.AsyncFunctionDef,
+                                 ast.ClassDef)):
+            continue
+        body = node.body
+        if len(body) < 2 or not isinstance(body[0], ast.Expr):
+            continue
+        doc = body[0]
+        if not (isinstance(doc.value, ast.Constant) and isinstance(doc.value.value, str)):
+            continue
+        # Only whole-line docstrings; `def f(): "doc"; return 1` is left alone
+        first, last = doc.lineno - 1, doc.end_lineno - 1
+        if (lines[first][:doc.col_offset].strip() or lines[last][doc.end_col_offset:].strip()
+                or body[1].lineno - 1 <= last):
+            continue
+        drop.update(range(first, last + 1))
+    return drop
+
+
+def minify_python(content: str) -> MinifiedFile:
+    """Strip comments, docstrings and blank lines from Python source."""
+    lines = content.split("\n")
+    try:
+        tokens = list(tokenize.generate_tokens(io.StringIO(content).readline))
+        tree = ast.parse(content)
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        return _identity(content)
+
+    protected: Set[int] = set()       # Inner lines of multi-line strings
+    statement_starts: Set[int] = set()
+    at_statement_start = True
+    fstring_starts: List[int] = []    # Python 3.12+ tokenizes f-strings in pieces
+    for tok in tokens:
+        row, col = tok.start
+        if tok.type == tokenize.COMMENT:
+            lines[row - 1] = lines[row - 1][:col]
+        elif tok.type == tokenize.STRING and tok.end[0] > row:
+            protected.update(range(row, tok.end[0]))
+        elif tok.type == FSTRING_START:
+            fstring_starts.append(row)
+        elif tok.type == FSTRING_END:
+            protected.update(range(fstring_starts.pop(), tok.end[0]))
+        if tok.type in (tokenize.NEWLINE, tokenize.NL, tokenize.COMMENT,
+                        tokenize.INDENT, tokenize.DEDENT, tokenize.ENDMARKER):
+            if tok.type == tokenize.NEWLINE:
+                at_statement_start = True
+            continue
+        if at_statement_start:
+            statement_starts.add(row - 1)
+            at_statement_start = False
+
+    docstrings = _docstring_lines(tree, content.split("\n"))
+    for i in docstrings:
+        lines[i] = ""
+    return _assemble(content, lines, protected - docstrings, statement_starts)
+
+
+def _strip_c_comments(content: str, line_comment: str, block: Tuple[str, str],
+                      quotes: str, regex: bool = False,
+                      char_prefix: Optional[str] = None) -> Optional[Tuple[str, Set[int]]]:
+    """Blank out comments outside string literals.
+
+    With char_prefix, character literals such as Scheme's `#\\;` are copied
+    as-is. Returns the stripped text and the 0-based lines inside multi-line
+    literals, or None if a literal or comment is left unterminated.
+    """
+    out: List[str] = []
+    protected: Set[int] = set()
+    i, line, n = 0, 0, len(content)
+    last_significant = ''
+    while i < n:
+        c = content[i]
+        if char_prefix and content.startswith(char_prefix, i):
+            end = i + len(char_prefix) + 1
+            out.append(content[i:end])
+            last_significant = content[end - 1:end]
+            i = end
+            continue
+        if content.startswith(line_comment, i):
+            end = content.find("\n", i)
+            i = n if end < 0 else end
+            continue
+        if block and content.startswith(block[0], i):
+            end = content.find(block[1], i + len(block[0]))
+            if end < 0:
+                return None
+            newlines = content.count("\n", i, end)
+            out.append("\n" * newlines)
+            line += newlines
+            i = end + len(block[1])
+            continue
+        is_regex = (regex and c == '/' and (not last_significant
+                                           or last_significant in "(,=:[!&|?{};+-*%<>~^"))
+        if c in quotes or is_regex:
+            j = i + 1
+            while j < n and content[j] != c:
+                if content[j] == "\\":
+                    j += 1
+                elif content[j] == "\n" and c != '`':
+                    return None
+                j += 1
+            if j >= n:
+                return None
+            literal = content[i:j + 1]
+            newlines = literal.count("\n")
+            protected.update(range(line + 1, line + newlines + 1))
+            line += newlines
+            out.append(literal)
+            last_significant = c
+            i = j + 1
+            continue
+        if c == "\n":
+            line += 1
+        elif not c.isspace():
+            last_significant = c
+        out.append(c)
+        i += 1
+    return "".join(out), protected
+
+
+def minify_javascript(content: str) -> MinifiedFile:
+    """Strip // and /* */ comments and blank lines from JavaScript source."""
+    stripped = _strip_c_comments(content, '//', ('/*', '*/'), "'\"`", regex=True)
+    if stripped is None:
+        return _identity(content)
+    text, protected = stripped
+    return _assemble(content, text.split("\n"), protected)
+
+
+def minify_scheme(content: str) -> MinifiedFile:
+    """Strip ; and #| |# comments and blank lines from Scheme source."""
+    stripped = _strip_c_comments(content, ';', ('#|', '|#'), '"', char_prefix='#\\')
+    if stripped is None:
+        return _identity(content)
+    text, protected = stripped
+    return _assemble(content, text.split("\n"), protected)
+
+
+MINIFIERS: Dict[str, Callable[[str], MinifiedFile]] = {
+    'py': minify_python,
+    'js': minify_javascript,
+    'scm': minify_scheme,
+}
+
+
+def minify(path: str, content: str) -> MinifiedFile:
+    """Minify a file by its extension; other languages pass through unchanged."""
+    minifier = MINIFIERS.get(file_ext(path))
+    return minifier(content) if minifier else _identity(content)
+
+
+class MinifiedScanner(CorpusScanner):
+    """Serve minified contents of another scanner's files.
+
+    The file index and stats are the wrapped scanner's; `variant` keeps
+    fragment, token and render caches apart from the verbatim corpus.
+    """
+    variant = ':min'
+
+    def __init__(self, source: CorpusScanner):
+        super().__init__(source.root, source.extensions, source.ignore)
+        self.source = source
+        self._minified: Dict[Tuple[str, int, int], MinifiedFile] = {}
+
+    def scan(self, refresh: bool = False) -> List[CorpusFile]:
+        return self.source.scan(refresh)
+
+    def stat(self, path: str):
+        return self.source.stat(path)
+
+    def minified(self, path: str) -> MinifiedFile:
+        """Minify a file, reusing the result until its stat changes."""
+        st = self.stat(path)
+        key = (path, st.st_mtime_ns, st.st_size)
+        result = self._minified.get(key)
+        if result is None:
+            result = self._minified[key] = minify(path, self.source.read(path))
+        return result
+
+    def read(self, path: str) -> str:
+        return self.minified(path).text
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Find the corpus path a response refers to by path, relpath or file name."""
+        name = name.strip().strip('`')
+        files = self.scan()
+        for f in files:
+            if name in (f.path, f.relpath):
+                return f.path
+        matches = [f.path for f in files
+                   if f.relpath.endswith('/' + name) or os.path.basename(f.path) == name]
+        return matches[0] if len(matches) == 1 else None
+
+    def original_line(self, name: Optional[str], line: Optional[int]) -> Optional[int]:
+        """Map a line reported against a minified file back to its source line."""
+        if name is None or line is None:
+            return None
+        path = self.resolve(name)
+        return self.minified(path).original_line(line) if path else None
+
+
+def compact_format(fmt: str) -> str:
+    """The format a minified corpus is rendered in (boilerplate dropped)."""
+    return COMPACT_FORMATS.get(fmt, fmt)
+
+
+def token_savings(source: CorpusScanner, minified: MinifiedScanner,
+                  formats: Tuple[str, ...], counter: TokenCounter,
+                  workers: int = 0,
+                  cache: Optional[FragmentCache] = None) -> Dict[str, TokenSavings]:
+    """Compare per-format token totals of the verbatim and minified corpus."""
+    compact = tuple(compact_format(fmt) for fmt in formats)
+    original = multi_render.get_rendered(source, tuple(formats), counter, workers, cache)
+    reduced = multi_render.get_rendered(minified, compact, counter, workers, cache)
+    return {fmt: TokenSavings(fmt, original.stats[fmt].tokens, reduced.stats[short].tokens)
+            for fmt, short in zip(formats, compact)}
@@ -0,0 +1,199 @@
+"""
+One-pass multi-format corpus rendering.
+
+Each corpus file is read at most once and rendered into every requested
+format in the same pass, together with per-format size and token
+statistics. With a fragment cache, unchanged files are not read at all.
+Results are memoized per corpus state (paths, sizes and mtimes, re-stat'ed
+on every lookup), so a whole matrix run packages the corpus once instead
+of once per format and model, and an edited file is picked up by the next
+lookup. Only the MAX_RENDERED most recently used renderings are kept, and
+renders of different corpora, variants or counters run concurrently.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+
+import packagers
+from corpus import CorpusScanner
+from fragment_cache import FragmentCache
+from tokens import TokenCounter
+
+MAX_RENDERED = 4
+
+# Format key -> (header, per-file renderer, footer)
+FORMATS: Dict[str, Tuple[str, Callable[[str, str], str], str]] = {
+    'find': ("", packagers.find_fragment, ""),
+    'markdown': (packagers.MARKDOWN_HEADER, packagers.markdown_fragment, ""),
+    'markdown-literate': (packagers.MARKDOWN_LITERATE_HEADER,
+                          partial(packagers.markdown_fragment, literate=True), ""),
+    'markdown-literate-compact': (packagers.MARKDOWN_LITERATE_HEADER,
+                                  partial(packagers.markdown_fragment, literate=True,
+                                          analysis=False), ""),
+    'org': (packagers.ORG_HEADER, packagers.org_fragment, ""),
+    'files-to-prompt': ("", packagers.files_to_prompt_fragment, ""),
+    'files-to-prompt-cxml': (packagers.CXML_HEADER, packagers.cxml_document,
+                             packagers.CXML_FOOTER),
+}
+
+# Position-dependent text prepended to cached fragments, keyed like FORMATS
+PREFIXES: Dict[str, Callable[[int], str]] = {
+    'files-to-prompt-cxml': packagers.cxml_open,
+}
+
+
+@dataclass
+class FormatStats:
+    chars: int = 0
+    bytes: int = 0
+    tokens: int = 0      # Sum of header, per-fragment and footer token counts
+
+
+@dataclass
+class RenderedCorpus:
+    """Every requested format of one corpus state."""
+    paths: List[str]
+    content_bytes: int = 0       # Sum of file sizes on disk
+    content_tokens: int = 0
+    file_tokens: List[int] = field(default_factory=list)    # Content tokens per path
+    stats: Dict[str, FormatStats] = field(default_factory=dict)
+    fragments: Dict[str, List[str]] = field(default_factory=dict)
+    fragment_tokens: Dict[str, List[int]] = field(default_factory=dict)
+
+    def header(self, fmt: str) -> str:
+        return FORMATS[fmt][0]
+
+    def footer(self, fmt: str) -> str:
+        return FORMATS[fmt][2]
+
+    def text(self, fmt: str) -> str:
+        """Return the full archive text of a format (joined on each call, not kept)."""
+        return self.header(fmt) + "".join(self.fragments[fmt]) + self.footer(fmt)
+
+
+def corpus_state(scanner: CorpusScanner) -> str:
+    """Digest of the scanned paths, sizes and mtimes."""
+    digest = hashlib.blake2b(digest_size=16)
+    for f in scanner.scan():
+        digest.update(f"{f.path}\0{f.size}\0{f.mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _content_tokens(counter: TokenCounter) -> Tuple[str, Callable[[str, str], str]]:
+    """Pseudo-format caching a file's content token count next to its fragments."""
+    return (f"tokens:{counter.tokenizer.fingerprint}",
+            lambda path, content: str(counter.count(content)))
+
+
+def render_all(scanner: CorpusScanner, formats: Tuple[str, ...],
+               counter: Optional[TokenCounter] = None,
+               workers: int = 0,
+               cache: Optional[FragmentCache] = None) -> RenderedCorpus:
+    """Render every file into all formats in one pass, reading each at most once.
+
+    With a cache, fragments (and content token counts) of unchanged files
+    come from the cache without reading the file.
+    """
+    unknown = [fmt for fmt in formats if fmt not in FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown formats: {', '.join(unknown)}")
+
+    paths = scanner.paths()
+    index_of = {path: index for index, path in enumerate(paths, 1)}
+    render: Dict[str, Callable[[str, str], str]] = {fmt: FORMATS[fmt][1] for fmt in formats}
+    tokens_key = None
+    if counter is not None:
+        tokens_key, render[tokens_key] = _content_tokens(counter)
+
+    def work(path: str) -> Tuple[int, Optional[int], List[str]]:
+        if cache is not None:
+            fragments = cache.render_many(scanner, path, render)
+        else:
+            content = scanner.read(path)
+            fragments = {key: renderer(path, content) for key, renderer in render.items()}
+        content_tokens = int(fragments[tokens_key]) if tokens_key is not None else None
+        # Cached fragments are position-independent; positions are added here
+        rendered = [PREFIXES[fmt](index_of[path]) + fragments[fmt] if fmt in PREFIXES
+                    else fragments[fmt] for fmt in formats]
+        return scanner.stat(path).st_size, content_tokens, rendered
+
+    result = RenderedCorpus(paths=paths)
+    for fmt in formats:
+        result.fragments[fmt] = []
+        result.fragment_tokens[fmt] = []
+        header, _, footer = FORMATS[fmt]
+        result.stats[fmt] = FormatStats(
+            chars=len(header) + len(footer),
+            bytes=len(header.encode('utf-8')) + len(footer.encode('utf-8')),
+            tokens=(counter.count(header) + counter.count(footer)) if counter else 0)
+
+    for size, content_tokens, rendered in packagers.map_corpus(scanner, work, workers):
+        result.content_bytes += size
+        if content_tokens is not None:
+            result.content_tokens += content_tokens
+            result.file_tokens.append(content_tokens)
+        for fmt, fragment in zip(formats, rendered):
+            stats = result.stats[fmt]
+            stats.chars += len(fragment)
+            stats.bytes += len(fragment.encode('utf-8'))
+            tokens = counter.count(fragment) if counter is not None else 0
+            stats.tokens += tokens
+            result.fragments[fmt].append(fragment)
+            result.fragment_tokens[fmt].append(tokens)
+    if cache is not None:
+        cache.prune(scanner)
+        cache.flush()
+    return result
+
+
+_RENDERED: "OrderedDict[Tuple, Future]" = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def clear():
+    """Drop every memoized rendering (benchmarks time real renders this way)."""
+    with _LOCK:
+        _RENDERED.clear()
+
+
+def get_rendered(scanner: CorpusScanner, formats: Tuple[str, ...],
+                 counter: Optional[TokenCounter] = None,
+                 workers: int = 0,
+                 cache: Optional[FragmentCache] = None,
+                 refresh: bool = True) -> RenderedCorpus:
+    """Return the rendering for the scanner's current corpus state, rendering once.
+
+    The scan is refreshed first (unless refresh is False, for callers that
+    just refreshed it), so the key reflects current stats. Concurrent
+    callers for the same state wait for a single render; the global lock
+    is only held to find or claim a key, never while rendering.
+    """
+    if refresh:
+        scanner.scan(refresh=True)
+    key = (scanner.root, scanner.variant, corpus_state(scanner), tuple(formats), id(counter))
+    with _LOCK:
+        future = _RENDERED.get(key)
+        owner = future is None
+        if owner:
+            # Drop renderings of older states of the same corpus
+            for stale in [k for k in _RENDERED if k[:2] == key[:2] and k[3:] == key[3:]]:
+                del _RENDERED[stale]
+            future = _RENDERED[key] = Future()
+            while len(_RENDERED) > MAX_RENDERED:
+                _RENDERED.popitem(last=False)
+        else:
+            _RENDERED.move_to_end(key)
+    if owner:
+        try:
+            future.set_result(render_all(scanner, formats, counter, workers, cache))
+        except BaseException as e:
+            with _LOCK:
+                if _RENDERED.get(key) is future:
+                    del _RENDERED[key]
+            future.set_exception(e)
+    return future.result()
@@ -0,0 +1,239 @@
+"""
+In-process Ollama chat client with keep-alive connection pooling.
+"""
+
+import http.client
+import json
+import queue
+import socket
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+from tracing import NULL_TRACER
+
+DEFAULT_URL = "http://localhost:11434"
+
+
+class OllamaError(Exception):
+    """Raised when the Ollama API cannot be reached or returns an error."""
+
+
+class OllamaTimeout(OllamaError):
+    """Raised when a chat request exceeds its deadline."""
+
+
+class OllamaHTTPError(OllamaError):
+    """Raised when the API answers with a non-200 status."""
+
+    def __init__(self, status: int, detail: str):
+        super().__init__(f"HTTP {status} - {detail}")
+        self.status = status
+
+
+@dataclass
+class ChatResult:
+    content: str
+    total_time: float                       # Wall time for the whole request
+    time_to_first_token: Optional[float]    # Wall time until the first content chunk
+    tokens: int                             # Generated tokens (eval_count or chunk count)
+    tokens_per_second: float                # Decode throughput
+    stats: Dict[str, Any] = field(default_factory=dict)  # Final Ollama timing fields
+    cached: bool = False                    # Served from the response cache
+    stopped_early: bool = False             # Streaming was cut short by on_chunk
+    attempts: int = 1                       # Requests sent, including retries
+    failed: bool = False                    # content is an "Error: ..." message
+
+    @property
+    def load_time(self) -> float:
+        """Seconds Ollama spent loading the model for this request."""
+        return self.stats.get('load_duration', 0) / 1e9
+
+
+class OllamaClient:
+    """Thread-safe Ollama client reusing a bounded pool of HTTP connections."""
+
+    def __init__(self, base_url: str = DEFAULT_URL, pool_size: int = 8,
+                 timeout: float = 30.0):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 11434
+        self.timeout = timeout
+        self._pool: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(pool_size)
+        self._digests: Optional[Dict[str, str]] = None
+        self.tracer = NULL_TRACER
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _release(self, conn: http.client.HTTPConnection):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        """Close all pooled connections."""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _post(self, path: str, body: bytes, timeout: float):
+        """POST body, retrying once if a pooled keep-alive connection went stale."""
+        for attempt in range(2):
+            conn = self._acquire()
+            reused = conn.sock is not None
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            try:
+                conn.request("POST", path, body=body,
+                             headers={"Content-Type": "application/json"})
+                return conn, conn.getresponse()
+            except (http.client.RemoteDisconnected, BrokenPipeError,
+                    ConnectionResetError) as e:
+                conn.close()
+                if not reused or attempt:
+                    raise OllamaError(f"API call failed - {e}") from e
+            except socket.timeout as e:
+                conn.close()
+                raise OllamaTimeout("API call timed out") from e
+            except OSError as e:
+                conn.close()
+                raise OllamaError(f"API call failed - {e}") from e
+        raise OllamaError("API call failed")
+
+    def model_digest(self, model: str) -> str:
+        """Return the digest of an installed model, or '' if it cannot be determined.
+
+        A failed /api/tags lookup is remembered, so it is not retried per request.
+        """
+        if self._digests is None:
+            conn = self._acquire()
+            try:
+                conn.request("GET", "/api/tags")
+                response = conn.getresponse()
+                body = response.read()
+                self._release(conn)
+                models = json.loads(body).get('models', []) if response.status == 200 else []
+                self._digests = {m.get('name', ''): m.get('digest', '') for m in models}
+            except (OSError, http.client.HTTPException, ValueError):
+                conn.close()
+                self._digests = {}
+                return ''
+        return self._digests.get(model, '')
+
+    def load(self, model: str, keep_alive: Any = None,
+             options: Optional[Dict[str, Any]] = None,
+             timeout: Optional[float] = None) -> ChatResult:
+        """Load (or, with keep_alive=0, unload) a model without generating.
+
+        options should match later chat requests: a different num_ctx makes
+        Ollama reload the model on the next request.
+        """
+        payload: Dict[str, Any] = {"model": model, "messages": []}
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        if options:
+            payload["options"] = options
+        return self.chat(payload, stream=False, timeout=timeout)
+
+    def chat(self, payload: Dict[str, Any], stream: bool = True,
+             timeout: Optional[float] = None,
+             on_chunk: Optional[Callable[[str], Optional[bool]]] = None,
+             first_token_timeout: Optional[float] = None,
+             idle_timeout: Optional[float] = None) -> ChatResult:
+        """Send a /api/chat request and return the assembled response.
+
+        In streaming mode NDJSON chunks are parsed as they arrive; on_chunk,
+        if given, is called with each content fragment. If it returns True
+        the connection is closed, which makes Ollama stop generating, and
+        the partial response is returned with stopped_early set.
+
+        timeout bounds the whole request. first_token_timeout bounds the
+        wait for the response to start (load and prefill) and idle_timeout
+        the gap between streamed chunks; both default to timeout.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        first_token_timeout = timeout if first_token_timeout is None else first_token_timeout
+        idle_timeout = timeout if idle_timeout is None else idle_timeout
+        start = time.perf_counter()
+        deadline = start + timeout
+        with self.tracer.span('infer.encode'):
+            payload = dict(payload, stream=stream)
+            body = json.dumps(payload).encode('utf-8')
+
+        with self.tracer.span('infer.wait', bytes=len(body)):
+            # Without streaming nothing arrives until generation has finished
+            wait = min(first_token_timeout, timeout) if stream else timeout
+            conn, response = self._post("/api/chat", body, wait)
+        reusable = False
+        with self.tracer.span('infer.decode', stream=stream):
+            try:
+                if response.status != 200:
+                    detail = response.read()[:200].decode('utf-8', 'replace')
+                    reusable = True
+                    raise OllamaHTTPError(response.status, detail)
+
+                parts = []
+                first_token_at = None
+                chunks = 0
+                stopped = False
+                final: Dict[str, Any] = {}
+                try:
+                    lines = response if stream else [response.read()]
+                    for line in lines:
+                        if not line.strip():
+                            continue
+                        if time.perf_counter() > deadline:
+                            raise OllamaTimeout("API call timed out")
+                        try:
+                            message = json.loads(line)
+                        except json.JSONDecodeError as e:
+                            text = line[:100].decode('utf-8', 'replace')
+                            raise OllamaError(f"Invalid JSON response - {text}...") from e
+                        if 'error' in message:
+                            raise OllamaError(str(message['error']))
+                        text = message.get('message', {}).get('content') \
+                            or message.get('response', '')
+                        if text:
+                            if first_token_at is None:
+                                first_token_at = time.perf_counter()
+                                if stream and conn.sock is not None:
+                                    conn.sock.settimeout(min(idle_timeout, timeout))
+                            chunks += 1
+                            parts.append(text)
+                            if on_chunk is not None and on_chunk(text) and stream:
+                                stopped = True
+                                break
+                        if message.get('done'):
+                            final = message
+                    reusable = not stopped
+                except socket.timeout as e:
+                    raise OllamaTimeout("API call timed out") from e
+            finally:
+                if reusable and not response.will_close:
+                    self._release(conn)
+                else:
+                    conn.close()
+
+        total_time = time.perf_counter() - start
+        tokens = final.get('eval_count') or chunks
+        eval_seconds = final.get('eval_duration', 0) / 1e9
+        if not eval_seconds and first_token_at is not None:
+            eval_seconds = start + total_time - first_token_at
+        return ChatResult(
+            content=''.join(parts),
+            total_time=total_time,
+            time_to_first_token=None if first_token_at is None else first_token_at - start,
+            tokens=tokens,
+            tokens_per_second=tokens / eval_seconds if eval_seconds > 0 else 0.0,
+            stats={k: v for k, v in final.items() if k.endswith(('_count', '_duration'))},
+            stopped_early=stopped,
+        )
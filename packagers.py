@@ -0,0 +1,254 @@
+"""
+Streaming corpus packagers.
+
+Each packager yields the archive as a sequence of text chunks (a header,
+one fragment per file, then any footer) so callers can write it to a
+file, socket or request body without holding the whole archive in memory.
+Joining the chunks gives exactly the string the `package_corpus()` style
+methods return.
+"""
+
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import IO, Callable, Iterable, Iterator, List, Optional, TypeVar
+
+from corpus import CorpusScanner
+from fragment_cache import FragmentCache
+
+T = TypeVar('T')
+
+CHUNK_SIZE = 64 * 1024
+READ_BATCH_BYTES = 256 * 1024   # Parallel reads group consecutive small files
+READ_BATCH_FILES = 64           # up to this many bytes or files per task
+
+MARKDOWN_HEADER = "# Code Review Archive\n\n"
+MARKDOWN_LITERATE_HEADER = (
+    "# Code Review Archive\n\n"
+    "## Overview\n"
+    "This archive contains code files for review in literate programming style.\n\n"
+)
+ORG_HEADER = (
+    "#+TITLE: Code Review Archive\n"
+    "#+PROPERTY: header-args :tangle yes :mkdirp yes\n\n"
+)
+
+CXML_HEADER = "<documents>\n"
+CXML_FOOTER = "</documents>\n"
+
+
+def file_ext(path: str) -> str:
+    """Return the language tag packagers use for a file."""
+    filename = path.split('/')[-1]
+    return filename.split('.')[-1] if '.' in filename else "text"
+
+
+def find_fragment(path: str, content: str) -> str:
+    """Render one file in the `find -exec cat` layout."""
+    return f"### FILE: {path}\n{content}### END\n"
+
+
+def markdown_fragment(path: str, content: str, literate: bool = False,
+                      analysis: bool = True) -> str:
+    """Render one file as a Markdown section.
+
+    Literate sections end with blank Analysis placeholders unless analysis
+    is False.
+    """
+    filename = path.split('/')[-1]
+    ext = file_ext(path)
+    parts = [
+        f"## {filename}\n\n",
+        f"Language: {ext}\n",
+        f"Path: {path}\n\n",
+    ]
+    if literate:
+        parts.append("### Source Code\n\n")
+    parts.append(f"```{ext}\n{content}\n```\n\n")
+    if literate and analysis:
+        parts.append("### Analysis\n\n"
+                     "- Code structure:\n"
+                     "- Potential issues:\n"
+                     "- Improvement suggestions:\n\n"
+                     "---\n\n")
+    return "".join(parts)
+
+
+def org_fragment(path: str, content: str) -> str:
+    """Render one file as an Org headline with a tangle-able source block."""
+    filename = path.split('/')[-1]
+    return (f"* {filename}\n"
+            f"#+BEGIN_SRC {file_ext(path)} :tangle {path}\n"
+            f"{content}"
+            "\n#+END_SRC\n\n")
+
+
+def files_to_prompt_fragment(path: str, content: str) -> str:
+    """Render one file in the default files-to-prompt layout."""
+    return f"{path}\n---\n{content}\n\n---\n"
+
+
+def cxml_open(index: int) -> str:
+    """Opening tag of the index-th cxml document."""
+    return f'<document index="{index}">\n'
+
+
+def cxml_document(path: str, content: str) -> str:
+    """Render the position-independent rest of a file's cxml document."""
+    return (f"<source>{path}</source>\n"
+            "<document_content>\n"
+            f"{content}\n"
+            "</document_content>\n"
+            "</document>\n")
+
+
+def cxml_fragment(index: int, path: str, content: str) -> str:
+    """Render one file as a files-to-prompt --cxml document."""
+    return cxml_open(index) + cxml_document(path, content)
+
+
+def _read_batches(scanner: CorpusScanner) -> Iterator[List[str]]:
+    """Group consecutive paths into batches of roughly READ_BATCH_BYTES.
+
+    Large files get a batch of their own; small files share one so a huge
+    tree of tiny files does not pay one task per file.
+    """
+    batch: List[str] = []
+    size = 0
+    for path in scanner.paths():
+        batch.append(path)
+        size += scanner.stat(path).st_size
+        if size >= READ_BATCH_BYTES or len(batch) >= READ_BATCH_FILES:
+            yield batch
+            batch, size = [], 0
+    if batch:
+        yield batch
+
+
+def map_corpus(scanner: CorpusScanner, work: Callable[[str], T],
+               workers: int = 0) -> Iterator[T]:
+    """Yield work(path) for every corpus path, in path order.
+
+    With workers > 0 paths are processed in batches on a thread pool; at
+    most a few batches per worker are in flight, so memory stays bounded
+    however large the corpus is.
+    """
+    if workers <= 0:
+        for path in scanner.paths():
+            yield work(path)
+        return
+    window = workers * 4
+    pending: deque = deque()
+
+    def run_batch(batch: List[str]) -> List[T]:
+        return [work(path) for path in batch]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            for batch in _read_batches(scanner):
+                pending.append(pool.submit(run_batch, batch))
+                if len(pending) >= window:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def iter_fragments(scanner: CorpusScanner, fmt: str,
+                   render: Callable[[str, str], str],
+                   cache: Optional[FragmentCache] = None,
+                   workers: int = 0) -> Iterator[str]:
+    """Stream one rendered fragment per corpus file, reusing cached fragments.
+
+    With workers > 0, files are read and rendered on a bounded thread pool;
+    fragments are still yielded in corpus order. The scan is refreshed
+    first, so the cache is validated against current stats.
+    """
+    scanner.scan(refresh=True)
+    if cache is None:
+        work = lambda path: render(path, scanner.read(path))
+    else:
+        work = lambda path: cache.render(fmt, scanner, path, render)
+    yield from map_corpus(scanner, work, workers)
+    if cache is not None:
+        cache.prune(scanner)
+        cache.flush()
+
+
+def iter_find(scanner: CorpusScanner,
+              cache: Optional[FragmentCache] = None,
+              workers: int = 0) -> Iterator[str]:
+    """Stream the corpus in the `find -exec cat` layout."""
+    yield from iter_fragments(scanner, 'find', find_fragment, cache, workers)
+
+
+def iter_markdown(scanner: CorpusScanner, literate: bool = False,
+                  cache: Optional[FragmentCache] = None,
+                  workers: int = 0, analysis: bool = True) -> Iterator[str]:
+    """Stream the corpus as a Markdown archive."""
+    yield MARKDOWN_LITERATE_HEADER if literate else MARKDOWN_HEADER
+    if literate:
+        fmt = 'markdown-literate' if analysis else 'markdown-literate-compact'
+        yield from iter_fragments(scanner, fmt,
+                                  partial(markdown_fragment, literate=True, analysis=analysis),
+                                  cache, workers)
+    else:
+        yield from iter_fragments(scanner, 'markdown', markdown_fragment, cache, workers)
+
+
+def iter_org_archive(scanner: CorpusScanner,
+                     cache: Optional[FragmentCache] = None,
+                     workers: int = 0) -> Iterator[str]:
+    """Stream the corpus as an Org archive."""
+    yield ORG_HEADER
+    yield from iter_fragments(scanner, 'org', org_fragment, cache, workers)
+
+
+def iter_files_to_prompt(scanner: CorpusScanner, cxml: bool = False,
+                         cache: Optional[FragmentCache] = None,
+                         workers: int = 0) -> Iterator[str]:
+    """Stream the corpus in files-to-prompt's layout without running the tool."""
+    if not cxml:
+        yield from iter_fragments(scanner, 'files-to-prompt', files_to_prompt_fragment,
+                                  cache, workers)
+        return
+    # Only the opening tag carries the file's position, so the rest is cached per path
+    yield CXML_HEADER
+    documents = iter_fragments(scanner, 'files-to-prompt-cxml', cxml_document, cache, workers)
+    for index, document in enumerate(documents, 1):
+        yield cxml_open(index) + document
+    yield CXML_FOOTER
+
+
+def iter_command(cmd, shell: bool = False) -> Iterator[str]:
+    """Stream the stdout of an external packaging tool such as files-to-prompt."""
+    proc = subprocess.Popen(cmd, shell=shell, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, text=True)
+    try:
+        while True:
+            chunk = proc.stdout.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        proc.stdout.close()
+        proc.wait()
+
+
+def write_chunks(chunks: Iterable[str], fp: IO[str]) -> int:
+    """Write streamed chunks to a text file-like object, returning characters written."""
+    written = 0
+    for chunk in chunks:
+        fp.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def encode_chunks(chunks: Iterable[str], encoding: str = 'utf-8') -> Iterator[bytes]:
+    """Encode streamed chunks for byte sinks such as sockets or HTTP bodies."""
+    for chunk in chunks:
+        yield chunk.encode(encoding)
+
@@ -0,0 +1,124 @@
+"""
+Persistent, size-bounded cache for model responses.
+
+Entries are content-addressed by model name, model digest, system prompt,
+packed corpus hash and sampling options, stored in SQLite and evicted
+least-recently-used first once the cache exceeds its size budget.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache',
+                                  'code-review-formats', 'responses.sqlite3')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+CACHE_MODES = ('use', 'refresh', 'bypass')
+
+
+def cache_key(model: str, digest: str, system_prompt: str,
+              corpus: str, options: Dict[str, Any]) -> str:
+    """Return the content address for a model call."""
+    corpus_hash = hashlib.sha256(corpus.encode('utf-8')).hexdigest()
+    material = json.dumps([model, digest, system_prompt, corpus_hash, options],
+                          sort_keys=True)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed response cache with LRU eviction by total size.
+
+    mode is 'use' (read and write), 'refresh' (skip reads, overwrite on
+    write) or 'bypass' (neither read nor write).
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH,
+                 max_bytes: int = DEFAULT_MAX_BYTES, mode: str = 'use'):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unsupported cache mode: {mode}")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " model TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)"
+            )
+        return self._db
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value for key, or None on a miss."""
+        if self.mode != 'use':
+            return None
+        with self._lock:
+            db = self._conn()
+            row = db.execute("SELECT value FROM responses WHERE key = ?",
+                             (key,)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE responses SET last_access = ? WHERE key = ?",
+                       (time.time(), key))
+            db.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, model: str, value: Dict[str, Any]):
+        """Store value under key and evict old entries beyond max_bytes."""
+        if self.mode == 'bypass':
+            return
+        blob = json.dumps(value)
+        with self._lock:
+            db = self._conn()
+            db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                       (key, model, blob, len(blob), time.time()))
+            self._evict(db)
+            db.commit()
+
+    def _evict(self, db: sqlite3.Connection):
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in db.execute(
+                "SELECT key, size FROM responses ORDER BY last_access").fetchall():
+            db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def total_size(self) -> int:
+        """Return the number of bytes currently stored."""
+        with self._lock:
+            return self._conn().execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._lock:
+            db = self._conn()
+            db.execute("DELETE FROM responses")
+            db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,138 @@
+"""
+Incremental parser for streamed review responses.
+
+Consumes the response as it streams and builds structured findings from
+the layout the system prompt asks for:
+
+    [File: fizzbuzz.py]
+    - Bug: off-by-one in the loop bounds (line 3) [medium]
+      Fix: use range(1, n + 1)
+
+Each completed line is also scanned for scorer keywords, so scores are
+available live and a request can be stopped once every expected bug has
+been reported and given a fix. `[File: ...]` markers are recognised
+wherever they appear, exactly as the scorer does, so live hits are
+attributed to the same sections as `ResponseScorer.hits` would give.
+"""
+
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import List, Optional, Set, Tuple
+
+from scoring import SECTION_MARKER, Hit, ResponseScorer, get_scorer
+
+BUG_LINE = re.compile(r'^\s*(?:[-*]|\d+\.)?\s*\**bug\**:\s*(.*)$', re.IGNORECASE)
+FIX_LINE = re.compile(r'^\s*(?:[-*]|\d+\.)?\s*\**fix\**:\s*(.*)$', re.IGNORECASE)
+LINE_NUMBER = re.compile(r'\(\s*lines?\s*(\d+)[^)]*\)', re.IGNORECASE)
+SEVERITY = re.compile(r'\[\s*(high|medium|low)\s*\]', re.IGNORECASE)
+
+
+@dataclass
+class Finding:
+    file: Optional[str]
+    description: str
+    line: Optional[int] = None
+    severity: Optional[str] = None
+    fix: Optional[str] = None
+
+
+def parse_bug(text: str) -> Tuple[str, Optional[int], Optional[str]]:
+    """Split a bug description into (description, line, severity)."""
+    line_match = LINE_NUMBER.search(text)
+    severity_match = SEVERITY.search(text)
+    description = SEVERITY.sub('', LINE_NUMBER.sub('', text)).strip()
+    return (description,
+            int(line_match.group(1)) if line_match else None,
+            severity_match.group(1).lower() if severity_match else None)
+
+
+class StreamingReviewParser:
+    """Build findings and keyword hits from response text fed in arbitrary chunks."""
+
+    def __init__(self, scorer: Optional[ResponseScorer] = None):
+        self.scorer = scorer or get_scorer()
+        self._expected_bugs = {(category, bug)
+                               for category, bugs in self.scorer.expected_bugs.items()
+                               for bug in bugs}
+        self.reset()
+
+    def reset(self):
+        """Forget everything fed so far, e.g. the text of a stream that then failed."""
+        self.findings: List[Finding] = []
+        self.hits: List[Hit] = []
+        self.chars_fed = 0
+        self._buffer = ""
+        self._offset = 0                 # Offset of the buffer start in the response
+        self._section: Optional[str] = None
+        self._in_fix = False
+        self._seen_bugs: Set[Tuple[str, str]] = set()
+
+    def feed(self, text: str) -> bool:
+        """Consume a chunk, returning True once the review is complete (see done)."""
+        self.chars_fed += len(text)
+        self._buffer += text
+        while True:
+            newline = self._buffer.find("\n")
+            if newline < 0:
+                break
+            self._line(self._buffer[:newline])
+            self._offset += newline + 1
+            self._buffer = self._buffer[newline + 1:]
+        return self.done
+
+    def close(self):
+        """Process any trailing partial line once the stream has ended."""
+        if self._buffer:
+            self._line(self._buffer)
+            self._offset += len(self._buffer)
+            self._buffer = ""
+
+    @property
+    def all_bugs_reported(self) -> bool:
+        return self._expected_bugs <= self._seen_bugs
+
+    @property
+    def done(self) -> bool:
+        """Every expected bug has been reported and the latest finding has a fix."""
+        return (self.all_bugs_reported and bool(self.findings)
+                and self.findings[-1].fix is not None)
+
+    def scores(self):
+        """Per-category scores of the hits seen so far."""
+        return self.scorer.score_hits(self.hits)
+
+    def _line(self, line: str):
+        markers = [(m.start(), m.group(1).strip()) for m in SECTION_MARKER.finditer(line)]
+        self._scan(line, markers)
+        if markers:
+            self._section = markers[-1][1]
+            self._in_fix = False
+            if not line[:markers[0][0]].strip():
+                return                   # A header line carries no finding
+
+        bug_match = BUG_LINE.match(line)
+        if bug_match:
+            description, number, severity = parse_bug(bug_match.group(1))
+            self.findings.append(Finding(self._section, description, number, severity))
+            self._in_fix = False
+            return
+        fix_match = FIX_LINE.match(line)
+        if fix_match and self.findings:
+            self.findings[-1].fix = fix_match.group(1).strip()
+            self._in_fix = True
+        elif self._in_fix and line[:1].isspace() and line.strip():
+            # Indented lines continue the fix; anything else ends it
+            self.findings[-1].fix += "\n" + line.strip()
+        else:
+            self._in_fix = False
+
+    def _scan(self, line: str, markers: List[Tuple[int, str]]):
+        text = line.lower()
+        starts = [start for start, _ in markers]
+        for offset, (category, kind, keyword) in self.scorer.matcher.scan(text):
+            index = bisect_right(starts, offset) - 1
+            section = markers[index][1] if index >= 0 else self._section
+            self.hits.append(Hit(category, kind, keyword, self._offset + offset, section))
+            if kind == 'bug':
+                self._seen_bugs.add((category, keyword))
@@ -0,0 +1,239 @@
+"""
+Append-only SQLite store for matrix results.
+
+Results are written as soon as each cell finishes, so a crashed matrix can
+be resumed and reports can be rendered by query over any number of runs.
+Raw model responses are stored once per distinct text, zlib-compressed.
+Each result records its position in the model/test matrix, so reports list
+cells in matrix order however the run scheduled them.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+NUMERIC_COLUMNS = ('bugs_identified', 'fixes_correct', 'execution_time',
+                   'token_efficiency', 'success_rate', 'queue_time', 'service_time')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    hash TEXT PRIMARY KEY,
+    body BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    model TEXT NOT NULL,
+    test_id TEXT NOT NULL,
+    created REAL NOT NULL,
+    bugs_identified REAL,
+    fixes_correct REAL,
+    execution_time REAL,
+    token_efficiency REAL,
+    success_rate REAL,
+    queue_time REAL,
+    service_time REAL,
+    response_hash TEXT REFERENCES responses (hash),
+    data TEXT NOT NULL,
+    position INTEGER
+);
+CREATE INDEX IF NOT EXISTS results_cell ON results (run_id, model, test_id);
+CREATE TABLE IF NOT EXISTS benchmarks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    model TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    created REAL NOT NULL,
+    metrics TEXT NOT NULL,
+    model_results TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS baselines (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    model TEXT NOT NULL,
+    test_id TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    created REAL NOT NULL,
+    samples TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS baselines_name ON baselines (name);
+"""
+
+
+# 1 if a result was served from the response cache
+CACHED = "COALESCE(json_extract(data, '$.cached'), 0)"
+
+
+def _fresh_avg(column: str) -> str:
+    return (f"COALESCE(AVG(CASE WHEN {CACHED} THEN NULL ELSE {column} END), "
+            f"AVG({column}))")
+
+
+def new_run_id() -> str:
+    """A sortable run id, unique even for runs started in the same second."""
+    now = time.time()
+    return (f"{time.strftime('%Y%m%dT%H%M%S', time.localtime(now))}"
+            f".{int(now % 1 * 1e6):06d}-{os.urandom(2).hex()}")
+
+
+# Matrix order, falling back to completion order for rows stored without a position
+def _matrix_order(position: str, first_id: str) -> str:
+    return f"{position} IS NULL, {position}, {first_id}"
+
+
+class ResultsStore:
+    """Thread-safe append-only results store."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(results)")}
+        if 'position' not in columns:
+            self._db.execute("ALTER TABLE results ADD COLUMN position INTEGER")
+            self._db.commit()
+        self._lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _put_response(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        self._db.execute("INSERT OR IGNORE INTO responses VALUES (?, ?)",
+                         (digest, zlib.compress(text.encode('utf-8'))))
+        return digest
+
+    def add_result(self, run_id: str, model: str, test_id: str,
+                   result: Dict[str, Any], position: Optional[int] = None) -> str:
+        """Append one cell result (as a dict) and return its response hash.
+
+        position is the cell's index in the model/test matrix.
+        """
+        result = dict(result)
+        raw_response = result.pop('raw_response', '')
+        with self._lock:
+            digest = self._put_response(raw_response)
+            self._db.execute(
+                f"INSERT INTO results (run_id, model, test_id, created, "
+                f"{', '.join(NUMERIC_COLUMNS)}, response_hash, data, position) "
+                f"VALUES (?, ?, ?, ?, {', '.join('?' for _ in NUMERIC_COLUMNS)}, ?, ?, ?)",
+                (run_id, model, test_id, time.time(),
+                 *(result.get(column) for column in NUMERIC_COLUMNS),
+                 digest, json.dumps(result, default=str), position))
+            self._db.commit()
+        return digest
+
+    def add_benchmark(self, run_id: str, model: str, tool: str,
+                      metrics: Dict[str, Any], model_results: Dict[str, Any]):
+        """Append one format_tester benchmark result."""
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO benchmarks (run_id, model, tool, created, metrics, model_results) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, model, tool, time.time(),
+                 json.dumps(metrics, default=str), json.dumps(model_results)))
+            self._db.commit()
+
+    def add_baseline(self, name: str, samples: Dict[Tuple[str, str, str], List[float]]):
+        """Store repeated-measurement samples keyed by (model, test_id, metric)."""
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO baselines (name, model, test_id, metric, created, samples) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(name, model, test_id, metric, now, json.dumps(values))
+                 for (model, test_id, metric), values in samples.items()])
+            self._db.commit()
+
+    def baseline(self, name: str) -> Dict[Tuple[str, str, str], List[float]]:
+        """Return the most recently stored samples of a baseline."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT model, test_id, metric, samples FROM baselines "
+                "WHERE name = ? ORDER BY id", (name,)).fetchall()
+        return {(model, test_id, metric): json.loads(samples)
+                for model, test_id, metric, samples in rows}
+
+    def response(self, digest: str) -> str:
+        """Return the full raw response stored under digest."""
+        with self._lock:
+            row = self._db.execute("SELECT body FROM responses WHERE hash = ?",
+                                   (digest,)).fetchone()
+        return zlib.decompress(row[0]).decode('utf-8') if row else ""
+
+    def completed_cells(self, run_id: str) -> Set[Tuple[str, str]]:
+        """Return the (model, test_id) cells already recorded for a run."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT DISTINCT model, test_id FROM results WHERE run_id = ?",
+                (run_id,)).fetchall()
+        return set(rows)
+
+    def latest_run(self) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT run_id FROM results ORDER BY id DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def _query(self, sql: str, params: Tuple = ()) -> Iterator[sqlite3.Row]:
+        """Stream rows from a read-only cursor on its own connection."""
+        db = sqlite3.connect(self.path)
+        db.row_factory = sqlite3.Row
+        try:
+            yield from db.execute(sql, params)
+        finally:
+            db.close()
+
+    def iter_summary(self, run_id: Optional[str] = None) -> Iterator[sqlite3.Row]:
+        """Stream per-cell aggregates (mean over trials) in matrix order.
+
+        Timings average only trials that reached the model, unless every
+        trial of a cell was served from the response cache.
+        """
+        where, params = ("WHERE run_id = ?", (run_id,)) if run_id else ("", ())
+        return self._query(
+            f"WITH cells AS ("
+            f"  SELECT model, test_id, COUNT(*) AS trials, MIN(id) AS first_id, "
+            f"  MIN(position) AS position, SUM({CACHED}) AS cached, "
+            f"  AVG(success_rate) AS success_rate, AVG(token_efficiency) AS token_efficiency, "
+            f"  {_fresh_avg('execution_time')} AS execution_time, "
+            f"  {_fresh_avg('queue_time')} AS queue_time, "
+            f"  {_fresh_avg('service_time')} AS service_time "
+            f"  FROM results {where} GROUP BY model, test_id"
+            f"), models AS (SELECT model, MIN(position) AS model_position, "
+            f"  MIN(first_id) AS model_first FROM cells GROUP BY model) "
+            f"SELECT cells.* FROM cells JOIN models USING (model) "
+            f"ORDER BY {_matrix_order('models.model_position', 'models.model_first')}, "
+            f"{_matrix_order('cells.position', 'cells.first_id')}", params)
+
+    def iter_latest(self, run_id: Optional[str] = None) -> Iterator[sqlite3.Row]:
+        """Stream the most recent result per cell in matrix order."""
+        where, params = ("WHERE run_id = ?", (run_id,)) if run_id else ("", ())
+        return self._query(
+            f"WITH cells AS ("
+            f"  SELECT model, test_id, MAX(id) AS last_id, MIN(id) AS first_id, "
+            f"  MIN(position) AS position "
+            f"  FROM results {where} GROUP BY model, test_id"
+            f"), models AS (SELECT model, MIN(position) AS model_position, "
+            f"  MIN(first_id) AS model_first FROM cells GROUP BY model) "
+            f"SELECT r.* FROM cells JOIN models USING (model) "
+            f"JOIN results r ON r.id = cells.last_id "
+            f"ORDER BY {_matrix_order('models.model_position', 'models.model_first')}, "
+            f"{_matrix_order('cells.position', 'cells.first_id')}", params)
+
+    def iter_benchmarks(self, run_id: Optional[str] = None) -> Iterator[sqlite3.Row]:
+        """Stream the most recent benchmark per (model, tool)."""
+        where, params = ("WHERE run_id = ?", (run_id,)) if run_id else ("", ())
+        return self._query(
+            f"SELECT b.* FROM benchmarks b JOIN ("
+            f"  SELECT MAX(id) AS last_id FROM benchmarks {where} GROUP BY model, tool"
+            f") l ON b.id = l.last_id ORDER BY b.id", params)
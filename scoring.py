@@ -0,0 +1,144 @@
+"""
+Single-pass keyword scoring for model review responses.
+
+All expected bug and fix keywords are compiled once into an Aho-Corasick
+automaton, so each response is lowercased once and scanned once for every
+category, with each hit attributed to the `[File: ...]` section it
+appeared in.
+"""
+
+import re
+from bisect import bisect_right
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+EXPECTED_BUGS = {
+    'fizzbuzz': ['off_by_one', 'range error', 'modulo'],
+    'fibonacci': ['stack overflow', 'integer overflow', 'base case'],
+    'append': ['mutation', 'reference', 'improper list']
+}
+
+EXPECTED_FIXES = {
+    'fizzbuzz': ['range(1, n + 1)', 'return', 'modulo'],
+    'fibonacci': ['iterative', 'big_number', 'if n <= 1'],
+    'append': ['new_list', 'slice', 'proper_list']
+}
+
+SECTION_MARKER = re.compile(r'\[file:\s*([^\]\n]*)\]', re.IGNORECASE)
+
+Label = Tuple[str, str, str]    # (category, 'bug' | 'fix', keyword)
+
+
+@dataclass(frozen=True)
+class Hit:
+    category: str
+    kind: str                   # 'bug' or 'fix'
+    keyword: str
+    offset: int                 # Offset of the match start in the response
+    section: Optional[str]      # Filename from the enclosing [File: ...] header
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over lowercase keywords."""
+
+    def __init__(self, patterns: Dict[str, List[Label]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, Label]]] = [[]]
+
+        for pattern, labels in patterns.items():
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].extend((len(pattern), label) for label in labels)
+
+        pending = deque(self._goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for ch, nxt in self._goto[state].items():
+                pending.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0) if state else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scan(self, text: str):
+        """Yield (start_offset, label) for every keyword occurrence in text."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, label in out[state]:
+                yield i - length + 1, label
+
+
+class ResponseScorer:
+    """Score responses against every category's expected bugs and fixes at once."""
+
+    def __init__(self,
+                 expected_bugs: Dict[str, List[str]] = None,
+                 expected_fixes: Dict[str, List[str]] = None):
+        self.expected_bugs = expected_bugs or EXPECTED_BUGS
+        self.expected_fixes = expected_fixes or EXPECTED_FIXES
+        patterns: Dict[str, List[Label]] = {}
+        for kind, table in (('bug', self.expected_bugs), ('fix', self.expected_fixes)):
+            for category, keywords in table.items():
+                for keyword in keywords:
+                    patterns.setdefault(keyword.lower(), []).append((category, kind, keyword))
+        self.matcher = KeywordMatcher(patterns)
+
+    def hits(self, response: str) -> List[Hit]:
+        """Return every keyword hit with the file section it occurred in."""
+        text = response.lower()
+        # Keep the original filename case unless lowercasing shifted offsets
+        source = response if len(text) == len(response) else text
+        markers = [(m.start(), m.group(1).strip()) for m in SECTION_MARKER.finditer(source)]
+        starts = [start for start, _ in markers]
+        found = []
+        for offset, (category, kind, keyword) in self.matcher.scan(text):
+            index = bisect_right(starts, offset) - 1
+            section = markers[index][1] if index >= 0 else None
+            found.append(Hit(category, kind, keyword, offset, section))
+        return found
+
+    def score(self, response: str) -> Dict[str, Dict[str, float]]:
+        """Score all categories in one scan of the response."""
+        return self.score_hits(self.hits(response))
+
+    def score_hits(self, hits: List[Hit]) -> Dict[str, Dict[str, float]]:
+        """Aggregate hits into per-category bug, fix and success counts."""
+        seen = {(hit.category, hit.kind, hit.keyword) for hit in hits}
+        scores = {}
+        for category, bugs in self.expected_bugs.items():
+            fixes = self.expected_fixes.get(category, [])
+            identified = sum(1 for bug in bugs if (category, 'bug', bug) in seen)
+            correct_fixes = sum(1 for fix in fixes if (category, 'fix', fix) in seen)
+            total = len(bugs) + len(fixes)
+            scores[category] = {
+                'bugs_identified': identified,
+                'fixes_correct': correct_fixes,
+                'success_rate': (identified + correct_fixes) / total if total else 0.0
+            }
+        return scores
+
+
+_DEFAULT_SCORER: Optional[ResponseScorer] = None
+
+
+def get_scorer() -> ResponseScorer:
+    """Return the shared scorer compiled from the default expectation tables."""
+    global _DEFAULT_SCORER
+    if _DEFAULT_SCORER is None:
+        _DEFAULT_SCORER = ResponseScorer()
+    return _DEFAULT_SCORER
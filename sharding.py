@@ -0,0 +1,84 @@
+"""
+Context-window-aware corpus sharding.
+
+Packed fragments are bin-packed into shards that fit a model's context
+budget, keeping files from the same directory (e.g. `fizzbuzz/`)
+together whenever the directory fits in one shard. Per-shard responses
+are merged back into a single ChatResult.
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from ollama_client import ChatResult
+
+
+@dataclass
+class Shard:
+    paths: List[str] = field(default_factory=list)
+    tokens: int = 0
+
+
+def plan_shards(fragments: List[Tuple[str, int]], budget: int) -> List[List[str]]:
+    """Bin-pack (path, tokens) fragments into shards of at most budget tokens.
+
+    Directories are packed whole using first-fit decreasing; a directory
+    larger than the budget is split file by file. A single file larger
+    than the budget gets a shard of its own. Paths within each shard, and
+    the shards themselves, keep corpus order.
+    """
+    order = {path: i for i, (path, _) in enumerate(fragments)}
+    groups: Dict[str, List[Tuple[str, int]]] = {}
+    for path, tokens in fragments:
+        groups.setdefault(os.path.dirname(path), []).append((path, tokens))
+
+    items: List[Tuple[int, List[str]]] = []
+    for members in groups.values():
+        group_tokens = sum(tokens for _, tokens in members)
+        if group_tokens <= budget:
+            items.append((group_tokens, [path for path, _ in members]))
+        else:
+            items.extend((tokens, [path]) for path, tokens in members)
+    items.sort(key=lambda item: (-item[0], order[item[1][0]]))
+
+    shards: List[Shard] = []
+    for tokens, paths in items:
+        for shard in shards:
+            if shard.tokens + tokens <= budget:
+                break
+        else:
+            shard = Shard()
+            shards.append(shard)
+        shard.paths.extend(paths)
+        shard.tokens += tokens
+
+    planned = [sorted(shard.paths, key=order.__getitem__) for shard in shards]
+    planned.sort(key=lambda paths: order[paths[0]])
+    return planned
+
+
+def merge_chat_results(results: List[ChatResult]) -> ChatResult:
+    """Merge per-shard responses into one result, as if answered sequentially."""
+    if len(results) == 1:
+        return results[0]
+    total_tokens = sum(r.tokens for r in results)
+    decode_time = sum(r.tokens / r.tokens_per_second
+                      for r in results if r.tokens_per_second > 0)
+    stats: Dict[str, int] = {}
+    for r in results:
+        for key, value in r.stats.items():
+            if isinstance(value, (int, float)):
+                stats[key] = stats.get(key, 0) + value
+    return ChatResult(
+        content="\n\n".join(r.content for r in results),
+        total_time=sum(r.total_time for r in results),
+        time_to_first_token=results[0].time_to_first_token,
+        tokens=total_tokens,
+        tokens_per_second=total_tokens / decode_time if decode_time > 0 else 0.0,
+        stats=stats,
+        cached=all(r.cached for r in results),
+        stopped_early=any(r.stopped_early for r in results),
+        attempts=sum(r.attempts for r in results),
+        failed=any(r.failed for r in results),
+    )
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Compact binary corpus snapshots.
+
+A snapshot stores the scanned file index plus each distinct file content
+once (optionally zlib-compressed), so near-identical corpora pack into one
+small file that is read through mmap instead of re-walking the tree.
+`SnapshotScanner` serves the same interface as `CorpusScanner`, so every
+packager renders from a snapshot without touching the filesystem.
+
+Layout (little-endian):
+
+    header   MAGIC, flags u32, file count u32, index offset u64, index size u64
+    blobs    deduplicated file contents
+    index    root, then per file: mtime_ns i64, size u64, blob offset u64,
+             blob length u64, compressed u8, path and relpath (u16 length + UTF-8)
+"""
+
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import zlib
+from typing import Dict, List, NamedTuple, Tuple, Union
+
+from corpus import CorpusFile, CorpusScanner, get_scanner
+
+MAGIC = b"CRSNAP01"
+HEADER = struct.Struct('<8sIIQQ')
+ENTRY = struct.Struct('<qQQQB')
+LENGTH = struct.Struct('<H')
+FLAG_COMPRESSED = 1
+
+
+class SnapshotStat(NamedTuple):
+    st_size: int
+    st_mtime_ns: int
+
+
+class Blob(NamedTuple):
+    offset: int
+    length: int
+    compressed: bool
+
+
+def is_snapshot(path: str) -> bool:
+    """Return True if path is a snapshot file."""
+    if not os.path.isfile(path):
+        return False
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def _pack_str(value: str) -> bytes:
+    data = value.encode('utf-8')
+    return LENGTH.pack(len(data)) + data
+
+
+def write_snapshot(scanner: CorpusScanner, dest: str, compress: bool = False) -> Dict[str, int]:
+    """Write the scanner's files to a snapshot, returning size statistics."""
+    blobs: Dict[bytes, Blob] = {}
+    index = [_pack_str(scanner.root)]
+    stats = {'files': 0, 'unique': 0, 'content_bytes': 0, 'blob_bytes': 0}
+
+    tmp_path = f"{dest}.tmp"
+    with open(tmp_path, 'wb') as out:
+        out.write(b"\0" * HEADER.size)
+        for file in scanner.scan():
+            with open(file.path, 'rb') as f:
+                data = f.read()
+            digest = hashlib.blake2b(data, digest_size=16).digest()
+            blob = blobs.get(digest)
+            if blob is None:
+                stored = data
+                if compress:
+                    packed = zlib.compress(data, 6)
+                    if len(packed) < len(data):
+                        stored = packed
+                blob = blobs[digest] = Blob(out.tell(), len(stored), stored is not data)
+                out.write(stored)
+                stats['unique'] += 1
+                stats['blob_bytes'] += len(stored)
+            st = scanner.stat(file.path)
+            index.append(ENTRY.pack(st.st_mtime_ns, len(data), blob.offset, blob.length,
+                                    FLAG_COMPRESSED if blob.compressed else 0))
+            index.append(_pack_str(file.path))
+            index.append(_pack_str(file.relpath))
+            stats['files'] += 1
+            stats['content_bytes'] += len(data)
+
+        index_offset = out.tell()
+        index_data = b"".join(index)
+        out.write(index_data)
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, FLAG_COMPRESSED if compress else 0, stats['files'],
+                              index_offset, len(index_data)))
+    os.replace(tmp_path, dest)
+    stats['snapshot_bytes'] = os.path.getsize(dest)
+    return stats
+
+
+class SnapshotScanner(CorpusScanner):
+    """Serve a snapshot's files through the CorpusScanner interface.
+
+    Paths are the ones recorded when the snapshot was taken, so packaged
+    output matches packaging the original directory.
+    """
+
+    def __init__(self, path: str):
+        self.snapshot_path = path
+        with open(path, 'rb') as f:
+            self._data: Union[bytes, mmap.mmap] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.flags, count, index_offset, index_size = HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a corpus snapshot")
+
+        pos = index_offset
+        root, pos = self._unpack_str(pos)
+        super().__init__(root)
+        self._blobs: Dict[str, Blob] = {}
+        self._snapshot_stats: Dict[str, SnapshotStat] = {}
+        files: List[CorpusFile] = []
+        for _ in range(count):
+            mtime_ns, size, offset, length, flags = ENTRY.unpack_from(self._data, pos)
+            file_path, pos = self._unpack_str(pos + ENTRY.size)
+            relpath, pos = self._unpack_str(pos)
+            files.append(CorpusFile(file_path, relpath, size, mtime_ns))
+            self._blobs[file_path] = Blob(offset, length, bool(flags & FLAG_COMPRESSED))
+            self._snapshot_stats[file_path] = SnapshotStat(size, mtime_ns)
+        self._files = files
+
+    def _unpack_str(self, pos: int) -> Tuple[str, int]:
+        (length,) = LENGTH.unpack_from(self._data, pos)
+        start = pos + LENGTH.size
+        return str(self._data[start:start + length], 'utf-8'), start + length
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def scan(self, refresh: bool = False) -> List[CorpusFile]:
+        """Return the snapshot's file index; there is nothing to re-walk."""
+        return self._files
+
+    def stat(self, path: str) -> SnapshotStat:
+        """Return the size and mtime recorded for path."""
+        return self._snapshot_stats[path]
+
+    def read_bytes(self, path: str) -> Union[memoryview, bytes]:
+        """Return a file's bytes; a zero-copy memoryview unless compressed."""
+        blob = self._blobs[path]
+        view = memoryview(self._data)[blob.offset:blob.offset + blob.length]
+        return zlib.decompress(view) if blob.compressed else view
+
+    def read(self, path: str) -> str:
+        """Read a file as text, with the newline translation of open(path, 'r')."""
+        text = str(self.read_bytes(path), 'utf-8')
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create or inspect corpus snapshots.")
+    parser.add_argument('command', choices=['create', 'list'])
+    parser.add_argument('source', help="Corpus directory (create) or snapshot (list)")
+    parser.add_argument('dest', nargs='?', help="Snapshot file to write for create")
+    parser.add_argument('--compress', action='store_true', help="zlib-compress blobs")
+    args = parser.parse_args()
+
+    if args.command == 'create':
+        if not args.dest:
+            parser.error("create needs a destination snapshot path")
+        stats = write_snapshot(get_scanner(args.source), args.dest, args.compress)
+        print(f"{stats['files']} files ({stats['unique']} unique), "
+              f"{stats['content_bytes']} bytes -> {stats['snapshot_bytes']} bytes")
+    else:
+        with SnapshotScanner(args.source) as scanner:
+            for file in scanner.scan():
+                print(f"{file.path}\t{file.size}")
+
+
+if __name__ == "__main__":
+    main()
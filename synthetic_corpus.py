@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic corpus generator for packaging benchmarks.
+
+Generates N source files with a configurable size distribution, language
+mix and directory depth. The same seed and parameters always produce the
+same tree, so benchmark results are comparable across commits.
+"""
+
+import argparse
+import math
+import os
+import random
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Tuple
+
+TEMPLATES = {
+    'py': (
+        "def {name}(values):\n"
+        "    # Accumulate a running total\n"
+        "    total = 0\n"
+        "    for i in range(len(values)):\n"
+        "        total += values[i] * {k}\n"
+        "    return total\n\n"
+    ),
+    'js': (
+        "function {name}(values) {{\n"
+        "    // Accumulate a running total\n"
+        "    let total = 0;\n"
+        "    for (let i = 0; i < values.length; i++) {{\n"
+        "        total += values[i] * {k};\n"
+        "    }}\n"
+        "    return total;\n"
+        "}}\n\n"
+    ),
+    'scm': (
+        "(define ({name} values)\n"
+        "  ; Accumulate a running total\n"
+        "  (if (null? values)\n"
+        "      0\n"
+        "      (+ (* (car values) {k}) ({name} (cdr values)))))\n\n"
+    ),
+}
+
+
+@dataclass
+class CorpusSpec:
+    files: int = 1000
+    median_size: int = 2048          # Median file size in bytes
+    size_sigma: float = 1.0          # Log-normal spread of file sizes (0 = fixed)
+    max_size: int = 1024 * 1024
+    languages: Dict[str, float] = field(
+        default_factory=lambda: {'py': 0.5, 'js': 0.3, 'scm': 0.2})
+    depth: int = 3                   # Directory levels below the root
+    fanout: int = 16                 # Subdirectories per level
+    seed: int = 0
+
+
+def _pick_language(rng: random.Random, languages: Dict[str, float]) -> str:
+    names = sorted(languages)
+    return rng.choices(names, weights=[languages[n] for n in names])[0]
+
+
+def _file_size(rng: random.Random, spec: CorpusSpec) -> int:
+    if spec.size_sigma <= 0:
+        return spec.median_size
+    size = int(rng.lognormvariate(math.log(spec.median_size), spec.size_sigma))
+    return max(64, min(size, spec.max_size))
+
+
+def render_file(rng: random.Random, ext: str, size: int) -> str:
+    """Render roughly size bytes of plausible source in the given language."""
+    template = TEMPLATES[ext]
+    parts = []
+    written = 0
+    index = 0
+    while written < size:
+        block = template.format(name=f"f{index}_{rng.randrange(1 << 20):x}",
+                                k=rng.randrange(1, 100))
+        parts.append(block)
+        written += len(block)
+        index += 1
+    return "".join(parts)
+
+
+def iter_files(spec: CorpusSpec) -> Iterator[Tuple[str, str]]:
+    """Yield (relative path, content) for every file in the corpus."""
+    rng = random.Random(spec.seed)
+    for i in range(spec.files):
+        ext = _pick_language(rng, spec.languages)
+        dirs = [f"d{rng.randrange(spec.fanout):02d}"
+                for _ in range(rng.randint(0, spec.depth))]
+        relpath = "/".join(dirs + [f"file_{i:07d}.{ext}"])
+        yield relpath, render_file(rng, ext, _file_size(rng, spec))
+
+
+def generate(dest: str, spec: CorpusSpec) -> Tuple[int, int]:
+    """Write the corpus below dest, returning (files, bytes) written."""
+    count = 0
+    total = 0
+    made = set()
+    for relpath, content in iter_files(spec):
+        target = os.path.join(dest, relpath)
+        directory = os.path.dirname(target)
+        if directory not in made:
+            os.makedirs(directory, exist_ok=True)
+            made.add(directory)
+        with open(target, 'w') as f:
+            f.write(content)
+        count += 1
+        total += len(content)
+    return count, total
+
+
+def parse_languages(value: str) -> Dict[str, float]:
+    """Parse a mix such as 'py=5,js=3,scm=2'."""
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name not in TEMPLATES:
+            raise argparse.ArgumentTypeError(f"Unsupported language: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic code corpus.")
+    parser.add_argument('dest')
+    parser.add_argument('--files', type=int, default=1000)
+    parser.add_argument('--median-size', type=int, default=2048)
+    parser.add_argument('--size-sigma', type=float, default=1.0)
+    parser.add_argument('--languages', type=parse_languages, default=None)
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--fanout', type=int, default=16)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    spec = CorpusSpec(files=args.files, median_size=args.median_size,
+                      size_sigma=args.size_sigma, depth=args.depth,
+                      fanout=args.fanout, seed=args.seed)
+    if args.languages:
+        spec.languages = args.languages
+    count, total = generate(args.dest, spec)
+    print(f"Generated {count} files ({total / 1e6:.1f} MB) in {args.dest}")
+
+
+if __name__ == "__main__":
+    main()
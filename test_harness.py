@@ -3,14 +3,31 @@
 Test harness for code review format evaluation.
 """
 
-import subprocess
 import json
 import time
-from dataclasses import dataclass
-from typing import Dict, List, Any, Tuple
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Any, Callable, Tuple, IO, Iterator, Optional, Set
 import tempfile
 import os
 
+import packagers
+from corpus import get_scanner
+from fix_verifier import FixCheck, FixVerifier
+from fragment_cache import get_fragment_cache
+from minify import MinifiedScanner, TokenSavings, token_savings
+from multi_render import RenderedCorpus, get_rendered
+from executor import MatrixCell, MatrixExecutor
+from ollama_client import (DEFAULT_URL, ChatResult, OllamaClient, OllamaError,
+                           OllamaHTTPError, OllamaTimeout)
+from results_store import ResultsStore, new_run_id
+from response_parser import Finding, StreamingReviewParser
+from response_cache import ResponseCache, cache_key
+from scoring import Hit, get_scorer
+from sharding import merge_chat_results, plan_shards
+from timeouts import AdaptiveTimeouts, RetryPolicy, iter_histogram_report, stretch
+from tokens import get_counter
+from tracing import NULL_TRACER, Tracer
+
 @dataclass
 class TestResult:
     format_name: str
@@ -18,9 +35,25 @@ class TestResult:
     bugs_identified: int
     fixes_correct: int
     execution_time: float
-    token_efficiency: float
+    token_efficiency: float      # Packed tokens / original content tokens
     success_rate: float
     raw_response: str
+    queue_time: float = 0.0      # Seconds the cell waited before dispatch
+    service_time: float = 0.0    # Seconds the cell spent running
+    time_to_first_token: Optional[float] = None  # Seconds until first streamed token
+    tokens_per_second: float = 0.0               # Decode throughput
+    total_time: float = 0.0                      # Total model request time
+    cached: bool = False                         # Response served from cache
+    keyword_hits: List[Hit] = field(default_factory=list)  # Scored hits by file section
+    shards: int = 1                              # Prompts the corpus was split into
+    fix_checks: List[FixCheck] = field(default_factory=list)  # Executed proposed fixes
+    fixes_verified: int = 0                      # Proposed fixes that passed their oracle
+    load_time: float = 0.0                       # Seconds Ollama spent loading the model
+    packaging_time: float = 0.0                  # Seconds spent packaging the corpus
+    inference_time: float = 0.0                  # Model request time excluding load_time
+    findings: List[Finding] = field(default_factory=list)  # Parsed [File:]/Bug:/Fix: entries
+    stopped_early: bool = False                  # Generation stopped once all bugs were reported
+    attempts: int = 1                            # Model requests sent, including retries
 
 class FormatTester:
     FORMATS = {
@@ -53,83 +86,22 @@ class FormatTester:
         'llama3.1:latest'
     ]
 
-    def __init__(self, corpus_path: str):
-        self.corpus_path = corpus_path
-        self.results: Dict[str, Dict[str, TestResult]] = {}
-
-    def _format_with_find(self, options: Dict = None) -> str:
-        """Format using find command."""
-        cmd = (f'find {self.corpus_path} -type f '
-               '\\( -name "*.py" -o -name "*.js" -o -name "*.scm" \\) '
-               '-exec sh -c \'echo "### FILE: $1"; cat "$1"; echo "### END"\' '
-               'sh {} \\;')
-        return subprocess.run(cmd, shell=True, capture_output=True, text=True).stdout
-
-    def _format_with_files_to_prompt(self, options: Dict = None) -> str:
-        """Format using files-to-prompt."""
-        cmd = ['files-to-prompt', self.corpus_path]
-        if isinstance(options, dict) and options.get('cxml'):
-            cmd.append('-cxml')
-        return subprocess.run(cmd, capture_output=True, text=True).stdout
-
-    def _package_with_markdown(self, options: Dict = None) -> str:
-        """Package corpus using Markdown format."""
-        output = "# Code Review Archive\n\n"
-        
-        cmd = (f'find {self.corpus_path} -type f '
-               '\\( -name "*.py" -o -name "*.js" -o -name "*.scm" \\)')
-        files = subprocess.run(cmd, shell=True, capture_output=True,
-                             text=True).stdout.strip().split('\n')
-        
-        for file in files:
-            if not file:
-                continue
-            filename = file.split('/')[-1]
-            ext = filename.split('.')[-1] if '.' in filename else "text"
-            
-            output += f"## {filename}\n\n"
-            output += f"Language: {ext}\n"
-            output += f"Path: {file}\n\n"
-            
-            with open(file, 'r') as f:
-                content = f.read()
-                
-            output += f"```{ext}\n{content}\n```\n\n"
-            
-        return output
-
-    def _package_with_org_archive(self, options: Dict = None) -> str:
-        """Package corpus using Org archive format."""
-        output = "#+TITLE: Code Review Archive\n"
-        output += "#+PROPERTY: header-args :tangle yes :mkdirp yes\n\n"
-        
-        cmd = (f'find {self.corpus_path} -type f '
-               '\\( -name "*.py" -o -name "*.js" -o -name "*.scm" \\)')
-        files = subprocess.run(cmd, shell=True, capture_output=True,
-                             text=True).stdout.strip().split('\n')
-        
-        for file in files:
-            if not file:
-                continue
-            filename = file.split('/')[-1]
-            ext = filename.split('.')[-1] if '.' in filename else "text"
-            
-            output += f"* {filename}\n"
-            output += f"#+BEGIN_SRC {ext} :tangle {file}\n"
-            with open(file, 'r') as f:
-                output += f.read()
-            output += "\n#+END_SRC\n\n"
-            
-        return output
+    # Context window (num_ctx) each model is run with, in tokens
+    CONTEXT_WINDOWS = {
+        'phi3:latest': 4096,
+        'hf.co/MaziyarPanahi/Qwen2.5-7B-Instruct-abliterated-v2-GGUF:Q5_K_M': 8192,
+        'llama3.2:latest': 8192,
+        'zephyr:latest': 8192,
+        'llama3.1:latest': 8192
+    }
+    DEFAULT_CONTEXT_WINDOW = 4096
+    PREVIEW_CHARS = 500          # Response characters shown in reports
+    RESPONSE_TOKENS = 2048       # Context reserved for the model's answer
+    # Every harness format, rendered together in one pass over the corpus
+    RENDER_FORMATS = ('find', 'files-to-prompt', 'files-to-prompt-cxml', 'markdown', 'org')
+    KEEP_ALIVE = "10m"           # How long Ollama keeps a model loaded between requests
 
-    def _get_ollama_response(self, model: str, prompt: str) -> Tuple[str, float]:
-        """Get response from Ollama model using direct curl API calls."""
-        start_time = time.time()
-        
-        # Prepare a focused code review prompt
-        system_prompt = {
-            "role": "system",
-            "content": """You are a code review assistant specialized in finding bugs and suggesting fixes.
+    SYSTEM_PROMPT = """You are a code review assistant specialized in finding bugs and suggesting fixes.
 For each file:
 1. Identify specific bugs and issues
 2. Provide line numbers for each issue
@@ -140,82 +112,344 @@ Format your response as:
 - Bug: description (line X) [severity]
   Fix: specific solution
 Ensure all suggestions maintain the original code's intent."""
+    USER_PREAMBLE = "Review this code for bugs and suggest fixes:\n\n"
+
+    def __init__(self, corpus_path: str, ollama_url: str = DEFAULT_URL,
+                 stream: bool = True, timeout: float = 30.0,
+                 cache_path: Optional[str] = None,
+                 cache_mode: str = 'use',
+                 tokenizer_path: Optional[str] = None,
+                 fragment_cache_path: Optional[str] = None,
+                 tracer: Optional[Tracer] = None,
+                 results_path: Optional[str] = None,
+                 verifier: Optional[FixVerifier] = None,
+                 read_workers: int = 0,
+                 early_stop: bool = False,
+                 minify: bool = False,
+                 adaptive_timeout: bool = True,
+                 max_retries: int = 2):
+        self.corpus_path = corpus_path
+        self.minify = minify               # Package comment- and blank-stripped sources
+        self.early_stop = early_stop       # Stop streaming once every expected bug is reported
+        self.read_workers = read_workers   # Threads reading/rendering files; 0 reads sequentially
+        self.token_counter = get_counter(tokenizer_path)
+        self.scorer = get_scorer()
+        self.fragment_cache = get_fragment_cache(fragment_cache_path)
+        # Opt-in (e.g. response_cache.DEFAULT_CACHE_PATH); hits are reported as cached
+        self.cache = ResponseCache(cache_path, mode=cache_mode) if cache_path else None
+        self.client = OllamaClient(ollama_url, timeout=timeout)
+        self.tracer = tracer or NULL_TRACER
+        self.client.tracer = self.tracer
+        self.stream = stream
+        self.timeout = timeout
+        # Per-request deadlines from observed throughput (timeout until a model is observed)
+        self.timeouts = AdaptiveTimeouts(default_timeout=timeout, adaptive=adaptive_timeout)
+        self.retry = RetryPolicy(max_retries=max_retries)
+        self.source_scanner = get_scanner(corpus_path)
+        self.scanner = MinifiedScanner(self.source_scanner) if minify else self.source_scanner
+        self.results: Dict[str, Dict[str, TestResult]] = {}
+        self.store = ResultsStore(results_path) if results_path else None
+        self.run_id: Optional[str] = None
+        self.verifier = verifier
+        self.load_times: Dict[str, float] = {}
+        self.resident: Set[str] = set()    # Warmed up and not unloaded since
+
+    def _stream_with_find(self, options: Dict = None) -> Iterator[str]:
+        """Stream corpus in the `find -exec cat` layout."""
+        return packagers.iter_find(self.scanner, self.fragment_cache, self.read_workers)
+
+    def _stream_with_files_to_prompt(self, options: Dict = None) -> Iterator[str]:
+        """Stream corpus in the files-to-prompt layout, rendered in-process."""
+        return packagers.iter_files_to_prompt(self.scanner, self._is_cxml(options),
+                                             self.fragment_cache, self.read_workers)
+
+    @staticmethod
+    def _is_cxml(options: Any) -> bool:
+        """FORMATS spells the cxml option as its CLI flag; callers may pass a dict."""
+        return options == '-cxml' or (isinstance(options, dict) and bool(options.get('cxml')))
+
+    def _stream_with_markdown(self, options: Dict = None) -> Iterator[str]:
+        """Stream corpus using Markdown format."""
+        return packagers.iter_markdown(self.scanner, cache=self.fragment_cache,
+                                       workers=self.read_workers)
+
+    def _stream_with_org_archive(self, options: Dict = None) -> Iterator[str]:
+        """Stream corpus using Org archive format."""
+        return packagers.iter_org_archive(self.scanner, self.fragment_cache, self.read_workers)
+
+    def iter_format(self, format_name: str, options: Dict = None) -> Iterator[str]:
+        """Stream the corpus packaged in the given format as text chunks."""
+        stream_funcs = {
+            'find': self._stream_with_find,
+            'files-to-prompt': self._stream_with_files_to_prompt,
+            'org': self._stream_with_org_archive,
+            'markdown': self._stream_with_markdown
         }
-        
-        data = {
+        return stream_funcs[format_name](options)
+
+    def write_format(self, format_name: str, fp: IO[str],
+                     options: Dict = None) -> int:
+        """Stream the packaged corpus into a file-like object."""
+        return packagers.write_chunks(self.iter_format(format_name, options), fp)
+
+    def _rendered(self) -> RenderedCorpus:
+        """Every format of the current corpus state, rendered in one memoized pass.
+
+        Fragments go through the fragment cache, so a new process only reads
+        files that changed. A test takes one rendering and passes it down, so
+        packaging, sharding and token efficiency all see the same scan.
+        """
+        return get_rendered(self.scanner, self.RENDER_FORMATS, self.token_counter,
+                            self.read_workers, self.fragment_cache)
+
+    def token_savings(self) -> Dict[str, TokenSavings]:
+        """Per-format tokens saved by minification (empty when not minifying)."""
+        if not self.minify:
+            return {}
+        return token_savings(self.source_scanner, self.scanner, self.RENDER_FORMATS,
+                             self.token_counter, self.read_workers, self.fragment_cache)
+
+    def _render_key(self, format_name: str, options: Any = None) -> str:
+        if format_name == 'files-to-prompt' and self._is_cxml(options):
+            return 'files-to-prompt-cxml'
+        return format_name
+
+    def _format_with_find(self, options: Dict = None,
+                          rendered: Optional[RenderedCorpus] = None) -> str:
+        """Format in the `find -exec cat` layout."""
+        return (rendered or self._rendered()).text('find')
+
+    def _format_with_files_to_prompt(self, options: Dict = None,
+                                     rendered: Optional[RenderedCorpus] = None) -> str:
+        """Format in the files-to-prompt default or cxml layout."""
+        return (rendered or self._rendered()).text(self._render_key('files-to-prompt', options))
+
+    def _package_with_markdown(self, options: Dict = None,
+                               rendered: Optional[RenderedCorpus] = None) -> str:
+        """Package corpus using Markdown format."""
+        return (rendered or self._rendered()).text('markdown')
+
+    def _package_with_org_archive(self, options: Dict = None,
+                                  rendered: Optional[RenderedCorpus] = None) -> str:
+        """Package corpus using Org archive format."""
+        return (rendered or self._rendered()).text('org')
+
+    def _build_chat_request(self, model: str, prompt: str) -> Dict[str, Any]:
+        """Build the /api/chat payload for a code review request.
+
+        The system prompt, preamble and options are identical for every
+        format of a model, so the prompt prefix stays cacheable and a
+        changed num_ctx never forces a reload between cells.
+        """
+        return {
             "model": model,
+            "keep_alive": self.KEEP_ALIVE,
             "messages": [
-                system_prompt,
+                {"role": "system", "content": self.SYSTEM_PROMPT},
                 {
                     "role": "user",
-                    "content": f"Review this code for bugs and suggest fixes:\n\n{prompt}"
+                    "content": f"{self.USER_PREAMBLE}{prompt}"
                 }
             ],
-            "stream": False,
             "options": {
                 "temperature": 0.3,  # Lower temperature for more focused analysis
                 "top_p": 0.9,        # Maintain some creativity while being precise
-                "max_tokens": 2048   # Allow for detailed analysis
+                "max_tokens": self.RESPONSE_TOKENS,  # Allow for detailed analysis
+                "num_ctx": self.context_window(model)
             }
         }
-        
-        # Use heredoc to handle JSON properly
-        curl_cmd = f"""curl -s -X POST http://localhost:11434/api/chat -d '{json.dumps(data)}'"""
-        
+
+    def context_window(self, model: str) -> int:
+        """Return the context window a model is run with."""
+        return self.CONTEXT_WINDOWS.get(model, self.DEFAULT_CONTEXT_WINDOW)
+
+    def _shard_prompts(self, model: str, format_name: str, options: Dict,
+                       formatted_code: str, rendered: RenderedCorpus) -> List[str]:
+        """Split the packed corpus into prompts that fit the model's context window."""
+        counter = self.token_counter
+        budget = (self.context_window(model) - self.RESPONSE_TOKENS
+                  - counter.count(self.SYSTEM_PROMPT) - counter.count(self.USER_PREAMBLE))
+        key = self._render_key(format_name, options)
+        if rendered.stats[key].tokens <= budget:
+            return [formatted_code]
+
+        header, footer = rendered.header(key), rendered.footer(key)
+        fragments = dict(zip(rendered.paths, rendered.fragments[key]))
+        budget -= counter.count(header) + counter.count(footer)
+        plan = plan_shards(list(zip(rendered.paths, rendered.fragment_tokens[key])), budget)
+        return [header + "".join(fragments[path] for path in paths) + footer
+                for paths in plan]
+
+    def _warmup(self, model: str) -> float:
+        """Load a model before its cells are timed, returning the load time."""
+        options = self._build_chat_request(model, "")["options"]
+        with self.tracer.span('warmup', model=model):
+            try:
+                result = self.client.load(model, self.KEEP_ALIVE, options, self.timeout)
+            except OllamaError as e:
+                print(f"Error warming up {model}: {e}")
+                return 0.0
+        self.load_times[model] = result.load_time or result.total_time
+        self.resident.add(model)
+        self.timeouts.observe_load(model, self.load_times[model])
+        return self.load_times[model]
+
+    def _unload(self, model: str):
+        """Unload a model once its cells are done so the next one loads cleanly."""
         try:
-            response = subprocess.run(
-                curl_cmd,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=30  # Add timeout to prevent hanging
-            )
-            
-            if response.returncode != 0:
-                print(f"Error calling Ollama API: {response.stderr}")
-                return f"Error: API call failed - {response.stderr}", time.time() - start_time
-            
+            self.client.load(model, 0, timeout=self.timeout)
+        except OllamaError as e:
+            print(f"Error unloading {model}: {e}")
+            return
+        # Later requests pay the reload, so their deadlines must include it
+        self.resident.discard(model)
+
+    def _chat_sharded(self, model: str, prompts: List[str],
+                      parser: Optional[StreamingReviewParser] = None) -> ChatResult:
+        """Send each shard and merge the responses into one result.
+
+        With a parser, streamed text is parsed as it arrives (responses that
+        were not streamed, e.g. cache hits, are fed whole); with early_stop,
+        generation and the remaining shards are skipped once it is done. If a
+        shard fails the parser is rebuilt from the merged content, so its hits
+        and findings match what the result actually holds.
+        """
+        def on_chunk(text: str) -> bool:
+            return parser.feed(text) and self.early_stop
+
+        results = []
+        for prompt in prompts:
+            if parser is None:
+                results.append(self._chat(model, prompt))
+                continue
+            if self.early_stop and parser.done:
+                break
+            if results:
+                parser.feed("\n\n")    # merge_chat_results joins shards this way
+            fed = parser.chars_fed
+            result = self._chat(model, prompt, on_chunk)
+            if parser.chars_fed == fed:
+                parser.feed(result.content)
+            results.append(result)
+        merged = merge_chat_results(results)
+        if parser is not None:
+            if merged.failed:
+                # Text streamed before a failure is not in the result, so it must not score
+                parser.reset()
+                parser.feed(merged.content)
+            parser.close()
+        return merged
+
+    def _chat(self, model: str, prompt: str,
+              on_chunk: Optional[Callable[[str], Optional[bool]]] = None) -> ChatResult:
+        """Send a code review request, folding API failures into an error result."""
+        with self.tracer.span('infer', model=model, prompt_chars=len(prompt)) as span:
+            result = self._chat_untraced(model, prompt, on_chunk)
+            span.attrs['cached'] = result.cached
+            return result
+
+    def _chat_untraced(self, model: str, prompt: str,
+                       on_chunk: Optional[Callable[[str], Optional[bool]]] = None) -> ChatResult:
+        start_time = time.perf_counter()
+        request = self._build_chat_request(model, prompt)
+        key = None
+        if self.cache is not None:
+            key = cache_key(model, self.client.model_digest(model),
+                            self.SYSTEM_PROMPT, prompt, request['options'])
+            hit = self.cache.get(key)
+            if hit is not None:
+                # Timings are this run's lookup, not the earlier run's model call
+                return ChatResult(**dict(hit, total_time=time.perf_counter() - start_time,
+                                         time_to_first_token=None, tokens_per_second=0.0),
+                                  cached=True)
+        counter = self.token_counter
+        prompt_tokens = (counter.count(self.SYSTEM_PROMPT) + counter.count(self.USER_PREAMBLE)
+                         + counter.count(prompt))
+        deadlines = self.timeouts.deadlines(model, prompt_tokens, loaded=model in self.resident,
+                                            stream=self.stream)
+        if self.timeouts.hopeless(deadlines):
+            return ChatResult(content=(f"Error: estimated {deadlines.expected:.0f}s exceeds "
+                                       f"the {self.timeouts.max_timeout:.0f}s limit"),
+                              total_time=0.0, time_to_first_token=None,
+                              tokens=0, tokens_per_second=0.0, attempts=0, failed=True)
+
+        delivered = False
+
+        def forward(text: str) -> Optional[bool]:
+            nonlocal delivered
+            delivered = True
+            return on_chunk(text) if on_chunk is not None else None
+
+        attempt = 0
+        while True:
+            attempt += 1
+            attempt_start = time.perf_counter()
             try:
-                result = json.loads(response.stdout)
-                return result.get('response', 'No response in API result'), time.time() - start_time
-            except json.JSONDecodeError:
-                print(f"Error parsing API response: {response.stdout}")
-                return f"Error: Invalid JSON response - {response.stdout[:100]}...", time.time() - start_time
-                
-        except subprocess.TimeoutExpired:
-            return "Error: API call timed out", time.time() - start_time
-        except Exception as e:
-            return f"Error: {str(e)}", time.time() - start_time
+                result = self.client.chat(request, stream=self.stream, timeout=deadlines.total,
+                                          on_chunk=forward,
+                                          first_token_timeout=deadlines.first_token,
+                                          idle_timeout=deadlines.idle)
+                result.attempts = attempt
+                self.resident.add(model)
+                self.timeouts.record_latency(model, result.total_time)
+                self.timeouts.observe(model, result, prompt_tokens)
+                # A response cut short by early stop is not the model's full answer
+                if key is not None and not result.stopped_early:
+                    self.cache.put(key, model, {
+                        'content': result.content,
+                        'total_time': result.total_time,
+                        'time_to_first_token': result.time_to_first_token,
+                        'tokens': result.tokens,
+                        'tokens_per_second': result.tokens_per_second,
+                        'stats': result.stats,
+                    })
+                return result
+            except OllamaTimeout as e:
+                error: Exception = e
+                content = "Error: API call timed out"
+            except OllamaError as e:
+                error = e
+                content = f"Error: {e}"
+            except Exception as e:
+                error = e
+                content = f"Error: {str(e)}"
+            self.timeouts.record_latency(model, time.perf_counter() - attempt_start)
+
+            # Streamed text has already reached the caller, so a retry would repeat it
+            retryable = (isinstance(error, OllamaError) and not delivered
+                         and not (isinstance(error, OllamaHTTPError) and error.status < 500))
+            if not retryable or attempt > self.retry.max_retries:
+                break
+            if isinstance(error, OllamaTimeout):
+                deadlines = stretch(deadlines, self.retry.timeout_growth, self.timeouts.max_timeout)
+            time.sleep(self.retry.backoff(attempt))
+
+        if isinstance(error, OllamaError) and not isinstance(error, OllamaTimeout):
+            print(f"Error calling Ollama API: {error}")
+        return ChatResult(content=content,
+                          total_time=time.perf_counter() - start_time,
+                          time_to_first_token=None,
+                          tokens=0,
+                          tokens_per_second=0.0,
+                          attempts=attempt,
+                          failed=True)
+
+    def _get_ollama_response(self, model: str, prompt: str) -> Tuple[str, float]:
+        """Get response from Ollama model and the total request time."""
+        result = self._chat(model, prompt)
+        return result.content, result.total_time
 
     def _evaluate_response(self, category: str, response: str) -> Dict[str, bool]:
         """Evaluate if response correctly identifies and fixes bugs."""
-        expected_bugs = {
-            'fizzbuzz': ['off_by_one', 'range error', 'modulo'],
-            'fibonacci': ['stack overflow', 'integer overflow', 'base case'],
-            'append': ['mutation', 'reference', 'improper list']
-        }
-        
-        bugs = expected_bugs[category]
-        identified = sum(1 for bug in bugs if bug.lower() in response.lower())
-        
-        # Look for specific fix patterns
-        fixes = {
-            'fizzbuzz': ['range(1, n + 1)', 'return', 'modulo'],
-            'fibonacci': ['iterative', 'big_number', 'if n <= 1'],
-            'append': ['new_list', 'slice', 'proper_list']
-        }
-        
-        correct_fixes = sum(1 for fix in fixes[category] 
-                          if fix.lower() in response.lower())
-        
-        return {
-            'bugs_identified': identified,
-            'fixes_correct': correct_fixes,
-            'success_rate': (identified + correct_fixes) / (len(bugs) + len(fixes[category]))
-        }
+        with self.tracer.span('evaluate', category=category):
+            return self.scorer.score(response)[category]
 
     def run_test(self, model: str, format_name: str, options: Dict = None) -> TestResult:
         """Run test for specific model and format combination."""
+        with self.tracer.span('run_test', model=model, format=format_name):
+            return self._run_test(model, format_name, options)
+
+    def _run_test(self, model: str, format_name: str, options: Dict = None) -> TestResult:
         format_funcs = {
             'find': self._format_with_find,
             'files-to-prompt': self._format_with_files_to_prompt,
@@ -224,19 +458,40 @@ Ensure all suggestions maintain the original code's intent."""
         }
         
         # Format the code
-        formatted_code = format_funcs[format_name](options)
+        package_start = time.perf_counter()
+        with self.tracer.span('package', format=format_name):
+            rendered = self._rendered()
+            formatted_code = format_funcs[format_name](options, rendered)
+        packaging_time = time.perf_counter() - package_start
         
-        # Get model response
-        response, exec_time = self._get_ollama_response(model, formatted_code)
+        # Get model response, sharding the corpus if it overflows the context window
+        with self.tracer.span('shard'):
+            prompts = self._shard_prompts(model, format_name, options, formatted_code, rendered)
+        parser = StreamingReviewParser(self.scorer)
+        chat = self._chat_sharded(model, prompts, parser)
+        response, exec_time = chat.content, chat.total_time
         
-        # Calculate token efficiency (formatted / original)
-        orig_size = sum(len(open(f).read()) for f in self._get_files())
-        token_efficiency = len(formatted_code) / orig_size if orig_size > 0 else 0
+        # Calculate token efficiency (formatted / original tokens) from the render pass
+        orig_tokens = rendered.content_tokens
+        packed_tokens = rendered.stats[self._render_key(format_name, options)].tokens
+        token_efficiency = packed_tokens / orig_tokens if orig_tokens > 0 else 0
         
-        # Evaluate results for each category
-        results = []
-        for category in ['fizzbuzz', 'fibonacci', 'append']:
-            results.append(self._evaluate_response(category, response))
+        # Keyword hits were collected live by the streaming parser
+        with self.tracer.span('evaluate'):
+            hits = parser.hits
+            results = list(self.scorer.score_hits(hits).values())
+        
+        # Reported lines refer to the minified sources; map them back, and
+        # drop lines that cannot be mapped rather than keep minified coordinates
+        if self.minify:
+            for finding in parser.findings:
+                finding.line = self.scanner.original_line(finding.file, finding.line)
+        
+        # Execute proposed fixes against the reference oracles
+        fix_checks: List[FixCheck] = []
+        if self.verifier is not None:
+            with self.tracer.span('verify'):
+                fix_checks = self.verifier.verify(response)
         
         # Average the results
         avg_bugs = sum(r['bugs_identified'] for r in results) / len(results)
@@ -251,61 +506,206 @@ Ensure all suggestions maintain the original code's intent."""
             execution_time=exec_time,
             token_efficiency=token_efficiency,
             success_rate=avg_success,
-            raw_response=response
+            raw_response=response,
+            time_to_first_token=chat.time_to_first_token,
+            tokens_per_second=chat.tokens_per_second,
+            total_time=chat.total_time,
+            cached=chat.cached,
+            keyword_hits=hits,
+            shards=len(prompts),
+            fix_checks=fix_checks,
+            fixes_verified=sum(check.passed for check in fix_checks),
+            load_time=0.0 if chat.cached else chat.load_time,
+            packaging_time=packaging_time,
+            inference_time=exec_time - (0.0 if chat.cached else chat.load_time),
+            findings=parser.findings,
+            stopped_early=chat.stopped_early,
+            attempts=chat.attempts
         )
 
     def _get_files(self) -> List[str]:
         """Get list of test files."""
-        cmd = (f'find {self.corpus_path} -type f '
-               '\\( -name "*.py" -o -name "*.js" -o -name "*.scm" \\)')
-        return subprocess.run(cmd, shell=True, capture_output=True, 
-                            text=True).stdout.strip().split('\n')
-
-    def run_all_tests(self):
-        """Run tests for all model and format combinations."""
-        for model in self.MODELS:
-            self.results[model] = {}
-            for format_name, format_config in self.FORMATS.items():
-                for option_name, option in format_config['options'].items():
-                    test_id = f"{format_name}_{option_name}"
-                    self.results[model][test_id] = self.run_test(
-                        model, format_name, option
-                    )
+        return self.scanner.paths()
 
-    def generate_report(self) -> str:
-        """Generate markdown report of test results."""
-        report = ["# Code Review Format Test Results\n"]
+    def _matrix_cells(self) -> List[MatrixCell]:
+        """List every model/format/option cell in report order."""
+        return [
+            MatrixCell(model, format_name, option_name, option)
+            for model in self.MODELS
+            for format_name, format_config in self.FORMATS.items()
+            for option_name, option in format_config['options'].items()
+        ]
+
+    def run_all_tests(self, max_workers: int = 4, per_model_limit: int = 1,
+                      model_limits: Dict[str, int] = None,
+                      run_id: Optional[str] = None, resume: bool = False,
+                      max_models: Optional[int] = 1, warmup: bool = True):
+        """Run tests for all model and format combinations concurrently.
+
+        Cells are grouped by model with at most max_models loaded at once
+        (None interleaves models freely); with warmup each model is loaded
+        before its first cell is timed and unloaded after its last. By
+        default a model runs one cell at a time, so execution_time and
+        latency measure each request alone: Ollama usually serves a model's
+        requests one after another. per_model_limit > 1 overlaps a model's
+        cells (opt-in), and each cell's timings then include waiting behind
+        its siblings. Only completed cells are added to self.results, which
+        is left in matrix order.
+
+        With a results store each result is persisted as soon as it is
+        produced; resume=True skips cells already recorded for run_id (or
+        the most recent run).
+        """
+        cells = self._matrix_cells()
+        positions = self._matrix_positions()
+        if self.store is not None:
+            self.run_id = run_id or (self.store.latest_run() if resume else None) or new_run_id()
+            if resume:
+                done = self.store.completed_cells(self.run_id)
+                cells = [cell for cell in cells if (cell.model, cell.test_id) not in done]
+        executor = MatrixExecutor(max_workers, per_model_limit, model_limits, max_models)
+        def run_cell(cell: MatrixCell) -> TestResult:
+            return self.run_test(cell.model, cell.format_name, cell.option)
+
+        on_start = self._warmup if warmup else None
+        on_done = self._unload if warmup and max_models is not None else None
+        try:
+            for cell, result, timing in executor.run(cells, run_cell, on_start, on_done):
+                result.queue_time = timing.queue_time
+                result.service_time = timing.service_time
+                self._record(cell.model, cell.test_id, result,
+                             positions[(cell.model, cell.test_id)])
+        finally:
+            self._sort_results()
+
+    def _matrix_positions(self) -> Dict[Tuple[str, str], int]:
+        """Map each (model, test_id) cell to its index in report order."""
+        return {(cell.model, cell.test_id): i for i, cell in enumerate(self._matrix_cells())}
+
+    def _sort_results(self):
+        """Put results back in matrix order, as a sequential run leaves them."""
+        position = self._matrix_positions()
+        last = len(position)
+
+        def first(model: str) -> int:
+            return min((position.get((model, test_id), last) for test_id in self.results[model]),
+                       default=last)
+
+        self.results = {
+            model: dict(sorted(self.results[model].items(),
+                               key=lambda item: position.get((model, item[0]), last)))
+            for model in sorted(self.results, key=first)
+        }
+
+    def _record(self, model: str, test_id: str, result: TestResult,
+                position: Optional[int] = None):
+        """Keep a finished result, persisting it first when a store is configured.
+
+        Stored results keep only the report preview of raw_response in
+        memory; the full text lives (compressed, deduplicated) in the store.
+        """
+        if self.store is not None:
+            self.store.add_result(self.run_id, model, test_id, asdict(result), position)
+            result.raw_response = result.raw_response[:self.PREVIEW_CHARS]
+        self.results.setdefault(model, {})[test_id] = result
+
+    def _report_cells(self) -> Iterator[Tuple[str, str, Dict[str, Any], Callable[[], str]]]:
+        """Yield (model, format_id, fields, preview) from the store or memory."""
+        if self.store is not None:
+            for row in self.store.iter_latest(self.run_id):
+                fields = json.loads(row['data'])
+                digest = row['response_hash']
+                yield (row['model'], row['test_id'], fields,
+                       lambda digest=digest: self.store.response(digest)[:self.PREVIEW_CHARS])
+            return
+        for model, format_results in self.results.items():
+            for format_id, result in format_results.items():
+                yield (model, format_id, asdict(result),
+                       lambda result=result: result.raw_response[:self.PREVIEW_CHARS])
+
+    def _report_summary(self) -> Iterator[Dict[str, Any]]:
+        if self.store is not None:
+            for row in self.store.iter_summary(self.run_id):
+                yield dict(row)
+            return
+        for model, format_id, fields, _ in self._report_cells():
+            yield dict(fields, model=model, test_id=format_id)
+
+    def iter_report(self) -> Iterator[str]:
+        """Render the markdown report line by line."""
+        yield "# Code Review Format Test Results\n"
         
         # Add summary table
-        report.append("## Summary\n")
-        report.append("| Format | Model | Success Rate | Token Efficiency | Avg Time |")
-        report.append("|--------|-------|--------------|-----------------|----------|")
+        yield "## Summary\n"
+        yield "| Format | Model | Success Rate | Token Efficiency | Avg Time | Queue | Service |"
+        yield "|--------|-------|--------------|-----------------|----------|-------|---------|"
         
-        for model, format_results in self.results.items():
-            for format_id, result in format_results.items():
-                report.append(
-                    f"| {format_id} | {model} | "
-                    f"{result.success_rate:.1%} | "
-                    f"{result.token_efficiency:.1%} | "
-                    f"{result.execution_time:.1f}s |"
-                )
+        for row in self._report_summary():
+            hits, trials = row.get('cached') or 0, row.get('trials') or 1
+            cached = ("" if not hits else " (cached)" if hits >= trials
+                      else f" ({hits}/{trials} cached)")
+            yield (
+                f"| {row['test_id']}{cached} | {row['model']} | "
+                f"{row['success_rate']:.1%} | "
+                f"{row['token_efficiency']:.1%} | "
+                f"{row['execution_time']:.1f}s | "
+                f"{row['queue_time']:.1f}s | "
+                f"{row['service_time']:.1f}s |"
+            )
         
-        # Add detailed results
-        report.append("\n## Detailed Results\n")
-        for model, format_results in self.results.items():
-            report.append(f"\n### {model}\n")
-            for format_id, result in format_results.items():
-                report.append(f"\n#### {format_id}\n")
-                report.append(f"- Bugs Identified: {result.bugs_identified}")
-                report.append(f"- Correct Fixes: {result.fixes_correct}")
-                report.append(f"- Token Efficiency: {result.token_efficiency:.1%}")
-                report.append(f"- Execution Time: {result.execution_time:.1f}s")
-                report.append("\nResponse Preview:")
-                report.append("```")
-                report.append(result.raw_response[:500] + "...")
-                report.append("```")
+        if self.load_times:
+            yield "\n## Model Loads\n"
+            yield "| Model | Warmup Load Time |"
+            yield "|-------|------------------|"
+            for model, load_time in self.load_times.items():
+                yield f"| {model} | {load_time:.1f}s |"
         
-        return "\n".join(report)
+        savings = self.token_savings()
+        if savings:
+            yield "\n## Minification\n"
+            yield "| Format | Original Tokens | Minified Tokens | Saved |"
+            yield "|--------|-----------------|-----------------|-------|"
+            for s in savings.values():
+                yield (f"| {s.format} | {s.original_tokens} | {s.minified_tokens} | "
+                       f"{s.saved} ({s.ratio:.1%}) |")
+        
+        if self.timeouts.histograms:
+            yield "\n## Request Latency\n"
+            yield from iter_histogram_report(self.timeouts.histograms)
+        
+        # Add detailed results
+        yield "\n## Detailed Results\n"
+        current_model = None
+        for model, format_id, result, preview in self._report_cells():
+            if model != current_model:
+                current_model = model
+                yield f"\n### {model}\n"
+            yield f"\n#### {format_id}\n"
+            yield f"- Bugs Identified: {result['bugs_identified']}"
+            yield f"- Correct Fixes: {result['fixes_correct']}"
+            yield f"- Token Efficiency: {result['token_efficiency']:.1%}"
+            yield f"- Execution Time: {result['execution_time']:.1f}s"
+            if result.get('cached'):
+                yield "- Response: served from cache (no model timings)"
+            if result.get('load_time'):
+                yield (f"- Model Load Time: {result['load_time']:.1f}s "
+                       f"(inference {result['inference_time']:.1f}s)")
+            if result.get('time_to_first_token') is not None:
+                yield f"- Time to First Token: {result['time_to_first_token']:.2f}s"
+            yield f"- Tokens/sec: {result.get('tokens_per_second', 0.0):.1f}"
+            if result.get('attempts', 1) != 1:
+                yield f"- Attempts: {result['attempts']}"
+            for check in result.get('fix_checks') or []:
+                status = "pass" if check['passed'] else f"fail ({check['error']})"
+                yield f"- Fix `{check['function']}`: {status} in {check['runtime'] * 1000:.1f}ms"
+            yield "\nResponse Preview:"
+            yield "```"
+            yield preview() + "..."
+            yield "```"
+
+    def generate_report(self) -> str:
+        """Generate markdown report of test results."""
+        return "\n".join(self.iter_report())
 
 if __name__ == "__main__":
     # Run a minimal test first
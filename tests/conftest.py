@@ -0,0 +1,56 @@
+"""
+Shared fixtures: the repo's flat modules on sys.path, a scratch copy of a
+corpus and fresh process-wide caches for every test.
+"""
+
+import os
+import shutil
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pytest
+
+import fragment_cache
+import multi_render
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    """Start each test without fragments or renders memoized by earlier tests."""
+    monkeypatch.setattr(fragment_cache, '_CACHES', {})
+    multi_render.clear()
+    yield
+    multi_render.clear()
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """A writable copy of the fizzbuzz corpus."""
+    root = tmp_path / 'corpus'
+    shutil.copytree(os.path.join(ROOT, 'fizzbuzz'), root / 'fizzbuzz',
+                    ignore=shutil.ignore_patterns('__pycache__'))
+    return str(root)
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    """Record the paths a scanner reads: `log = reads(scanner)`."""
+    def watch(scanner):
+        log = []
+        original = scanner.read
+        monkeypatch.setattr(scanner, 'read', lambda path: log.append(path) or original(path))
+        return log
+    return watch
+
+
+@pytest.fixture
+def fake_ollama():
+    """A fast fake Ollama server on a free port; yields (url, server)."""
+    from fake_ollama import ModelProfile, serve
+    httpd = serve(port=0, profiles={'default': ModelProfile(ttft=0.01, tokens_per_sec=5000)},
+                  background=True, seed=0)
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", httpd
+    httpd.shutdown()
+    httpd.server_close()
@@ -0,0 +1,99 @@
+"""
+Matrix executor limits, model grouping and warmup/unload ordering.
+"""
+
+import threading
+import time
+
+import pytest
+
+from executor import MatrixCell, MatrixExecutor
+
+
+def _cells(models, formats=4):
+    return [MatrixCell(model, f"fmt{i}", 'basic') for model in models for i in range(formats)]
+
+
+class Recorder:
+    """Track in-flight cells per model and the order of events."""
+
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.peak = {}
+        self.total_peak = 0
+        self.events = []
+
+    def cell(self, cell):
+        with self.lock:
+            self.in_flight[cell.model] = self.in_flight.get(cell.model, 0) + 1
+            self.peak[cell.model] = max(self.peak.get(cell.model, 0), self.in_flight[cell.model])
+            self.total_peak = max(self.total_peak, sum(self.in_flight.values()))
+            self.events.append(('cell', cell.model))
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight[cell.model] -= 1
+        return cell.test_id
+
+    def start(self, model):
+        with self.lock:
+            self.events.append(('start', model))
+        return f"warm {model}"
+
+    def done(self, model):
+        time.sleep(self.delay)
+        with self.lock:
+            self.events.append(('done', model))
+
+
+def test_every_cell_runs_once():
+    cells = _cells(['a', 'b'])
+    results = list(MatrixExecutor(max_workers=3, per_model_limit=2).run(cells, lambda c: c.test_id))
+    assert len(results) == len(cells)
+    assert {cell for cell, _, _ in results} == set(cells)
+    assert all(result == cell.test_id for cell, result, _ in results)
+    assert all(t.queue_time >= 0 and t.service_time >= 0 for _, _, t in results)
+
+
+def test_per_model_and_global_limits():
+    recorder = Recorder()
+    executor = MatrixExecutor(max_workers=3, per_model_limit=2, model_limits={'b': 1})
+    list(executor.run(_cells(['a', 'b', 'c']), recorder.cell))
+    assert recorder.peak['a'] <= 2 and recorder.peak['c'] <= 2
+    assert recorder.peak['b'] == 1
+    assert recorder.total_peak <= 3
+
+
+def test_models_run_back_to_back_with_warmup_and_unload():
+    recorder = Recorder()
+    executor = MatrixExecutor(max_workers=4, per_model_limit=2, max_models=1)
+    cells = _cells(['a', 'b'])
+    # Interleave the input: grouping must still finish one model first
+    cells = [cell for pair in zip(cells[:4], cells[4:]) for cell in pair]
+    list(executor.run(cells, recorder.cell, recorder.start, recorder.done))
+    events = recorder.events
+    assert events[0] == ('start', 'a')
+    assert events.index(('done', 'a')) < events.index(('start', 'b'))
+    assert all(model == 'a' for kind, model in events[:events.index(('done', 'a'))])
+    assert executor.warmups == {'a': 'warm a', 'b': 'warm b'}
+
+
+def test_invalid_limits():
+    with pytest.raises(ValueError):
+        MatrixExecutor(per_model_limit=0)
+    with pytest.raises(ValueError):
+        MatrixExecutor(max_models=0)
+
+
+def test_harness_records_completed_cells_in_matrix_order(corpus, fake_ollama):
+    from test_harness import FormatTester
+    url, _ = fake_ollama
+    tester = FormatTester(corpus, ollama_url=url, cache_path=None)
+    tester.MODELS = ['m1', 'm2']
+    tester.run_all_tests(max_workers=4, per_model_limit=3, max_models=None, warmup=False)
+    expected = [(cell.model, cell.test_id) for cell in tester._matrix_cells()]
+    recorded = [(model, test_id) for model, tests in tester.results.items()
+                for test_id, result in tests.items() if result is not None]
+    assert recorded == expected
+    assert sum(len(tests) for tests in tester.results.values()) == len(expected)
@@ -0,0 +1,98 @@
+"""
+Proposed fixes run against the oracles inside resource-limited workers.
+"""
+
+import mmap
+
+import pytest
+
+from fix_verifier import FixVerifier, extract_fixes
+
+GOOD = """Fixed version:
+```python
+def fizzbuzz(n):
+    for i in range(1, n + 1):
+        if i % 15 == 0:
+            print("FizzBuzz")
+        elif i % 3 == 0:
+            print("Fizz")
+        elif i % 5 == 0:
+            print("Buzz")
+        else:
+            print(i)
+
+fizzbuzz(15)
+```
+```py
+def fibonacci(n):
+    return n if n < 2 else fibonacci(n - 1) + fibonacci(n - 2)
+```
+"""
+
+ROGUE = """```python
+def append_lists(a, b):
+    while True:
+        pass
+```
+```python
+def fibonacci(n):
+    hog = [0] * (1 << 27)
+    return n
+```
+```python
+def fizzbuzz(n):
+    import os
+    return []
+```
+"""
+
+ITERATIVE = """```python
+def fibonacci(n):
+    scratch = [0] * (1 << 24)
+    a, b = 0, 1
+    for _ in range(n):
+        a, b = b, a + b
+    return a
+```"""
+
+
+@pytest.fixture
+def verifier():
+    verifier = FixVerifier(workers=2, cpu_budget=0.5, wall_budget=5.0,
+                           memory_limit=256 * 1024 * 1024)
+    yield verifier
+    verifier.close()
+
+
+def test_extract_keeps_definitions_only():
+    fixes = extract_fixes(GOOD)
+    assert sorted(fixes) == ['fibonacci', 'fizzbuzz']
+    assert 'fizzbuzz(15)' not in fixes['fizzbuzz']
+
+
+def test_fixes_are_checked_against_the_oracles(verifier):
+    good, rogue = verifier.verify_many([GOOD, ROGUE])
+    outcomes = {check.category: check for check in good}
+    assert outcomes['fizzbuzz'].passed
+    # Naive recursion cannot reach fibonacci(35) within the CPU budget
+    assert not outcomes['fibonacci'].passed
+    assert 'CPU budget' in outcomes['fibonacci'].error
+
+    errors = {check.category: check.error for check in rogue}
+    assert not any(check.passed for check in rogue)
+    assert 'CPU budget' in errors['append']
+    assert errors['fibonacci'] == 'memory limit exceeded'
+    assert 'not allowed' in errors['fizzbuzz']
+
+
+def test_memory_limit_is_headroom_over_the_worker():
+    # Reserve far more than the limit: workers forked from this process would
+    # start out over it and fail every allocation
+    ballast = mmap.mmap(-1, 2048 * 1024 * 1024)
+    verifier = FixVerifier(workers=1, memory_limit=256 * 1024 * 1024)
+    try:
+        [check] = verifier.verify(ITERATIVE)
+    finally:
+        verifier.close()
+        ballast.close()
+    assert check.passed, check.error
@@ -0,0 +1,90 @@
+"""
+Packaging passes must pick up files edited since the previous pass.
+"""
+
+import os
+
+import fragment_cache
+import format_tester
+import multi_render
+from test_harness import FormatTester
+
+EDIT = "\n# edited between package calls\n"
+
+
+def _append(corpus: str):
+    with open(os.path.join(corpus, 'fizzbuzz', 'fizzbuzz.py'), 'a') as f:
+        f.write(EDIT)
+
+
+def test_harness_stream_sees_edit(corpus):
+    tester = FormatTester(corpus, cache_path=None)
+    before = "".join(tester.iter_format('find'))
+    _append(corpus)
+    after = "".join(FormatTester(corpus, cache_path=None).iter_format('find'))
+    assert EDIT not in before
+    assert EDIT in after
+
+
+def test_format_tester_package_sees_edit(corpus):
+    before = format_tester.FormatTester(corpus, format_tool='find').package_corpus()
+    _append(corpus)
+    after = format_tester.FormatTester(corpus, format_tool='find').package_corpus()
+    assert EDIT not in before
+    assert EDIT in after
+
+
+def test_harness_rendered_archive_sees_edit(corpus):
+    tester = FormatTester(corpus, cache_path=None)
+    before = tester._format_with_find()
+    _append(corpus)
+    after = tester._format_with_find()
+    assert EDIT not in before
+    assert EDIT in after
+    assert after == "".join(tester.iter_format('find'))
+
+
+def test_rendered_archive_reuses_persisted_fragments(corpus, tmp_path, monkeypatch, reads):
+    cache_path = str(tmp_path / 'fragments.sqlite3')
+    first = FormatTester(corpus, cache_path=None, fragment_cache_path=cache_path)._package_with_org_archive()
+
+    # A fresh process: no memoized render, fragments only on disk
+    multi_render.clear()
+    monkeypatch.setattr(fragment_cache, '_CACHES', {})
+    tester = FormatTester(corpus, cache_path=None, fragment_cache_path=cache_path)
+    log = reads(tester.scanner)
+    assert tester._package_with_org_archive() == first
+    assert log == []
+
+
+def test_fragment_cache_is_bounded(corpus):
+    cache = fragment_cache.FragmentCache(max_entries=2)
+    scanner = format_tester.FormatTester(corpus).scanner
+    for fmt in ('find', 'org', 'markdown'):
+        for path in scanner.paths():
+            cache.render(fmt, scanner, path, lambda path, content: content)
+    assert len(cache) == 2
+
+
+def test_deleted_files_are_pruned(corpus, tmp_path):
+    cache_path = str(tmp_path / 'fragments.sqlite3')
+    tester = FormatTester(corpus, cache_path=None, fragment_cache_path=cache_path)
+    "".join(tester.iter_format('find'))
+    removed = os.path.join(corpus, 'fizzbuzz', 'fizzbuzz.js')
+    os.remove(removed)
+    "".join(tester.iter_format('find'))
+    assert all(path != removed for _, path in tester.fragment_cache._entries)
+    rows = tester.fragment_cache._conn().execute(
+        "SELECT COUNT(*) FROM fragments WHERE path = ?", (removed,)).fetchone()[0]
+    assert rows == 0
+
+
+def test_persisted_cache_writes_only_changed_entries(corpus, tmp_path):
+    cache_path = str(tmp_path / 'fragments.sqlite3')
+    tester = FormatTester(corpus, cache_path=None, fragment_cache_path=cache_path)
+    "".join(tester.iter_format('find'))
+    db = tester.fragment_cache._conn()
+    before = db.total_changes
+    _append(corpus)
+    "".join(tester.iter_format('find'))
+    assert db.total_changes - before == 1
@@ -0,0 +1,107 @@
+"""
+Minified sources keep their meaning and map every line back to the original.
+"""
+
+import ast
+
+from corpus import CorpusScanner
+from minify import (MinifiedScanner, minify, minify_javascript, minify_python,
+                    minify_scheme, token_savings)
+from tokens import CharRatioTokenizer, TokenCounter
+
+PYTHON = '''"""Module docstring."""
+
+import math  # Needed below
+
+
+def area(r):
+    """Area of a circle.
+
+    Spans several lines.
+    """
+    # A comment line
+    text = """keep
+    # this is not a comment
+
+    """
+    label = f"r={r}  # not a comment"
+    return math.pi * r ** 2, text, label
+
+
+class Shape:
+    "One-line docstring"
+
+    def __init__(self, sides):
+        self.sides = sides  # trailing
+'''
+
+
+def _assert_maps_back(source, result):
+    lines = source.split("\n")
+    assert len(result.line_map) == len(result.text.splitlines())
+    for number, line in enumerate(result.text.splitlines(), 1):
+        if line.strip():
+            assert line.strip() in lines[result.original_line(number) - 1]
+
+
+def _strip_docstrings(tree):
+    for node in ast.walk(tree):
+        body = getattr(node, 'body', None)
+        if (isinstance(body, list) and body and isinstance(body[0], ast.Expr)
+                and isinstance(body[0].value, ast.Constant) and isinstance(body[0].value.value, str)):
+            node.body = body[1:] or [ast.Pass()]
+    return ast.dump(tree)
+
+
+def test_python_keeps_its_meaning():
+    result = minify_python(PYTHON)
+    assert 'Needed below' not in result.text and 'trailing' not in result.text
+    assert '# this is not a comment' in result.text and '# not a comment' in result.text
+    assert 'docstring' not in result.text.lower()
+    assert _strip_docstrings(ast.parse(result.text)) == _strip_docstrings(ast.parse(PYTHON))
+    source_ns, minified_ns = {}, {}
+    exec(PYTHON, source_ns)
+    exec(result.text, minified_ns)
+    assert minified_ns['area'](2) == source_ns['area'](2)
+    _assert_maps_back(PYTHON, result)
+    assert len(result.text) < len(PYTHON)
+
+
+def test_python_that_does_not_parse_passes_through():
+    broken = "def f(:\n    # comment\n"
+    assert minify_python(broken).text == broken
+
+
+def test_javascript_keeps_strings_and_regexes():
+    source = ("// header\nconst url = 'http://example.com'; /* block\n comment */\n"
+              "const re = /a\\/\\/b/g;\n\n  const t = `multi\n\n  line`;  // done\n")
+    result = minify_javascript(source)
+    assert "'http://example.com'" in result.text and "/a\\/\\/b/g" in result.text
+    assert "`multi\n\n  line`" in result.text    # Template literals are left intact
+    assert 'header' not in result.text and 'block' not in result.text and 'done' not in result.text
+    _assert_maps_back(source, result)
+
+
+def test_scheme_keeps_character_literals():
+    source = "; leading\n(define (f x)\n  #| block |#\n  (list #\\; \"a;b\" x))  ; trailing\n"
+    result = minify_scheme(source)
+    assert '#\\;' in result.text and '"a;b"' in result.text
+    assert 'leading' not in result.text and 'trailing' not in result.text
+    _assert_maps_back(source, result)
+    assert minify('notes.txt', source).text == source
+
+
+def test_scanner_maps_reported_lines_and_saves_tokens(corpus):
+    source = CorpusScanner(corpus)
+    scanner = MinifiedScanner(source)
+    for path in scanner.paths():
+        result = scanner.minified(path)
+        _assert_maps_back(source.read(path), result)
+        relpath = next(f.relpath for f in scanner.scan() if f.path == path)
+        assert scanner.resolve(relpath) == path
+        assert scanner.original_line(relpath, 1) == result.line_map[0]
+
+    counter = TokenCounter(CharRatioTokenizer(4.0))
+    savings = token_savings(source, scanner, ('find', 'markdown-literate'), counter)
+    assert all(s.saved >= 0 for s in savings.values())
+    assert savings['markdown-literate'].saved > 0
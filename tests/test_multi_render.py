@@ -0,0 +1,80 @@
+"""
+One-pass rendering: output matches the streaming packagers, cxml fragments
+survive insertions, and renders of unrelated corpora run concurrently.
+"""
+
+import os
+import shutil
+import threading
+
+import pytest
+
+import multi_render
+from corpus import CorpusScanner
+from fragment_cache import FragmentCache
+from test_harness import FormatTester
+
+
+@pytest.mark.parametrize('format_name,options', [
+    ('find', None), ('files-to-prompt', None), ('files-to-prompt', '-cxml'),
+    ('markdown', None), ('org', None),
+])
+def test_rendered_text_matches_stream(corpus, format_name, options):
+    tester = FormatTester(corpus, cache_path=None)
+    rendered = tester._rendered()
+    streamed = "".join(tester.iter_format(format_name, options))
+    assert rendered.text(tester._render_key(format_name, options)) == streamed
+
+
+def test_insertion_keeps_cached_cxml_fragments(corpus):
+    cache = FragmentCache()
+    scanner = CorpusScanner(corpus)
+    formats = ('files-to-prompt-cxml',)
+    before = multi_render.render_all(scanner, formats, cache=cache)
+    # Sorts before every existing file, shifting all their positions
+    shutil.copy(os.path.join(corpus, 'fizzbuzz', 'fizzbuzz.py'),
+                os.path.join(corpus, 'fizzbuzz', 'aaa.py'))
+    scanner.scan(refresh=True)
+    misses = cache.misses
+    after = multi_render.render_all(scanner, formats, cache=cache)
+    assert cache.misses - misses == 1
+    assert len(cache) == len(after.paths)
+    assert after.fragments['files-to-prompt-cxml'][0].startswith('<document index="1">')
+    assert after.fragments['files-to-prompt-cxml'][1:] == [
+        fragment.replace(f'index="{i}"', f'index="{i + 1}"')
+        for i, fragment in enumerate(before.fragments['files-to-prompt-cxml'], 1)]
+
+
+def test_unrelated_corpora_render_concurrently(tmp_path, monkeypatch):
+    roots = []
+    for name in ('a', 'b'):
+        root = tmp_path / name
+        root.mkdir()
+        (root / 'x.py').write_text("x = 1\n")
+        roots.append(str(root))
+    barrier = threading.Barrier(2, timeout=5)
+    render_all = multi_render.render_all
+
+    def rendezvous(*args, **kwargs):
+        barrier.wait()      # Raises BrokenBarrierError if renders are serialized
+        return render_all(*args, **kwargs)
+
+    monkeypatch.setattr(multi_render, 'render_all', rendezvous)
+    results = []
+    threads = [threading.Thread(target=lambda root=root: results.append(
+        multi_render.get_rendered(CorpusScanner(root), ('find',))))
+        for root in roots]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 2
+
+
+def test_memo_is_bounded(tmp_path):
+    for i in range(multi_render.MAX_RENDERED + 2):
+        root = tmp_path / str(i)
+        root.mkdir()
+        (root / 'x.py').write_text(f"x = {i}\n")
+        multi_render.get_rendered(CorpusScanner(str(root)), ('find',))
+    assert len(multi_render._RENDERED) == multi_render.MAX_RENDERED
@@ -0,0 +1,74 @@
+"""
+The streaming parser agrees with the scorer, however the response is chunked.
+"""
+
+from ollama_client import ChatResult
+from response_parser import StreamingReviewParser
+from scoring import get_scorer
+from test_harness import FormatTester
+
+RESPONSE = """A modulo slip first. [File: fizzbuzz.py] has an off_by_one and a range error.
+[File: fizzbuzz.py]
+- Bug: off_by_one in the loop bounds (line 3) [medium]
+  Fix: use range(1, n + 1)
+  so that n itself is printed
+- Bug: modulo checks are ordered wrongly [Low]
+  Fix: test the modulo 15 case first
+See also [File: fib.py] for the base case problem, unlike [File: append.lisp] mutation.
+"""
+
+
+def _feed(text, size):
+    parser = StreamingReviewParser()
+    for start in range(0, len(text), size):
+        parser.feed(text[start:start + size])
+    parser.close()
+    return parser
+
+
+def test_hits_match_the_scorer_for_any_chunking():
+    expected = get_scorer().hits(RESPONSE)
+    assert {hit.section for hit in expected} == {None, 'fizzbuzz.py', 'fib.py', 'append.lisp'}
+    for size in (1, 7, 64, len(RESPONSE)):
+        parser = _feed(RESPONSE, size)
+        assert parser.hits == expected
+        assert parser.scores() == get_scorer().score(RESPONSE)
+
+
+def test_findings_follow_the_prompt_layout():
+    findings = _feed(RESPONSE, 5).findings
+    assert [(f.file, f.line, f.severity) for f in findings] == [
+        ('fizzbuzz.py', 3, 'medium'), ('fizzbuzz.py', None, 'low')]
+    assert findings[0].description == 'off_by_one in the loop bounds'
+    assert findings[0].fix == 'use range(1, n + 1)\nso that n itself is printed'
+    assert findings[1].fix == 'test the modulo 15 case first'
+
+
+def test_done_once_every_bug_has_a_fix():
+    parser = StreamingReviewParser()
+    lines = ["[File: x]\n", "- Bug: off_by_one, range error, modulo\n",
+             "  Fix: range(1, n + 1)\n"]
+    for category, bugs in get_scorer().expected_bugs.items():
+        if category != 'fizzbuzz':
+            lines.insert(1, f"- Bug: {', '.join(bugs)}\n")
+    for line in lines[:-1]:
+        assert not parser.feed(line)
+    assert parser.all_bugs_reported
+    assert parser.feed(lines[-1])
+
+
+def test_failed_stream_does_not_score(corpus):
+    harness = FormatTester(corpus)
+
+    def chat(model, prompt, on_chunk=None):
+        on_chunk("[File: fizzbuzz.py]\n- Bug: off_by_one and modulo\n")
+        return ChatResult(content="Error: API call timed out", total_time=1.0,
+                          time_to_first_token=None, tokens=0, tokens_per_second=0.0,
+                          failed=True)
+
+    harness._chat = chat
+    parser = StreamingReviewParser()
+    result = harness._chat_sharded('m', ['prompt'], parser)
+    assert result.failed
+    assert parser.hits == [] and parser.findings == []
+    assert parser.chars_fed == len(result.content)
@@ -0,0 +1,79 @@
+"""
+The results store lists cells in matrix order and keeps responses once.
+"""
+
+import sqlite3
+
+from results_store import ResultsStore, new_run_id
+
+
+def _result(success_rate, execution_time=1.0, cached=False, response="review"):
+    return {'success_rate': success_rate, 'execution_time': execution_time,
+            'token_efficiency': 0.5, 'cached': cached, 'raw_response': response}
+
+
+def test_run_ids_started_together_are_distinct():
+    ids = [new_run_id() for _ in range(50)]
+    assert len(set(ids)) == len(ids)
+
+
+def test_reports_follow_matrix_order_not_completion_order(tmp_path):
+    store = ResultsStore(str(tmp_path / 'results.db'))
+    # Cells finish out of order: m2's first cell, then m1's second, ...
+    for model, test_id, position in [('m2', 'find', 2), ('m1', 'org', 1),
+                                     ('m2', 'org', 3), ('m1', 'find', 0)]:
+        store.add_result('run', model, test_id, _result(0.5), position)
+    store.add_result('run', 'm1', 'org', _result(1.0), 1)    # A later trial
+
+    latest = [(row['model'], row['test_id'], row['success_rate'])
+              for row in store.iter_latest('run')]
+    assert latest == [('m1', 'find', 0.5), ('m1', 'org', 1.0),
+                      ('m2', 'find', 0.5), ('m2', 'org', 0.5)]
+    summary = [(row['model'], row['test_id'], row['trials'], row['success_rate'])
+               for row in store.iter_summary('run')]
+    assert summary == [('m1', 'find', 1, 0.5), ('m1', 'org', 2, 0.75),
+                       ('m2', 'find', 1, 0.5), ('m2', 'org', 1, 0.5)]
+    assert store.completed_cells('run') == {('m1', 'find'), ('m1', 'org'),
+                                            ('m2', 'find'), ('m2', 'org')}
+    store.close()
+
+
+def test_cached_trials_do_not_dilute_timings(tmp_path):
+    store = ResultsStore(str(tmp_path / 'results.db'))
+    store.add_result('run', 'm', 'find', _result(1.0, execution_time=10.0), 0)
+    store.add_result('run', 'm', 'find', _result(1.0, execution_time=0.01, cached=True), 0)
+    store.add_result('run', 'm', 'org', _result(1.0, execution_time=0.02, cached=True), 1)
+    rows = {row['test_id']: row for row in store.iter_summary('run')}
+    assert rows['find']['execution_time'] == 10.0 and rows['find']['cached'] == 1
+    assert rows['org']['execution_time'] == 0.02
+    store.close()
+
+
+def test_responses_are_stored_once(tmp_path):
+    path = str(tmp_path / 'results.db')
+    store = ResultsStore(path)
+    text = "[File: fizzbuzz.py]\n- Bug: off_by_one\n" * 100
+    digest = store.add_result('run', 'm', 'find', _result(1.0, response=text), 0)
+    assert store.add_result('run', 'm', 'org', _result(1.0, response=text), 1) == digest
+    assert store.response(digest) == text
+    store.close()
+    with sqlite3.connect(path) as db:
+        assert db.execute("SELECT COUNT(*) FROM responses").fetchone() == (1,)
+
+
+def test_stores_without_positions_are_migrated(tmp_path):
+    path = str(tmp_path / 'results.db')
+    with sqlite3.connect(path) as db:
+        db.execute("CREATE TABLE results (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                   "run_id TEXT NOT NULL, model TEXT NOT NULL, test_id TEXT NOT NULL, "
+                   "created REAL NOT NULL, bugs_identified REAL, fixes_correct REAL, "
+                   "execution_time REAL, token_efficiency REAL, success_rate REAL, "
+                   "queue_time REAL, service_time REAL, response_hash TEXT, "
+                   "data TEXT NOT NULL)")
+        db.execute("INSERT INTO results (run_id, model, test_id, created, data) "
+                   "VALUES ('old', 'm', 'org', 0, '{}')")
+    store = ResultsStore(path)
+    store.add_result('old', 'm', 'find', _result(1.0), 0)
+    # The legacy row has no position, so it sorts after positioned cells
+    assert [row['test_id'] for row in store.iter_latest('old')] == ['find', 'org']
+    store.close()
@@ -0,0 +1,52 @@
+"""
+Single-pass scoring matches a naive per-keyword count and attributes sections.
+"""
+
+from scoring import EXPECTED_BUGS, EXPECTED_FIXES, KeywordMatcher, ResponseScorer, get_scorer
+
+RESPONSE = """Overall the MODULO logic is fine.
+[File: fizzbuzz/fizzbuzz.py]
+- Bug: Off_By_One in the loop (line 3) [high]
+  Fix: use range(1, n + 1) and return the list
+[File: fibonacci/fib.scm]
+- Bug: no base case, so deep recursion hits a stack overflow
+  Fix: make it iterative
+"""
+
+
+def _naive(response):
+    text = response.lower()
+    scores = {}
+    for category, bugs in EXPECTED_BUGS.items():
+        fixes = EXPECTED_FIXES[category]
+        identified = sum(1 for bug in bugs if bug.lower() in text)
+        correct = sum(1 for fix in fixes if fix.lower() in text)
+        scores[category] = {'bugs_identified': identified, 'fixes_correct': correct,
+                            'success_rate': (identified + correct) / (len(bugs) + len(fixes))}
+    return scores
+
+
+def test_scores_match_naive_substring_counts():
+    for response in (RESPONSE, "", "modulo " * 3, RESPONSE.upper()):
+        assert get_scorer().score(response) == _naive(response)
+
+
+def test_hits_are_attributed_to_their_section():
+    sections = {(hit.keyword, hit.section) for hit in get_scorer().hits(RESPONSE)}
+    assert ('modulo', None) in sections
+    assert ('off_by_one', 'fizzbuzz/fizzbuzz.py') in sections
+    assert ('range(1, n + 1)', 'fizzbuzz/fizzbuzz.py') in sections
+    assert ('stack overflow', 'fibonacci/fib.scm') in sections
+    assert ('iterative', 'fibonacci/fib.scm') in sections
+
+
+def test_matcher_finds_overlapping_keywords():
+    matcher = KeywordMatcher({'he': ['he'], 'she': ['she'], 'hers': ['hers']})
+    assert sorted(matcher.scan('ushers')) == [(1, 'she'), (2, 'he'), (2, 'hers')]
+
+
+def test_shared_keywords_count_for_every_category():
+    scorer = ResponseScorer({'a': ['leak'], 'b': ['leak', 'race']}, {'a': ['lock'], 'b': []})
+    scores = scorer.score("a leak, then a lock")
+    assert scores['a'] == {'bugs_identified': 1, 'fixes_correct': 1, 'success_rate': 1.0}
+    assert scores['b'] == {'bugs_identified': 1, 'fixes_correct': 0, 'success_rate': 0.5}
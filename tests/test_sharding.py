@@ -0,0 +1,52 @@
+"""
+Shard planning respects the budget, keeps directories together and merges back.
+"""
+
+import random
+
+import pytest
+
+from ollama_client import ChatResult
+from sharding import merge_chat_results, plan_shards
+
+
+def _fragments(seed, count=60):
+    rng = random.Random(seed)
+    return [(f"d{rng.randrange(8)}/f{i:03d}.py", rng.randrange(1, 400)) for i in range(count)]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_plans_cover_every_path_within_budget(seed):
+    fragments = sorted(_fragments(seed))
+    tokens = dict(fragments)
+    order = [path for path, _ in fragments]
+    plan = plan_shards(fragments, 1000)
+    assert sorted(path for shard in plan for path in shard) == sorted(order)
+    for shard in plan:
+        assert sum(tokens[path] for path in shard) <= 1000 or len(shard) == 1
+        assert shard == sorted(shard, key=order.index)
+    assert [shard[0] for shard in plan] == sorted((shard[0] for shard in plan), key=order.index)
+
+
+def test_directories_that_fit_stay_together():
+    fragments = [('a/1', 300), ('a/2', 300), ('b/1', 500), ('b/2', 400), ('c/1', 100)]
+    # Largest directory first: c/ fills the gap beside b/
+    assert plan_shards(fragments, 1000) == [['a/1', 'a/2'], ['b/1', 'b/2', 'c/1']]
+
+
+def test_oversized_directories_and_files_are_split():
+    fragments = [('a/1', 600), ('a/2', 600), ('b/1', 2000)]
+    assert plan_shards(fragments, 1000) == [['a/1'], ['a/2'], ['b/1']]
+    assert plan_shards(fragments, 10000) == [['a/1', 'a/2', 'b/1']]
+
+
+def test_merged_results_read_as_one_answer():
+    one = ChatResult("first", 2.0, 0.5, 100, 50.0, stats={'eval_count': 100}, cached=True)
+    two = ChatResult("second", 3.0, 0.7, 300, 100.0, stats={'eval_count': 300}, attempts=2)
+    merged = merge_chat_results([one, two])
+    assert merged.content == "first\n\nsecond"
+    assert merged.total_time == 5.0 and merged.time_to_first_token == 0.5
+    assert merged.tokens == 400 and merged.tokens_per_second == pytest.approx(400 / 5.0)
+    assert merged.stats == {'eval_count': 400}
+    assert not merged.cached and merged.attempts == 3 and not merged.failed
+    assert merge_chat_results([one]) is one
@@ -0,0 +1,53 @@
+"""
+Snapshots round-trip a corpus and package exactly like the directory.
+"""
+
+import os
+import shutil
+
+import pytest
+
+import packagers
+from corpus import CorpusScanner, get_scanner
+from fragment_cache import FragmentCache
+from snapshot import SnapshotScanner, is_snapshot, write_snapshot
+
+
+@pytest.fixture
+def duplicated(corpus):
+    """The corpus with a copied file and a CRLF file added."""
+    source = os.path.join(corpus, 'fizzbuzz')
+    name = sorted(os.listdir(source))[0]
+    shutil.copy(os.path.join(source, name), os.path.join(source, 'copy_' + name))
+    with open(os.path.join(source, 'windows.py'), 'wb') as f:
+        f.write(b"def f():\r\n    return 1\r\n")
+    return corpus
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_round_trip(duplicated, tmp_path, compress):
+    scanner = CorpusScanner(duplicated)
+    dest = str(tmp_path / 'corpus.snap')
+    stats = write_snapshot(scanner, dest, compress=compress)
+    assert stats['files'] == len(scanner.scan())
+    assert stats['unique'] == stats['files'] - 1
+    if compress:
+        assert stats['blob_bytes'] < stats['content_bytes']
+
+    assert is_snapshot(dest) and not is_snapshot(duplicated)
+    with SnapshotScanner(dest) as snap:
+        assert snap.root == scanner.root
+        assert snap.scan() == scanner.scan()
+        for path in scanner.paths():
+            assert snap.read(path) == scanner.read(path)
+            assert snap.stat(path).st_mtime_ns == scanner.stat(path).st_mtime_ns
+
+
+def test_snapshot_packages_like_the_directory(duplicated, tmp_path):
+    dest = str(tmp_path / 'corpus.snap')
+    write_snapshot(CorpusScanner(duplicated), dest)
+    snap = get_scanner(dest)
+    assert isinstance(snap, SnapshotScanner)
+    for render in (packagers.iter_find, packagers.iter_markdown, packagers.iter_org_archive):
+        expected = "".join(render(CorpusScanner(duplicated), cache=FragmentCache()))
+        assert "".join(render(snap, cache=FragmentCache())) == expected
@@ -0,0 +1,91 @@
+"""
+Adaptive deadlines, refusal of hopeless requests and retry backoff.
+"""
+
+import math
+import random
+
+from ollama_client import ChatResult
+from timeouts import AdaptiveTimeouts, LatencyHistogram, RetryPolicy, stretch
+
+
+def _reply(tokens: int, tps: float, prompt_tokens: int = 1000) -> ChatResult:
+    return ChatResult(content="x", total_time=tokens / tps, time_to_first_token=0.1,
+                      tokens=tokens, tokens_per_second=tps,
+                      stats={'prompt_eval_count': prompt_tokens,
+                             'prompt_eval_duration': int(0.1e9)})
+
+
+def test_short_reply_does_not_cut_off_a_longer_stream():
+    timeouts = AdaptiveTimeouts(max_timeout=600.0)
+    timeouts.observe('m', _reply(60, 30.0), 1000)
+    streamed = timeouts.deadlines('m', 1000)
+    assert streamed.total == 600.0
+    # A 400-token answer at 30 tok/s needs ~13.7s even without streaming
+    assert timeouts.deadlines('m', 1000, stream=False).total > 400 / 30.0
+
+
+def test_idle_deadline_still_catches_a_wedged_stream():
+    timeouts = AdaptiveTimeouts(min_timeout=1.0, slack=1.0, idle_tokens=20)
+    timeouts.observe('m', _reply(400, 100.0), 1000)
+    assert timeouts.deadlines('m', 1000).idle < 5.0
+
+
+def test_unobserved_model_is_never_hopeless():
+    timeouts = AdaptiveTimeouts(max_timeout=600.0)
+    deadlines = timeouts.deadlines('m', 60000)
+    assert deadlines.expected > 600.0
+    assert not timeouts.hopeless(deadlines)
+
+    timeouts.observe('m', ChatResult(content="x", total_time=1.0, time_to_first_token=1.0,
+                                     tokens=10, tokens_per_second=1.0,
+                                     stats={'prompt_eval_count': 10,
+                                            'prompt_eval_duration': int(1e9)}), 10)
+    assert timeouts.hopeless(timeouts.deadlines('m', 60000))
+
+
+def test_fixed_timeout_when_not_adaptive():
+    timeouts = AdaptiveTimeouts(default_timeout=30.0, adaptive=False)
+    deadlines = timeouts.deadlines('m', 60000)
+    assert (deadlines.total, deadlines.first_token, deadlines.idle) == (30.0, 30.0, 30.0)
+    assert not timeouts.hopeless(deadlines)
+
+
+def test_stretch_is_capped_by_the_ceiling():
+    deadlines = AdaptiveTimeouts(max_timeout=60.0).deadlines('m', 100, stream=False)
+    stretched = stretch(deadlines, 100.0, 60.0)
+    assert stretched.total == stretched.first_token == stretched.idle == 60.0
+
+
+def test_backoff_stays_within_the_jitter_window():
+    policy = RetryPolicy(base_delay=0.5, max_delay=2.0, rng=random.Random(0))
+    for attempt in range(1, 8):
+        assert 0 <= policy.backoff(attempt) <= min(2.0, 0.5 * 2 ** (attempt - 1))
+
+
+def test_histogram_percentiles():
+    hist = LatencyHistogram((1.0, 2.0))
+    for seconds in (0.5, 0.5, 1.5, 30.0):
+        hist.observe(seconds)
+    assert hist.percentile(50) == 1.0
+    assert hist.percentile(75) == 2.0
+    assert hist.percentile(100) == math.inf
+    assert list(hist.rows()) == [("0-1s", 2), ("1-2s", 1), ("2-infs", 1)]
+
+
+def test_deadlines_include_reload_after_unload(corpus, fake_ollama):
+    from test_harness import FormatTester
+    url, _ = fake_ollama
+    tester = FormatTester(corpus, ollama_url=url)
+    seen = []
+    deadlines = tester.timeouts.deadlines
+    tester.timeouts.deadlines = lambda model, tokens, loaded=True, stream=True: (
+        seen.append(loaded) or deadlines(model, tokens, loaded, stream))
+
+    assert tester._warmup('m') > 0
+    tester._chat('m', 'def f(): pass')
+    tester._unload('m')
+    tester._chat('m', 'def f(): pass')
+    tester._chat('m', 'def f(): pass')
+    assert seen == [True, False, True]
+    assert 'm' in tester.load_times    # Still reported
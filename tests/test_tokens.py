@@ -0,0 +1,75 @@
+"""
+Token accounting reuses packaged fragments and rejects unusable vocabularies.
+"""
+
+import json
+
+import pytest
+
+import multi_render
+from corpus import CorpusScanner
+from format_tester import FormatTester
+from fragment_cache import FragmentCache
+from tokens import BPETokenizer, CharRatioTokenizer, TokenCounter, load_tokenizer
+
+
+@pytest.mark.parametrize('tool', ['find', 'markdown', 'org-archive'])
+def test_measure_tokens_reuses_packaged_fragments(corpus, reads, tool):
+    tester = FormatTester(corpus, format_tool=tool)
+    packed = tester.package_corpus()
+    paths = tester.scanner.paths()
+    misses = tester.fragment_cache.misses
+    report = tester.measure_tokens(packed)
+    # Only content token counts are new; every fragment comes from the cache
+    assert tester.fragment_cache.misses - misses == len(paths)
+
+    multi_render.clear()
+    log = reads(tester.scanner)
+    assert tester.measure_tokens(packed) == report
+    assert log == []
+    assert sorted(report.per_file) == sorted(paths)
+    assert report.content_tokens == sum(content for content, _ in report.per_file.values())
+    assert all(wrapper > 0 for _, wrapper in report.per_file.values())
+
+
+def test_sentencepiece_vocabulary_is_rejected(tmp_path, capsys):
+    path = tmp_path / 'tokenizer.json'
+    path.write_text(json.dumps({'model': {'type': 'BPE',
+                                          'vocab': {'a': 0, 'b': 1, '▁ab': 2}}}))
+    with pytest.raises(ValueError):
+        BPETokenizer.from_file(str(path))
+    assert isinstance(load_tokenizer(str(path)), CharRatioTokenizer)
+    assert 'Warning' in capsys.readouterr().out
+
+
+def _write_tokenizer(path, merges, **model):
+    vocab = {'a': 0, 'b': 1, 'c': 2, 'ab': 3, 'bc': 4, 'abc': 5}
+    path.write_text(json.dumps({'model': dict(type='BPE', vocab=vocab, merges=merges, **model)}))
+    return str(path)
+
+
+def test_tokenizer_json_counts_follow_merges(tmp_path):
+    path = _write_tokenizer(tmp_path / 'tokenizer.json', ['b c', 'a b', 'ab c'])
+    # `b c` has priority, and nothing merges `a` with `bc`
+    assert BPETokenizer.from_file(path).count('abc') == 2
+    path = _write_tokenizer(tmp_path / 'tokenizer.json', [['a', 'b'], ['ab', 'c']])
+    assert BPETokenizer.from_file(path).count('abc') == 1
+    path = _write_tokenizer(tmp_path / 'tokenizer.json', ['b c'], ignore_merges=True)
+    assert BPETokenizer.from_file(path).count('abc') == 1
+
+
+def test_cached_counts_are_keyed_by_vocabulary(corpus, tmp_path):
+    (tmp_path / 'one').mkdir()
+    (tmp_path / 'two').mkdir()
+    first = _write_tokenizer(tmp_path / 'one' / 'tokenizer.json', ['a b'])
+    second = _write_tokenizer(tmp_path / 'two' / 'tokenizer.json', ['b c'])
+    assert BPETokenizer.from_file(first).fingerprint != BPETokenizer.from_file(second).fingerprint
+    assert CharRatioTokenizer(4.0).fingerprint != CharRatioTokenizer(2.0).fingerprint
+
+    cache = FragmentCache()
+    scanner = CorpusScanner(corpus)
+    coarse = multi_render.render_all(scanner, ('find',), TokenCounter(CharRatioTokenizer(4.0)),
+                                     cache=cache)
+    fine = multi_render.render_all(scanner, ('find',), TokenCounter(CharRatioTokenizer(2.0)),
+                                   cache=cache)
+    assert fine.content_tokens > coarse.content_tokens
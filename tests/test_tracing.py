@@ -0,0 +1,68 @@
+"""
+Spans stay balanced around generators and memory profiling is not shared.
+"""
+
+import threading
+import time
+import tracemalloc
+
+from format_tester import FormatTester
+from tracing import Tracer
+
+
+def test_abandoned_package_stream_leaves_stack_balanced(corpus):
+    tracer = Tracer()
+    tester = FormatTester(corpus, format_tool='org-archive', tracer=tracer)
+    chunks = tester.iter_corpus()
+    next(chunks)
+    chunks.close()
+    with tracer.span('after') as span:
+        pass
+    assert span.parent is None
+    assert tracer._stack() == []
+
+
+def test_interleaved_streams_record_one_span_each(corpus):
+    tracer = Tracer()
+    first = FormatTester(corpus, format_tool='find', tracer=tracer)
+    second = FormatTester(corpus, format_tool='markdown', tracer=tracer)
+    a, b = first.iter_corpus(), second.iter_corpus()
+    out_a, out_b = [next(a)], [next(b)]
+    out_a.extend(a)
+    out_b.extend(b)
+    assert "".join(out_a) == first.package_corpus()
+    spans = [span for span in tracer.spans if span.name == 'package']
+    assert sorted(span.attrs['format'] for span in spans) == ['find', 'find', 'markdown']
+    assert all(span.parent is None for span in spans)
+
+
+def test_generation_time_excludes_consumer_work(corpus):
+    tester = FormatTester(corpus, format_tool='find')
+    for _ in tester.iter_corpus():
+        time.sleep(0.05)
+    assert tester.generation_time < 0.05
+
+
+def test_concurrent_memory_profiling_is_not_shared():
+    tracer = Tracer(profile_stages=['work'], trace_memory=True)
+    inside = threading.Barrier(2, timeout=5)
+    spans = []
+
+    def work():
+        with tracer.span('work') as span:
+            inside.wait()
+            data = [bytes(1024) for _ in range(100)]
+            inside.wait()
+            del data
+        spans.append(span)
+
+    threads = [threading.Thread(target=work) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    tracemalloc.stop()
+    measured = [span for span in spans if 'alloc_peak_bytes' in span.attrs]
+    skipped = [span for span in spans if span.attrs.get('alloc_peak_skipped')]
+    assert len(measured) == 1 and len(skipped) == 1
+    assert measured[0].attrs['alloc_peak_bytes'] > 0
@@ -0,0 +1,213 @@
+"""
+Throughput-aware timeouts, retry backoff and latency histograms.
+
+Each model's prefill and decode throughput (and load time) is tracked as
+an exponentially weighted moving average of what Ollama reports, so a
+request's deadlines are derived from its prompt size instead of one fixed
+timeout: large prompts on slow models get the time they need, and a
+wedged fast model is given up on after a few missed token intervals.
+Requests whose expected time at a model's observed throughput exceeds the
+ceiling are refused outright instead of occupying a slot until they time
+out.
+"""
+
+import bisect
+import math
+import random
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Tuple
+
+from ollama_client import ChatResult
+
+# Assumed until a model has been observed; deliberately slow
+DEFAULT_PREFILL_TPS = 100.0
+DEFAULT_DECODE_TPS = 10.0
+DEFAULT_RESPONSE_TOKENS = 512
+
+# Upper bounds (seconds) of the latency histogram buckets, roughly x2 apart
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0,
+                   120.0, 300.0, 600.0)
+
+
+@dataclass
+class Deadlines:
+    total: float          # Whole request, including streaming the answer
+    first_token: float    # Connect, load and prefill until the response starts
+    idle: float           # Longest gap allowed between streamed chunks
+    expected: float       # Unpadded estimate of the request's duration
+    observed: bool = False    # Estimate comes from this model's own timings
+
+
+@dataclass
+class Throughput:
+    """EWMA estimates for one model."""
+    prefill_tps: float = DEFAULT_PREFILL_TPS
+    decode_tps: float = DEFAULT_DECODE_TPS
+    load_time: float = 0.0
+    response_tokens: float = DEFAULT_RESPONSE_TOKENS
+    samples: int = 0
+
+
+class LatencyHistogram:
+    """Per-bucket (non-cumulative) counts of request latencies."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)    # Last bucket is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile (q in [0, 100])."""
+        if not self.count:
+            return 0.0
+        rank = math.ceil(self.count * q / 100) or 1
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else math.inf
+        return math.inf
+
+    def rows(self) -> Iterator[Tuple[str, int]]:
+        """Yield (bucket label, count) for non-empty buckets."""
+        lower = 0.0
+        for index, count in enumerate(self.counts):
+            upper = self.buckets[index] if index < len(self.buckets) else math.inf
+            if count:
+                yield f"{lower:g}-{upper:g}s", count
+            lower = upper
+
+
+class AdaptiveTimeouts:
+    """Per-model deadlines derived from observed prefill and decode throughput.
+
+    Deadlines are the expected time scaled by safety plus slack, clamped to
+    [min_timeout, max_timeout]; until a model has been observed they are
+    never shorter than default_timeout. A streamed request's total deadline
+    is the ceiling: the first-token and idle deadlines already catch slow
+    starts and wedged streams, and a stream that keeps producing tokens is
+    not cut off because its answer is longer than earlier ones. With
+    adaptive=False every request gets the fixed default timeout, as before.
+    """
+
+    def __init__(self, default_timeout: float = 30.0, min_timeout: float = 5.0,
+                 max_timeout: float = 600.0, safety: float = 2.0, slack: float = 2.0,
+                 idle_tokens: int = 20, alpha: float = 0.3, adaptive: bool = True):
+        self.default_timeout = default_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max(max_timeout, default_timeout)
+        self.safety = safety
+        self.slack = slack
+        self.idle_tokens = idle_tokens      # Missed token intervals before a stream is wedged
+        self.alpha = alpha
+        self.adaptive = adaptive
+        self.models: Dict[str, Throughput] = {}
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def _clamp(self, seconds: float) -> float:
+        return min(max(seconds, self.min_timeout), self.max_timeout)
+
+    def _ewma(self, old: float, new: float, first: bool) -> float:
+        return new if first else old + self.alpha * (new - old)
+
+    def deadlines(self, model: str, prompt_tokens: int, loaded: bool = True,
+                  stream: bool = True) -> Deadlines:
+        """Deadlines for a request of prompt_tokens to model."""
+        est = self.models.get(model) or Throughput()
+        observed = est.samples > 0
+        prefill = prompt_tokens / est.prefill_tps + (0.0 if loaded else est.load_time)
+        # Budget for a full-length answer even after short replies
+        decode = max(est.response_tokens, DEFAULT_RESPONSE_TOKENS) / est.decode_tps
+        expected = prefill + decode
+        if not self.adaptive:
+            timeout = self.default_timeout
+            return Deadlines(timeout, timeout, timeout, expected, observed)
+        floor = self.min_timeout if observed else self.default_timeout
+        first_token = self._clamp(max(prefill * self.safety + self.slack, floor))
+        idle = self._clamp(max(self.idle_tokens / est.decode_tps + self.slack,
+                               self.min_timeout if observed else floor))
+        if stream:
+            total = self.max_timeout
+        else:
+            total = self._clamp(max(expected * self.safety + self.slack, floor))
+        return Deadlines(max(total, first_token), first_token, idle, expected, observed)
+
+    def hopeless(self, deadlines: Deadlines) -> bool:
+        """True if the model's observed throughput puts the request past the ceiling.
+
+        Unobserved models are never refused: the defaults are deliberately slow.
+        """
+        return self.adaptive and deadlines.observed and deadlines.expected > self.max_timeout
+
+    def observe_load(self, model: str, load_time: float):
+        with self._lock:
+            est = self.models.setdefault(model, Throughput())
+            est.load_time = self._ewma(est.load_time, load_time, not est.load_time)
+
+    def record_latency(self, model: str, seconds: float):
+        """Add a request's wall time, successful or not, to the model's histogram."""
+        with self._lock:
+            self.histograms.setdefault(model, LatencyHistogram()).observe(seconds)
+
+    def observe(self, model: str, result: ChatResult, prompt_tokens: int):
+        """Fold a completed request's timings into the model's estimates."""
+        with self._lock:
+            est = self.models.setdefault(model, Throughput())
+            first = est.samples == 0
+            stats = result.stats
+            prefill_seconds = stats.get('prompt_eval_duration', 0) / 1e9
+            prefill_tokens = stats.get('prompt_eval_count') or prompt_tokens
+            if not prefill_seconds and result.time_to_first_token:
+                prefill_seconds = max(result.time_to_first_token - result.load_time, 0.0)
+            if prefill_seconds > 0:
+                est.prefill_tps = self._ewma(est.prefill_tps, prefill_tokens / prefill_seconds, first)
+            if result.tokens_per_second > 0:
+                est.decode_tps = self._ewma(est.decode_tps, result.tokens_per_second, first)
+            if result.tokens and not result.stopped_early:
+                # Track the larger answers: a short reply should not shrink the budget much
+                est.response_tokens = (result.tokens if first else
+                                       max(result.tokens,
+                                           self._ewma(est.response_tokens, result.tokens, False)))
+            if result.load_time:
+                est.load_time = self._ewma(est.load_time, result.load_time, not est.load_time)
+            est.samples += 1
+
+
+@dataclass
+class RetryPolicy:
+    """Bounded retries with full-jitter exponential backoff."""
+    max_retries: int = 2
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    timeout_growth: float = 1.5     # Deadlines are stretched by this on each timed-out retry
+    rng: random.Random = field(default_factory=random.Random, repr=False)
+
+    def backoff(self, attempt: int) -> float:
+        """Seconds to sleep before retry number attempt (1-based)."""
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+def stretch(deadlines: Deadlines, factor: float, ceiling: float) -> Deadlines:
+    """Scale deadlines after a timeout, never beyond ceiling."""
+    return Deadlines(min(deadlines.total * factor, ceiling),
+                     min(deadlines.first_token * factor, ceiling),
+                     min(deadlines.idle * factor, ceiling),
+                     deadlines.expected, deadlines.observed)
+
+
+def iter_histogram_report(histograms: Dict[str, LatencyHistogram]) -> Iterator[str]:
+    """Render per-model latency histograms as markdown lines."""
+    yield "| Model | Requests | p50 | p95 | Buckets |"
+    yield "|-------|----------|-----|-----|---------|"
+    for model, hist in histograms.items():
+        buckets = ", ".join(f"{label}: {count}" for label, count in hist.rows())
+        yield (f"| {model} | {hist.count} | <={hist.percentile(50):g}s | "
+               f"<={hist.percentile(95):g}s | {buckets} |")
@@ -0,0 +1,253 @@
+"""
+Offline token counting for packaged corpora.
+
+Tokenizers are pluggable: a byte-level BPE loaded from a local vocabulary
+file (tiktoken `.tiktoken` rank files or Hugging Face `tokenizer.json`),
+or a character-ratio estimate when no vocabulary is available. Vocabularies
+that are not byte-level (e.g. SentencePiece) are rejected rather than
+counted wrongly. Counts are cached by content hash, and per-file counts by
+path/mtime/size, so token accounting is cheap enough to run on every
+packaging pass.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from corpus import CorpusScanner
+
+# GPT-2 style pre-tokenization expressed with the stdlib `re` module.
+PRETOKENIZE = re.compile(
+    r"""'(?:[sdmt]|ll|ve|re)| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|\s+(?!\S)|\s+"""
+)
+
+
+class Tokenizer:
+    """Base tokenizer interface.
+
+    fingerprint identifies the vocabulary and parameters, so persisted
+    counts are never shared between tokenizers that would count differently.
+    """
+    name = "base"
+    fingerprint = "base"
+
+    def count(self, text: str) -> int:
+        raise NotImplementedError
+
+
+class CharRatioTokenizer(Tokenizer):
+    """Estimate tokens as characters / chars_per_token when no vocabulary is loaded."""
+    name = "char-ratio"
+
+    def __init__(self, chars_per_token: float = 4.0):
+        self.chars_per_token = chars_per_token
+        self.fingerprint = f"{self.name}:{chars_per_token!r}"
+
+    def count(self, text: str) -> int:
+        return int(len(text) / self.chars_per_token + 0.5)
+
+
+def _bytes_to_unicode() -> Dict[int, str]:
+    """GPT-2 byte-to-printable-character table used by byte-level BPE vocabularies."""
+    bs = (list(range(ord("!"), ord("~") + 1)) + list(range(ord("¡"), ord("¬") + 1))
+          + list(range(ord("®"), ord("ÿ") + 1)))
+    cs = bs[:]
+    n = 0
+    for b in range(256):
+        if b not in bs:
+            bs.append(b)
+            cs.append(256 + n)
+            n += 1
+    return dict(zip(bs, map(chr, cs)))
+
+
+class BPETokenizer(Tokenizer):
+    """Byte-level BPE tokenizer driven by a token -> merge rank table.
+
+    tiktoken files merge the adjacent pair whose concatenation ranks lowest.
+    A tokenizer.json is driven by its `merges` list instead (pair -> priority),
+    as Hugging Face tokenizers are. Pre-tokenization always uses the GPT-2
+    pattern, so vocabularies built with another pre-tokenizer (e.g. Llama 3's)
+    get close but not exact counts.
+    """
+    name = "bpe"
+
+    def __init__(self, ranks: Dict[bytes, int], name: str = "bpe",
+                 merges: Optional[Dict[Tuple[bytes, bytes], int]] = None,
+                 whole_tokens: bool = True, fingerprint: Optional[str] = None):
+        self.ranks = ranks
+        self.name = name
+        self.merges = merges
+        self.whole_tokens = whole_tokens    # A piece already in the vocabulary is one token
+        self.fingerprint = fingerprint or self._digest(ranks, merges)
+        self._piece_count = lru_cache(maxsize=65536)(self._count_piece)
+
+    @staticmethod
+    def _digest(ranks: Dict[bytes, int],
+                merges: Optional[Dict[Tuple[bytes, bytes], int]]) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for token, rank in sorted(ranks.items()):
+            digest.update(b"%d:%s\0" % (rank, token))
+        for (left, right), rank in sorted((merges or {}).items(), key=lambda item: item[1]):
+            digest.update(b"%d:%s %s\0" % (rank, left, right))
+        return f"bpe:{digest.hexdigest()}"
+
+    @classmethod
+    def from_file(cls, path: str) -> "BPETokenizer":
+        """Load a tiktoken rank file or a Hugging Face tokenizer.json."""
+        name = os.path.basename(path)
+        with open(path, 'rb') as f:
+            data = f.read()
+        fingerprint = f"bpe:{hashlib.blake2b(data, digest_size=16).hexdigest()}"
+        if path.endswith('.json'):
+            model = json.loads(data.decode('utf-8')).get('model', {})
+            if model.get('type', 'BPE') != 'BPE':
+                raise ValueError(f"{name}: unsupported {model['type']} tokenizer model")
+            decoder = {c: b for b, c in _bytes_to_unicode().items()}
+
+            def decode(token: str) -> bytes:
+                try:
+                    return bytes(decoder[c] for c in token)
+                except KeyError:
+                    # e.g. SentencePiece's `▁`: counting without it would be wrong
+                    raise ValueError(f"{name}: not a byte-level BPE vocabulary "
+                                     f"(token {token!r})") from None
+
+            ranks = {decode(token): rank for token, rank in model.get('vocab', {}).items()}
+            merges = {}
+            for rank, merge in enumerate(model.get('merges', [])):
+                left, right = merge.split(' ', 1) if isinstance(merge, str) else merge
+                merges.setdefault((decode(left), decode(right)), rank)
+            if not merges:
+                raise ValueError(f"{name}: tokenizer.json has no merges")
+            return cls(ranks, name, merges, whole_tokens=bool(model.get('ignore_merges')),
+                       fingerprint=fingerprint)
+
+        ranks = {}
+        for line in data.splitlines():
+            if line.strip():
+                token, rank = line.split()
+                ranks[base64.b64decode(token)] = int(rank)
+        return cls(ranks, name, fingerprint=fingerprint)
+
+    def _rank(self, left: bytes, right: bytes) -> Optional[int]:
+        if self.merges is not None:
+            return self.merges.get((left, right))
+        return self.ranks.get(left + right)
+
+    def _count_piece(self, piece: bytes) -> int:
+        if self.whole_tokens and piece in self.ranks:
+            return 1
+        parts = [piece[i:i + 1] for i in range(len(piece))]
+        while len(parts) > 1:
+            best_rank, best_index = None, -1
+            for i in range(len(parts) - 1):
+                rank = self._rank(parts[i], parts[i + 1])
+                if rank is not None and (best_rank is None or rank < best_rank):
+                    best_rank, best_index = rank, i
+            if best_rank is None:
+                break
+            parts[best_index:best_index + 2] = [parts[best_index] + parts[best_index + 1]]
+        return len(parts)
+
+    def count(self, text: str) -> int:
+        return sum(self._piece_count(piece.encode('utf-8'))
+                   for piece in PRETOKENIZE.findall(text))
+
+
+@dataclass
+class TokenReport:
+    total_tokens: int                # Tokens in the whole packed archive
+    content_tokens: int              # Tokens of raw file contents
+    wrapper_tokens: int              # Tokens spent on format scaffolding
+    per_file: Dict[str, Tuple[int, int]] = field(default_factory=dict)  # path -> (content, wrapper)
+
+    @property
+    def overhead(self) -> float:
+        return self.wrapper_tokens / self.total_tokens if self.total_tokens else 0.0
+
+
+class TokenCounter:
+    """Tokenizer front-end caching counts by content hash and file stat."""
+
+    def __init__(self, tokenizer: Optional[Tokenizer] = None):
+        self.tokenizer = tokenizer or CharRatioTokenizer()
+        self._by_hash: Dict[str, int] = {}
+        self._by_file: Dict[Tuple[str, str, int, int], int] = {}
+        self._lock = threading.Lock()
+
+    def count(self, text: str) -> int:
+        """Count tokens in text, reusing the count for identical content."""
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+        cached = self._by_hash.get(digest)
+        if cached is None:
+            cached = self.tokenizer.count(text)
+            with self._lock:
+                self._by_hash[digest] = cached
+        return cached
+
+    def count_file(self, scanner: CorpusScanner, path: str) -> int:
+        """Count tokens in a corpus file, only reading it when its stat changed."""
+        st = scanner.stat(path)
+        key = (scanner.variant, path, st.st_mtime_ns, st.st_size)
+        cached = self._by_file.get(key)
+        if cached is None:
+            cached = self.count(scanner.read(path))
+            with self._lock:
+                self._by_file[key] = cached
+        return cached
+
+    def corpus_tokens(self, scanner: CorpusScanner) -> int:
+        """Total content tokens across the corpus."""
+        return sum(self.count_file(scanner, path) for path in scanner.paths())
+
+    def report(self, packed: str, scanner: CorpusScanner,
+               rendered: Optional[Dict[str, Tuple[int, int]]] = None) -> TokenReport:
+        """Split the tokens of a packed archive into content and wrapper tokens.
+
+        rendered maps each path to its (content, fragment) token counts, as
+        taken from a render pass over cached fragments; with it the wrapper
+        cost is attributed per file, otherwise (external tools) only the
+        archive-wide split is known.
+        """
+        per_file: Dict[str, Tuple[int, int]] = {}
+        if rendered is None:
+            content_tokens = self.corpus_tokens(scanner)
+        else:
+            content_tokens = 0
+            for path, (content, fragment) in rendered.items():
+                content_tokens += content
+                per_file[path] = (content, max(fragment - content, 0))
+        total = self.count(packed)
+        return TokenReport(total_tokens=total,
+                           content_tokens=content_tokens,
+                           wrapper_tokens=max(total - content_tokens, 0),
+                           per_file=per_file)
+
+
+def load_tokenizer(path: Optional[str] = None) -> Tokenizer:
+    """Load a BPE tokenizer from path (or $TOKENIZER_PATH), else estimate by characters."""
+    path = path or os.environ.get('TOKENIZER_PATH')
+    if path and os.path.exists(path):
+        try:
+            return BPETokenizer.from_file(path)
+        except ValueError as e:
+            print(f"Warning: {e}; estimating tokens by characters instead")
+    return CharRatioTokenizer()
+
+
+_COUNTERS: Dict[Optional[str], TokenCounter] = {}
+
+
+def get_counter(path: Optional[str] = None) -> TokenCounter:
+    """Return the shared token counter for a tokenizer vocabulary."""
+    counter = _COUNTERS.get(path)
+    if counter is None:
+        counter = _COUNTERS[path] = TokenCounter(load_tokenizer(path))
+    return counter
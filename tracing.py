@@ -0,0 +1,197 @@
+"""
+Lightweight per-stage tracing for the package -> infer -> evaluate pipeline.
+
+Spans are timed with monotonic nanosecond clocks, nest per thread, and can
+be exported as Chrome trace events (chrome://tracing, Perfetto) or a JSON
+summary. Selected stages can additionally be run under cProfile and
+tracemalloc.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+
+@dataclass
+class Span:
+    name: str
+    start_ns: int
+    end_ns: int = 0
+    thread_id: int = 0
+    parent: Optional[str] = None
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+
+# tracemalloc's peak is process-wide, so only one span measures it at a time
+_MEMORY_LOCK = threading.Lock()
+
+
+class Tracer:
+    """Record nested spans; optionally profile selected stages.
+
+    profile_stages names the spans to run under cProfile (and, with
+    trace_memory, tracemalloc). Nested profiled spans on the same thread
+    are folded into the outermost one. tracemalloc counts allocations of
+    every thread and has a single peak, so memory is measured by one
+    profiled span at a time: a span that starts while another is being
+    measured records `alloc_peak_skipped` instead of a clobbered peak, and
+    a measured peak includes whatever other threads allocated meanwhile.
+    Profile memory with cells run one at a time for per-stage numbers.
+    """
+
+    enabled = True
+
+    def __init__(self, profile_stages: Iterable[str] = (), trace_memory: bool = False):
+        self.profile_stages = set(profile_stages)
+        self.trace_memory = trace_memory
+        self.spans: List[Span] = []
+        self.profiles: Dict[str, pstats.Stats] = {}
+        self._epoch_ns = time.perf_counter_ns()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Span]:
+        """Time a block of work as a named span."""
+        stack = self._stack()
+        current = Span(name, time.perf_counter_ns(), thread_id=threading.get_ident(),
+                       parent=stack[-1].name if stack else None, attrs=attrs)
+        stack.append(current)
+
+        profiler = None
+        measuring = False
+        if name in self.profile_stages and not getattr(self._local, 'profiling', False):
+            self._local.profiling = True
+            profiler = cProfile.Profile()
+            if self.trace_memory:
+                measuring = _MEMORY_LOCK.acquire(blocking=False)
+                if measuring:
+                    if not tracemalloc.is_tracing():
+                        tracemalloc.start()
+                    tracemalloc.reset_peak()
+                    alloc_start = tracemalloc.get_traced_memory()[0]
+                else:
+                    current.attrs['alloc_peak_skipped'] = True
+            profiler.enable()
+        try:
+            yield current
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._local.profiling = False
+                if measuring:
+                    current.attrs['alloc_peak_bytes'] = (
+                        tracemalloc.get_traced_memory()[1] - alloc_start)
+                    _MEMORY_LOCK.release()
+                self._merge_profile(name, profiler)
+            current.end_ns = time.perf_counter_ns()
+            stack.pop()
+            with self._lock:
+                self.spans.append(current)
+
+    def record(self, name: str, start_ns: int, end_ns: int, **attrs) -> Span:
+        """Add an already-finished span, e.g. work spread across a generator's yields.
+
+        Nothing is pushed on the span stack, so an abandoned or interleaved
+        generator cannot leave it unbalanced. The parent is whatever span is
+        open on this thread when it is recorded.
+        """
+        stack = self._stack()
+        span = Span(name, start_ns, end_ns, thread_id=threading.get_ident(),
+                    parent=stack[-1].name if stack else None, attrs=attrs)
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def _merge_profile(self, name: str, profiler: cProfile.Profile):
+        with self._lock:
+            if name in self.profiles:
+                self.profiles[name].add(profiler)
+            else:
+                self.profiles[name] = pstats.Stats(profiler)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Aggregate span count and total/mean/max milliseconds per span name."""
+        stats: Dict[str, Dict[str, float]] = {}
+        for span in self.spans:
+            entry = stats.setdefault(span.name, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            ms = span.duration * 1000
+            entry['count'] += 1
+            entry['total_ms'] += ms
+            entry['max_ms'] = max(entry['max_ms'], ms)
+        for entry in stats.values():
+            entry['mean_ms'] = entry['total_ms'] / entry['count']
+        return stats
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Return spans as Chrome trace 'complete' events."""
+        pid = os.getpid()
+        return {'traceEvents': [
+            {
+                'name': span.name,
+                'ph': 'X',
+                'ts': (span.start_ns - self._epoch_ns) / 1000,
+                'dur': (span.end_ns - span.start_ns) / 1000,
+                'pid': pid,
+                'tid': span.thread_id,
+                'args': {k: v if isinstance(v, (int, float, bool)) or v is None else str(v)
+                         for k, v in span.attrs.items()},
+            }
+            for span in sorted(self.spans, key=lambda s: s.start_ns)
+        ]}
+
+    def write_chrome_trace(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+    def write_json(self, path: str):
+        """Write the per-stage summary and raw spans as JSON."""
+        with open(path, 'w') as f:
+            json.dump({'summary': self.summary(),
+                       'spans': self.chrome_trace()['traceEvents']}, f, indent=2)
+
+    def profile_report(self, stage: str, limit: int = 20, sort: str = 'cumulative') -> str:
+        """Return the top functions of a profiled stage as text."""
+        stats = self.profiles.get(stage)
+        if stats is None:
+            return ""
+        out = io.StringIO()
+        stats.stream = out
+        stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+
+class NullTracer:
+    """Tracer stand-in that records nothing."""
+
+    enabled = False
+
+    _span = Span('null', 0)
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Span]:
+        yield self._span
+
+    def record(self, name: str, start_ns: int, end_ns: int, **attrs) -> Span:
+        return self._span
+
+
+NULL_TRACER = NullTracer()